@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark and import-time report.
+
+Import report: runs `python -X importtime -c "import <module>"` and lists the
+slowest third-party packages (cumulative time of their top-level import), the
+slowest first-party modules and the imports with the most self time.
+
+Cold start: starts fresh interpreters, each of which imports the app, installs
+the load benchmark's stand-ins (benchmarks/fakes.py) and sends one /chat
+request, and reports the median of:
+- import: `import src.main`
+- stand-ins: installing the fakes (this imports litellm for the fake provider,
+  which the first /chat request would otherwise pay for)
+- first TTFT / first total: the first request, including graph construction
+  and any client creation it triggers
+- first response: process start of the measurement to the end of that response
+
+Usage:
+    cd backend
+    python -m benchmarks.cold_start [--runs 5] [--top 15] [--module src.main] [--output cold.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.load import BENCHMARK_ENV, QUESTIONS
+
+BACKEND_DIR = Path(__file__).parent.parent
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_times(module: str) -> list[dict]:
+    """Parse `-X importtime` output for importing a module in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env={**os.environ, **BENCHMARK_ENV}, capture_output=True, text=True, check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if match := IMPORT_LINE.match(line):
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+    return entries
+
+
+def import_report(entries: list[dict], top: int) -> dict:
+    """Slowest third-party packages, first-party modules and self times."""
+    packages: dict[str, float] = {}
+    for entry in entries:
+        root = entry["module"].split(".")[0]
+        if root != "src":
+            # The outermost import of a package carries its whole cumulative time
+            packages[root] = max(packages.get(root, 0.0), entry["cumulative_ms"])
+    first_party = [e for e in entries if e["module"].split(".")[0] == "src"]
+    by = lambda key: lambda e: -e[key]
+    return {
+        "total_ms": max((e["cumulative_ms"] for e in entries if e["depth"] == 0), default=0.0),
+        "packages": sorted(packages.items(), key=lambda item: -item[1])[:top],
+        "first_party": [(e["module"], e["cumulative_ms"]) for e in sorted(first_party, key=by("cumulative_ms"))[:top]],
+        "self": [(e["module"], e["self_ms"]) for e in sorted(entries, key=by("self_ms"))[:top]],
+    }
+
+
+def measure_child() -> dict:
+    """Cold start of this process (run with --child in a fresh interpreter)."""
+    from benchmarks.load import install_stand_ins, parse_args, post_chat
+
+    start = time.perf_counter()
+    os.environ.update(BENCHMARK_ENV)
+    from src.main import app  # noqa: F401 (timed import)
+    imported = time.perf_counter()
+
+    from loguru import logger
+
+    logger.remove()
+    install_stand_ins(parse_args([]))
+    installed = time.perf_counter()
+
+    async def first_request():
+        # Run the lifespan so startup work is counted the way a server would run it
+        async with app.router.lifespan_context(app):
+            logger.remove()
+            return await post_chat(app, {"message": QUESTIONS[0], "session_id": "cold-start"}, BENCHMARK_ENV["API_KEY"])
+
+    result = asyncio.run(first_request())
+    done = time.perf_counter()
+    return {
+        "import_ms": (imported - start) * 1000,
+        "stand_ins_ms": (installed - imported) * 1000,
+        "first_ttft_ms": (result.ttft or 0.0) * 1000,
+        "first_total_ms": (result.total or 0.0) * 1000,
+        "first_response_ms": (done - start) * 1000,
+        "error": result.error,
+    }
+
+
+def cold_starts(runs: int) -> dict:
+    """Median cold-start timings over fresh interpreters."""
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.cold_start", "--child"],
+            cwd=BACKEND_DIR, env={**os.environ, **BENCHMARK_ENV}, capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    errors = [s["error"] for s in samples if s["error"]]
+    if errors:
+        print(f"Warning: {len(errors)} cold-start requests failed: {errors[0]}", file=sys.stderr)
+    keys = [k for k in samples[0] if k.endswith("_ms")]
+    return {key: round(statistics.median(s[key] for s in samples), 1) for key in keys}
+
+
+def print_report(report: dict, cold: dict | None) -> None:
+    imports = report
+    print(f"\nimport {imports['module']}: {imports['total_ms']:.1f} ms (-X importtime)")
+    for title, rows in (
+        ("Slowest packages (cumulative)", imports["packages"]),
+        ("Slowest first-party modules (cumulative)", imports["first_party"]),
+        ("Most self time", imports["self"]),
+    ):
+        print(f"\n{title}:")
+        for name, ms in rows:
+            print(f"  {ms:>9.1f} ms  {name}")
+    if cold:
+        print(f"\nCold start (median of {cold['runs']} fresh processes):")
+        for key, value in cold.items():
+            if key.endswith("_ms"):
+                print(f"  {key.removesuffix('_ms'):<16}{value:>9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time report and cold-start benchmark")
+    parser.add_argument("--module", "-m", default="src.main", help="Module to profile (default: src.main)")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table (default: 15)")
+    parser.add_argument("--runs", "-r", type=int, default=5, help="Fresh processes for the cold-start timing (0 skips it)")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this path")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_child()))
+        return
+
+    report = {"module": args.module, **import_report(import_times(args.module), args.top)}
+    cold = {"runs": args.runs, **cold_starts(args.runs)} if args.runs > 0 else None
+    print_report(report, cold)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"imports": report, "cold_start": cold}, indent=2))
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
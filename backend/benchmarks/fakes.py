@@ -0,0 +1,374 @@
+"""Local stand-ins for the LLM provider, embeddings API and Supabase.
+
+Used by the load benchmark so /chat can be exercised offline:
+- FakeLLM: a LiteLLM custom provider ("fake/<name>") that streams tokens with
+  a configurable TTFT, token rate and failure probability, and answers
+  classifier/structured calls with schema-valid JSON.
+- FakeEmbeddingsClient: an OpenAI-client lookalike returning deterministic
+  hashed bag-of-words vectors (the hashing embedding backend's), so semantic
+  search still behaves sensibly.
+- InMemorySupabase: the subset of the supabase-py query builder and RPC the
+  app uses, backed by dicts.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
+
+import litellm
+from litellm import CustomLLM
+from litellm.types.utils import GenericStreamingChunk
+
+from src.services.embedding_backends import hashed_embedding
+
+
+# ===========================================
+# LLM provider
+# ===========================================
+
+@dataclass
+class FakeLLMConfig:
+    """Latency and failure profile of the fake LLM provider."""
+    ttft_ms: float = 300.0  # Delay before the first streamed token
+    tokens_per_second: float = 80.0  # Streaming rate after the first token
+    response_tokens: int = 150  # Tokens per streamed answer
+    completion_latency_ms: float = 250.0  # Latency of non-streaming calls
+    latency_jitter: float = 0.2  # +/- fraction applied to every delay
+    failure_rate: float = 0.0  # Probability a call raises
+    slow_rate: float = 0.0  # Probability a non-streaming call lands in the latency tail
+    slow_multiplier: float = 8.0  # Tail latency as a multiple of completion_latency_ms
+    seed: int | None = None
+
+
+class FakeLLMError(Exception):
+    """Injected provider failure."""
+
+
+_ANSWER_WORDS = (
+    "Under Rule 15 the vessel which has the other on her own starboard side shall keep out of the way "
+    "and avoid crossing ahead. The stand-on vessel keeps her course and speed as required by Rule 17, "
+    "while the give-way vessel takes early and substantial action under Rule 16."
+).split()
+
+_VISUAL_MARKER = "[[VISUAL:vessel-lights:power-driven]]"
+
+
+class FakeLLM(CustomLLM):
+    """LiteLLM custom provider that simulates a streaming chat model."""
+
+    def __init__(self, config: FakeLLMConfig):
+        super().__init__()
+        self.config = config
+        self.rng = random.Random(config.seed)
+
+    def _delay(self, ms: float) -> float:
+        jitter = self.config.latency_jitter
+        return max(0.0, ms * (1 + self.rng.uniform(-jitter, jitter))) / 1000
+
+    def _completion_delay(self) -> float:
+        latency = self.config.completion_latency_ms
+        if self.rng.random() < self.config.slow_rate:
+            latency *= self.config.slow_multiplier
+        return self._delay(latency)
+
+    def _maybe_fail(self):
+        if self.rng.random() < self.config.failure_rate:
+            raise FakeLLMError("Injected fake LLM failure")
+
+    def _respond(self, messages: list, optional_params: dict | None) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        response_format = (optional_params or {}).get("response_format")
+        if response_format and response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            return json.dumps(_fake_instance(schema, schema, prompt))
+        if "VALID or INVALID" in prompt:
+            return "VALID"
+        return " ".join(_ANSWER_WORDS[:40])
+
+    def completion(self, model, messages, api_base, custom_prompt_dict, model_response, *args, optional_params=None, **kwargs):
+        time.sleep(self._completion_delay())
+        self._maybe_fail()
+        model_response.choices[0].message.content = self._respond(messages, optional_params)
+        return model_response
+
+    async def acompletion(self, model, messages, api_base, custom_prompt_dict, model_response, *args, optional_params=None, **kwargs):
+        await asyncio.sleep(self._completion_delay())
+        self._maybe_fail()
+        model_response.choices[0].message.content = self._respond(messages, optional_params)
+        return model_response
+
+    async def astreaming(self, model, messages, *args, **kwargs):
+        await asyncio.sleep(self._delay(self.config.ttft_ms))
+        self._maybe_fail()
+
+        total = self.config.response_tokens
+        interval_ms = 1000 / self.config.tokens_per_second
+        for i in range(total):
+            if i:
+                await asyncio.sleep(self._delay(interval_ms))
+            if i == total // 3:
+                # Split a visual marker across chunks like a real tokenizer would
+                token = _VISUAL_MARKER[:10]
+            elif i == total // 3 + 1:
+                token = _VISUAL_MARKER[10:] + " "
+            else:
+                token = _ANSWER_WORDS[i % len(_ANSWER_WORDS)] + " "
+            last = i == total - 1
+            yield GenericStreamingChunk(
+                text=token,
+                is_finished=last,
+                finish_reason="stop" if last else None,
+                usage=None,
+                index=0,
+                tool_use=None,
+            )
+
+
+def _fake_instance(schema: dict, root: dict, prompt: str) -> Any:
+    """Build a JSON value that validates against a (pydantic-generated) JSON schema."""
+    if "$ref" in schema:
+        name = schema["$ref"].rsplit("/", 1)[-1]
+        return _fake_instance(root["$defs"][name], root, prompt)
+    if "enum" in schema:
+        return schema["enum"][-1]
+    if "anyOf" in schema:
+        return _fake_instance(schema["anyOf"][0], root, prompt)
+
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        result = {}
+        for name, prop in schema.get("properties", {}).items():
+            if name == "rules":
+                result[name] = _rules_for_prompt(prompt)
+            elif name == "questions":
+                result[name] = ["What lights does it show?", "Who gives way here?"]
+            else:
+                result[name] = _fake_instance(prop, root, prompt)
+        return result
+    if schema_type == "array":
+        return []
+    if schema_type == "boolean":
+        return True
+    if schema_type in ("integer", "number"):
+        return 0
+    return "benchmark"
+
+
+def _rules_for_prompt(prompt: str) -> list[str]:
+    """Pick plausible rule IDs from the query section of an extraction prompt."""
+    query = prompt.rsplit("Current User Query:", 1)[-1]
+    numbers = re.findall(r"\brule\s+(\d+)", query, re.IGNORECASE)
+    return [f"rule_{n}" for n in numbers] or ["rule_7", "rule_8", "rule_15"]
+
+
+def register_fake_llm(config: FakeLLMConfig, provider: str = "fake") -> FakeLLM:
+    """Register the fake provider with LiteLLM (models are addressed as "fake/<name>")."""
+    handler = FakeLLM(config)
+    litellm.custom_provider_map = [
+        entry for entry in litellm.custom_provider_map if entry["provider"] != provider
+    ] + [{"provider": provider, "custom_handler": handler}]
+    litellm.utils.custom_llm_setup()
+    return handler
+
+
+# ===========================================
+# Embeddings
+# ===========================================
+
+class FakeEmbeddingsClient:
+    """Stand-in for the OpenAI client's `embeddings.create` API."""
+
+    def __init__(self, latency_ms: float = 80.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self.embeddings = self
+
+    def create(self, model: str, input: str | list[str], dimensions: int = 1536, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+        texts = [input] if isinstance(input, str) else input
+        return SimpleNamespace(
+            data=[SimpleNamespace(embedding=hashed_embedding(t, dimensions)) for t in texts]
+        )
+
+
+# ===========================================
+# Supabase
+# ===========================================
+
+@dataclass
+class _Query:
+    """Chainable query mirroring the supabase-py builder methods the app uses."""
+    client: "InMemorySupabase"
+    table: str
+    action: str = "select"
+    payload: Any = None
+    columns: list[str] | None = None
+    filters: list[tuple[str, str, Any]] = field(default_factory=list)
+    order_by: tuple[str, bool] | None = None
+    row_limit: int | None = None
+    on_conflict: str | None = None
+
+    def select(self, columns: str = "*", **kwargs) -> "_Query":
+        self.action = "select"
+        self.columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def insert(self, data, **kwargs) -> "_Query":
+        self.action, self.payload = "insert", data
+        return self
+
+    def upsert(self, data, on_conflict: str | None = None, **kwargs) -> "_Query":
+        self.action, self.payload, self.on_conflict = "upsert", data, on_conflict
+        return self
+
+    def delete(self, **kwargs) -> "_Query":
+        self.action = "delete"
+        return self
+
+    def eq(self, column: str, value) -> "_Query":
+        self.filters.append(("eq", column, value))
+        return self
+
+    def gt(self, column: str, value) -> "_Query":
+        self.filters.append(("gt", column, value))
+        return self
+
+    def lt(self, column: str, value) -> "_Query":
+        self.filters.append(("lt", column, value))
+        return self
+
+    def in_(self, column: str, values) -> "_Query":
+        self.filters.append(("in", column, list(values)))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "_Query":
+        self.order_by = (column, desc)
+        return self
+
+    def limit(self, count: int) -> "_Query":
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        return self.client._execute(self)
+
+
+class InMemorySupabase:
+    """Dict-backed stand-in for the Supabase client (tables + match_rule_embeddings RPC)."""
+
+    # Primary keys used for upserts when on_conflict isn't given
+    PRIMARY_KEYS = {"chat_summaries": ("session_id",)}
+
+    def __init__(self, latency_ms: float = 30.0):
+        self.latency_ms = latency_ms
+        self.tables: dict[str, list[dict]] = {}
+        self.calls = 0
+
+    def table(self, name: str) -> _Query:
+        return _Query(client=self, table=name)
+
+    def rpc(self, name: str, params: dict):
+        if name != "match_rule_embeddings":
+            raise ValueError(f"Unknown RPC: {name}")
+        return SimpleNamespace(execute=lambda: self._match_rule_embeddings(**params))
+
+    def _wait(self):
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+
+    def _matches(self, row: dict, filters) -> bool:
+        for op, column, value in filters:
+            if op == "eq" and row.get(column) != value:
+                return False
+            if op == "in" and row.get(column) not in value:
+                return False
+            if op == "gt" and not (row.get(column) or "") > value:
+                return False
+            if op == "lt" and not (row.get(column) or "") < value:
+                return False
+        return True
+
+    def _execute(self, query: _Query):
+        self._wait()
+        rows = self.tables.setdefault(query.table, [])
+
+        if query.action in ("insert", "upsert"):
+            records = query.payload if isinstance(query.payload, list) else [query.payload]
+            keys = tuple(query.on_conflict.split(",")) if query.on_conflict else self.PRIMARY_KEYS.get(query.table)
+            for record in records:
+                record = dict(record)
+                if query.action == "upsert" and keys:
+                    existing = next((r for r in rows if all(r.get(k) == record.get(k) for k in keys)), None)
+                    if existing is not None:
+                        existing.update(record)
+                        continue
+                record.setdefault("id", str(uuid.uuid4()))  # Column default
+                rows.append(record)
+            return SimpleNamespace(data=records)
+
+        if query.action == "delete":
+            kept = [r for r in rows if not self._matches(r, query.filters)]
+            deleted = [r for r in rows if self._matches(r, query.filters)]
+            self.tables[query.table] = kept
+            return SimpleNamespace(data=deleted)
+
+        result = [r for r in rows if self._matches(r, query.filters)]
+        if query.order_by:
+            column, desc = query.order_by
+            result.sort(key=lambda r: r.get(column) or "", reverse=desc)
+        if query.row_limit is not None:
+            result = result[:query.row_limit]
+        if query.columns:
+            result = [{c: r.get(c) for c in query.columns} for r in result]
+        return SimpleNamespace(data=[dict(r) for r in result])
+
+    def _match_rule_embeddings(self, query_embedding, match_threshold=0.4, match_count=5, filter_language="en"):
+        self._wait()
+        if isinstance(query_embedding, str):
+            query_embedding = json.loads(query_embedding)
+
+        scored = []
+        for row in self.tables.get("rule_embeddings", []):
+            if row.get("language") != filter_language:
+                continue
+            embedding = row["embedding"]
+            similarity = sum(a * b for a, b in zip(query_embedding, embedding))
+            if similarity > match_threshold:
+                scored.append((similarity, row))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return SimpleNamespace(data=[
+            {
+                "id": row.get("id"),
+                "rule_id": row["rule_id"],
+                "subsection": row["subsection"],
+                "content": row["content"],
+                "similarity": similarity,
+                "metadata": row.get("metadata", {}),
+            }
+            for similarity, row in scored[:match_count]
+        ])
+
+    def seed_rule_embeddings(self, chunks: list[dict], index_info: dict | None = None):
+        """Load ingestion chunks with hashed embeddings into rule_embeddings.
+
+        index_info is recorded in each chunk's metadata like scripts.ingest_rules does
+        (its dimensions also set the vector size; default 1536).
+        """
+        dimensions = index_info["dimensions"] if index_info else 1536
+        rows = self.tables.setdefault("rule_embeddings", [])
+        for i, chunk in enumerate(chunks):
+            metadata = {**chunk["metadata"], "embedding_index": index_info} if index_info else chunk["metadata"]
+            rows.append({
+                **chunk,
+                "id": f"chunk-{i}",
+                "embedding": hashed_embedding(chunk["content"], dimensions),
+                "metadata": metadata,
+            })
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for the /chat endpoint.
+
+Runs N concurrent chat sessions against the ASGI app in-process, with the LLM
+provider, embeddings API and Supabase replaced by local stand-ins
+(benchmarks/fakes.py), and reports TTFT, total latency, throughput and CPU
+time per request. Needs no network access or API keys.
+
+Usage:
+    cd backend
+    python -m benchmarks.load [--sessions 20] [--turns 3] [--ttft-ms 300] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Settings are read once (lru_cache), so configure before importing the app
+BENCHMARK_ENV = {
+    "MODEL_NAME": "fake/bench",
+    "CLASSIFIER_MODEL": "fake/bench",
+    "OPENAI_API_KEY": "benchmark",
+    "SUPABASE_URL": "http://supabase.invalid",
+    "SUPABASE_KEY": "benchmark",
+    "API_KEY": "benchmark",
+    "DB_BACKEND": "supabase",
+    "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+    "WARMUP_CONNECTIONS": "false",  # The stand-ins replace the clients; don't reach the real endpoints
+}
+
+QUESTIONS = [
+    "Who gives way when two power-driven vessels are crossing?",
+    "What lights does a vessel not under command show?",
+    "What is the fog signal for a sailing vessel?",
+    "How should I cross a traffic separation scheme?",
+    "What does Rule 13 say about overtaking?",
+    "What are the day shapes for a vessel restricted in her ability to manoeuvre?",
+    "When must the stand-on vessel take action?",
+    "What sound signal means I am altering my course to starboard?",
+]
+
+
+@dataclass
+class RequestResult:
+    """Timings for a single /chat request."""
+    status: int = 0
+    ttft: float | None = None  # Seconds to the first streamed text frame
+    total: float | None = None  # Seconds to the final body chunk
+    frames: int = 0
+    error: str | None = None
+
+
+@dataclass
+class BenchmarkReport:
+    """Aggregated benchmark results."""
+    config: dict
+    requests: int
+    errors: int
+    wall_seconds: float
+    throughput_rps: float
+    cpu_ms_per_request: float
+    ttft_ms: dict = field(default_factory=dict)
+    total_ms: dict = field(default_factory=dict)
+    frames_per_response: float = 0.0
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile (values need not be sorted)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(values: list[float]) -> dict:
+    """p50/p95/p99/max in milliseconds."""
+    return {
+        f"p{p}": round(percentile(values, p) * 1000, 1) for p in (50, 95, 99)
+    } | {"max": round(max(values, default=0.0) * 1000, 1)}
+
+
+def install_stand_ins(args) -> None:
+    """Replace the LLM provider, embeddings client and Supabase clients with fakes."""
+    from benchmarks.fakes import FakeEmbeddingsClient, FakeLLMConfig, InMemorySupabase, register_fake_llm
+    from scripts.ingest_rules import create_chunks
+    from src.data.rules import COLREG_RULES
+    from src.services import chat_history, embedding_backends, embeddings, rag_retrieval
+
+    register_fake_llm(FakeLLMConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        completion_latency_ms=args.completion_latency_ms,
+        failure_rate=args.failure_rate,
+        slow_rate=args.slow_rate,
+        slow_multiplier=args.slow_multiplier,
+        seed=args.seed,
+    ))
+
+    supabase = InMemorySupabase(latency_ms=args.supabase_latency_ms)
+    chunks = [chunk for rule_id, rule in COLREG_RULES.items() for chunk in create_chunks(rule_id, rule)]
+    supabase.seed_rule_embeddings(chunks, embeddings.get_index_info())
+
+    chat_history._supabase_client = supabase
+    rag_retrieval._supabase_client = supabase
+    embedding_backends._client = FakeEmbeddingsClient(latency_ms=args.embedding_latency_ms)
+
+
+async def post_chat(app, payload: dict, api_key: str) -> RequestResult:
+    """POST /chat straight to the ASGI app, timestamping each streamed body chunk."""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/chat",
+        "raw_path": b"/chat",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"authorization", f"Bearer {api_key}".encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+
+    result = RequestResult()
+    request_sent = False
+    finished = asyncio.Event()
+    start = time.perf_counter()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result.status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk:
+                result.frames += chunk.count(b"\n\n")
+                if result.ttft is None and chunk.startswith(b"data: "):
+                    result.ttft = time.perf_counter() - start
+                if b'"type": "error"' in chunk:
+                    result.error = chunk.decode(errors="replace").strip()
+            if not message.get("more_body", False):
+                result.total = time.perf_counter() - start
+                finished.set()
+
+    try:
+        await app(scope, receive, send)
+    except Exception as e:
+        result.error = str(e)
+    if result.status >= 400 and not result.error:
+        result.error = f"HTTP {result.status}"
+    return result
+
+
+async def run_session(app, session_index: int, turns: int, api_key: str) -> list[RequestResult]:
+    """Run one conversation: `turns` sequential questions on the same session."""
+    session_id = f"bench-{session_index}-{int(time.time() * 1000)}"
+    results = []
+    for turn in range(turns):
+        question = QUESTIONS[(session_index + turn) % len(QUESTIONS)]
+        results.append(await post_chat(app, {"message": question, "session_id": session_id}, api_key))
+    return results
+
+
+async def run_benchmark(args) -> BenchmarkReport:
+    """Run the configured load and aggregate the results."""
+    from loguru import logger
+    from src.main import app
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    # Warm-up request so import/compile costs don't land in the first sample
+    if args.warmup:
+        await post_chat(app, {"message": QUESTIONS[0], "session_id": "bench-warmup"}, BENCHMARK_ENV["API_KEY"])
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    session_results = await asyncio.gather(*[
+        run_session(app, i, args.turns, BENCHMARK_ENV["API_KEY"]) for i in range(args.sessions)
+    ])
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    results = [r for session in session_results for r in session]
+    ok = [r for r in results if r.error is None]
+    return BenchmarkReport(
+        config={k: v for k, v in vars(args).items() if k not in ("output", "log_level")},
+        requests=len(results),
+        errors=len(results) - len(ok),
+        wall_seconds=round(wall, 3),
+        throughput_rps=round(len(results) / wall, 2) if wall else 0.0,
+        cpu_ms_per_request=round(cpu / len(results) * 1000, 2) if results else 0.0,
+        ttft_ms=summarize([r.ttft for r in ok if r.ttft is not None]),
+        total_ms=summarize([r.total for r in ok if r.total is not None]),
+        frames_per_response=round(sum(r.frames for r in ok) / len(ok), 1) if ok else 0.0,
+    )
+
+
+def print_report(report: BenchmarkReport) -> None:
+    """Print a human-readable summary."""
+    print(f"\nRequests: {report.requests} ({report.errors} errors) in {report.wall_seconds}s")
+    print(f"Throughput: {report.throughput_rps} req/s")
+    print(f"CPU per request: {report.cpu_ms_per_request} ms")
+    print(f"Frames per response: {report.frames_per_response}")
+    print(f"{'':<10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, stats in (("TTFT ms", report.ttft_ms), ("Total ms", report.total_ms)):
+        print(f"{name:<10}" + "".join(f"{stats.get(k, 0):>10}" for k in ("p50", "p95", "p99", "max")))
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test /chat with local LLM and Supabase stand-ins")
+    parser.add_argument("--sessions", "-s", type=int, default=20, help="Concurrent sessions (default: 20)")
+    parser.add_argument("--turns", "-t", type=int, default=3, help="Sequential turns per session (default: 3)")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Fake LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Fake LLM streaming rate")
+    parser.add_argument("--response-tokens", type=int, default=150, help="Tokens per streamed answer")
+    parser.add_argument("--completion-latency-ms", type=float, default=250.0, help="Fake non-streaming call latency")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Probability a fake non-streaming call is slow")
+    parser.add_argument("--slow-multiplier", type=float, default=8.0, help="Slow call latency multiplier")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability a fake LLM call fails")
+    parser.add_argument(
+        "--embedding-backend", choices=["openai", "hashing"], default="openai",
+        help="openai: fake embeddings API with simulated latency; hashing: the in-process hashing backend",
+    )
+    parser.add_argument("--embedding-latency-ms", type=float, default=80.0, help="Fake embeddings API latency")
+    parser.add_argument("--supabase-latency-ms", type=float, default=30.0, help="Fake Supabase call latency")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the fake LLM")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", help="Skip the warm-up request")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this path")
+    parser.add_argument("--log-level", default="WARNING", help="App log level during the run")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    os.environ.update(BENCHMARK_ENV)
+    os.environ["EMBEDDING_BACKEND"] = args.embedding_backend
+
+    install_stand_ins(args)
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(asdict(report), indent=2))
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the CPU-bound hot paths.
+
+Times the pure-Python work done on every /chat request (stream marker parsing,
+keyword fallback, context compilation, rule mention extraction, catalog
+rendering and SSE encoding). No network access is needed. Results are written
+as JSON keyed by commit so runs can be compared across commits.
+
+Usage:
+    cd backend
+    python -m benchmarks.micro [--filter parse] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.load import BENCHMARK_ENV, QUESTIONS
+
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+QUERY_CORPUS = QUESTIONS + [
+    "fishing vessel trawling lights at night",
+    "what happens in restricted visibility when I hear a fog signal forward of the beam",
+    "vessel constrained by her draught three red lights cylinder",
+    "anchor lights and aground signals",
+    "narrow channel keep to starboard side overtaking signal",
+    "distress signals mayday sos",
+    "sailing vessel wind on port side meets another on starboard",
+    "head on situation both alter to starboard",
+]
+
+ANSWER_PARAGRAPH = (
+    "Under Rule 15, when two power-driven vessels are crossing so as to involve risk of collision, "
+    "the vessel which has the other on her own starboard side shall keep out of the way. "
+    "The give-way vessel must take early and substantial action as required by Rule 16, while the "
+    "stand-on vessel keeps her course and speed under Rule 17(a)(i). If in doubt, Rule 7 applies and "
+    "risk of collision shall be deemed to exist. Sound signals from Rule 34 and lights from Rule 23 "
+    "help identify the situation, and Rule 8 describes what action to avoid collision looks like.\n\n"
+)
+
+VISUAL_MARKERS = [
+    "[[VISUAL:vessel-lights:power-driven]]",
+    "[[VISUAL:sound-signal:overtaking-starboard]]",
+    "[[VISUAL:vessel-lights:not-under-command]]",
+]
+
+
+def tokenize_stream(text: str, rng: random.Random) -> list[str]:
+    """Split text into 1-6 character chunks, like an LLM token stream (markers get split too)."""
+    chunks = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 6)
+        chunks.append(text[i:i + size])
+        i += size
+    return chunks
+
+
+def build_answer(paragraphs: int, with_markers: bool = True) -> str:
+    """Build a realistic answer with visual markers between paragraphs."""
+    parts = []
+    for i in range(paragraphs):
+        parts.append(ANSWER_PARAGRAPH)
+        if with_markers and i % 2 == 0:
+            parts.append(VISUAL_MARKERS[i % len(VISUAL_MARKERS)] + "\n")
+    return "".join(parts)
+
+
+# ===========================================
+# Benchmarks
+# ===========================================
+
+def bench_parse_stream_chunk() -> Callable[[], None]:
+    """Incremental parse_stream_chunk calls over a tokenized answer (as the stream wrapper does)."""
+    from src.services.stream_parser import parse_stream_chunk
+
+    tokens = tokenize_stream(build_answer(4), random.Random(1))
+
+    def run():
+        buffer = ""
+        for token in tokens:
+            buffer += token
+            _, buffer = parse_stream_chunk(buffer)
+    return run
+
+
+def bench_parse_streaming_response() -> Callable[[], None]:
+    """parse_streaming_response over an async token stream with split markers."""
+    from src.services.stream_parser import parse_streaming_response
+
+    tokens = tokenize_stream(build_answer(4), random.Random(2))
+    loop = asyncio.new_event_loop()
+
+    async def stream():
+        for token in tokens:
+            yield token
+
+    async def consume():
+        async for _ in parse_streaming_response(stream()):
+            pass
+
+    return lambda: loop.run_until_complete(consume())
+
+
+def bench_keyword_fallback_extraction() -> Callable[[], None]:
+    """keyword_fallback_extraction over the query corpus."""
+    from src.services.rule_matcher import keyword_fallback_extraction
+
+    def run():
+        for query in QUERY_CORPUS:
+            keyword_fallback_extraction(query)
+    return run
+
+
+def bench_compile_context_all_rules() -> Callable[[], None]:
+    """compile_context_node with every rule extracted plus RAG duplicates."""
+    from src.data.rules import COLREG_RULES
+    from src.graph.nodes import compile_context_node
+
+    rule_ids = list(COLREG_RULES)
+    state = {
+        "extracted_rules": rule_ids[::2],
+        "rag_rules": rule_ids[::3] + rule_ids[1::2],
+        "include_general": True,
+    }
+    return lambda: compile_context_node(state)
+
+
+def bench_compile_context_typical() -> Callable[[], None]:
+    """compile_context_node with a typical 3 LLM + 5 RAG rule set."""
+    from src.graph.nodes import compile_context_node
+
+    state = {
+        "extracted_rules": ["rule_15", "rule_16", "rule_17"],
+        "rag_rules": ["rule_15", "rule_7", "rule_8", "rule_34", "rule_18"],
+        "include_general": False,
+    }
+    return lambda: compile_context_node(state)
+
+
+def bench_extract_mentioned_rules() -> Callable[[], None]:
+    """extract_mentioned_rules over a long answer."""
+    from src.api.routes import extract_mentioned_rules
+
+    answer = build_answer(12, with_markers=False)
+    return lambda: extract_mentioned_rules(answer, {"rule_15"})
+
+
+def bench_generate_catalog_reference() -> Callable[[], None]:
+    """generate_catalog_reference for a typical matched rule list."""
+    from src.data.visual_catalog import generate_catalog_reference
+
+    return lambda: generate_catalog_reference(["rule_15", "rule_16", "rule_23"])
+
+
+def bench_sse_text_frames() -> Callable[[], None]:
+    """SSE encoding of the text frames of one streamed answer."""
+    from src.api.sse import format_sse
+
+    tokens = tokenize_stream(build_answer(4, with_markers=False), random.Random(3))
+
+    def run():
+        for token in tokens:
+            format_sse({"type": "text", "text": token})
+    return run
+
+
+def bench_sse_metadata_frame() -> Callable[[], None]:
+    """SSE encoding of a matched_rules metadata frame (8 full rules)."""
+    from src.api.sse import format_sse
+    from src.graph.nodes import compile_context_node
+
+    matched = compile_context_node({
+        "extracted_rules": ["rule_15", "rule_16", "rule_17", "rule_7", "rule_8", "rule_34", "rule_18", "rule_23"],
+        "rag_rules": [],
+    })["matched_rules"]
+
+    return lambda: format_sse({"matched_rules": [rule.model_dump() for rule in matched]}, event="metadata")
+
+
+BENCHMARKS: dict[str, Callable[[], Callable[[], None]]] = {
+    "parse_stream_chunk": bench_parse_stream_chunk,
+    "parse_streaming_response": bench_parse_streaming_response,
+    "keyword_fallback_extraction": bench_keyword_fallback_extraction,
+    "compile_context_all_rules": bench_compile_context_all_rules,
+    "compile_context_typical": bench_compile_context_typical,
+    "extract_mentioned_rules": bench_extract_mentioned_rules,
+    "generate_catalog_reference": bench_generate_catalog_reference,
+    "sse_text_frames": bench_sse_text_frames,
+    "sse_metadata_frame": bench_sse_metadata_frame,
+}
+
+
+# ===========================================
+# Runner
+# ===========================================
+
+def time_benchmark(func: Callable[[], None], repeat: int, min_time: float) -> dict:
+    """Time func with timeit, returning per-call statistics in microseconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    # Scale so each sample runs for at least min_time seconds
+    sample = timer.timeit(number)
+    if sample < min_time:
+        number = max(number, int(number * min_time / max(sample, 1e-9)))
+
+    samples = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "calls_per_sample": number,
+        "min_us": round(min(samples), 3),
+        "median_us": round(statistics.median(samples), 3),
+        "stdev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0,
+    }
+
+
+def git_commit() -> str:
+    """Current commit hash (short), or 'unknown' outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    """Print the change in median time against a previous results file."""
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nCompared with {baseline.get('commit', '?')} ({baseline_path}):")
+    for name, stats in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            print(f"  {name:<32} (new)")
+            continue
+        change = (stats["median_us"] - before["median_us"]) / before["median_us"] * 100
+        print(f"  {name:<32} {before['median_us']:>12.2f} -> {stats['median_us']:>12.2f} us  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run CPU hot-path microbenchmarks")
+    parser.add_argument("--filter", "-k", help="Only run benchmarks whose name contains this string")
+    parser.add_argument("--repeat", "-r", type=int, default=7, help="Samples per benchmark (default: 7)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per sample (default: 0.2)")
+    parser.add_argument("--output", "-o", help="Results path (default: benchmarks/results/micro-<commit>.json)")
+    parser.add_argument("--compare", "-c", help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+
+    from loguru import logger
+    logger.remove()  # Logging would dominate the timings
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {},
+    }
+
+    for name, factory in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+        func = factory()
+        func()  # Warm caches (regex compilation, lazy imports)
+        stats = time_benchmark(func, args.repeat, args.min_time)
+        results["results"][name] = stats
+        print(f"{name:<32} median {stats['median_us']:>12.2f} us   min {stats['min_us']:>12.2f} us")
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"micro-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    main()
+    print(f"Done in {time.perf_counter() - start:.1f}s")
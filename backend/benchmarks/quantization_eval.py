@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Vector search quality vs size: reduced dimensions and quantization.
+
+Builds src.services.vector_index.VectorIndex over the ingestion chunks for a
+grid of dimensions x quantization x rescoring settings and compares each one
+against exact float32 search at full dimensions:
+- overlap@k: fraction of the exact top-k chunks that are also returned
+- recall@k: labelled rule recall (as in retrieval_eval)
+- bytes/vector of the float32 and quantized copies, and mean search time
+
+Embeddings come from the configured embedding backend through retrieval_eval's
+on-disk cache (text-embedding-3-large at 1536 dimensions by default, truncated
+in-process - the model is Matryoshka-trained, so this matches requesting fewer
+dimensions from the API). --offline uses the hashing backend instead, which is
+only useful for checking the harness.
+
+Usage:
+    cd backend
+    python -m benchmarks.quantization_eval [--top-k 5] [--threshold 0.4] [--offline]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+
+from benchmarks.retrieval_eval import DATASET_PATH, OFFLINE_ENV, EmbeddingCache, embedding_cache_name, load_dataset, score
+
+DIMENSIONS = (1536, 1024, 512, 256)
+QUANTIZATIONS = ("none", "int8", "binary")
+
+
+def load_vectors(dataset: list[dict]) -> tuple[list[dict], list, list]:
+    """Return (chunks, chunk embeddings, query embeddings) at EMBEDDING_DIMENSIONS."""
+    from scripts.ingest_rules import create_chunks
+    from src.data.rules import COLREG_RULES
+
+    chunks = [chunk for rule_id, rule in COLREG_RULES.items() for chunk in create_chunks(rule_id, rule)]
+    texts = [c["content"] for c in chunks]
+    queries = [item["query"] for item in dataset]
+
+    cache = EmbeddingCache(embedding_cache_name())
+    return chunks, cache.embed_corpus(texts), [cache.embed_query(q)["embedding"] for q in queries]
+
+
+def unique_rules(hits: list[tuple[dict, float]]) -> list[str]:
+    return list(dict.fromkeys(record["rule_id"] for record, _ in hits))
+
+
+def evaluate(dataset: list[dict], chunks: list[dict], corpus, queries, top_k: int, threshold: float) -> dict:
+    """Run every grid configuration over the dataset."""
+    from src.services.vector_index import VectorIndex
+
+    records = [{"index": i, "rule_id": c["rule_id"]} for i, c in enumerate(chunks)]
+    exact = VectorIndex(corpus, records, quantization="none")
+    reference = [
+        {record["index"] for record, _ in exact.search(q, top_k, threshold)} for q in queries
+    ]
+
+    results = {}
+    full_dimensions = len(corpus[0])
+    for dimensions in (d for d in DIMENSIONS if d <= full_dimensions):
+        for quantization in QUANTIZATIONS:
+            for rescore_factor in ((0,) if quantization == "none" else (0, 4)):
+                index = VectorIndex(corpus, records, dimensions, quantization, rescore_factor)
+                overlaps, recalls, times = [], [], []
+                for item, query, expected in zip(dataset, queries, reference):
+                    start = time.perf_counter()
+                    hits = index.search(query, top_k, threshold)
+                    times.append((time.perf_counter() - start) * 1e6)
+                    found = {record["index"] for record, _ in hits}
+                    overlaps.append(len(found & expected) / len(expected) if expected else 1.0)
+                    recalls.append(score(unique_rules(hits), item["expected"], top_k)["recall_at_k"])
+
+                nbytes = index.nbytes
+                name = f"{dimensions}/{quantization}" + ("+rescore" if rescore_factor else "")
+                results[name] = {
+                    "overlap_at_k": round(statistics.mean(overlaps), 3),
+                    "recall_at_k": round(statistics.mean(recalls), 3),
+                    "float32_bytes_per_vector": nbytes["float32"] // len(index),
+                    "quantized_bytes_per_vector": nbytes["quantized"] // len(index),
+                    "mean_us": round(statistics.mean(times), 1),
+                }
+    return results
+
+
+def print_table(results: dict, k: int) -> None:
+    header = f"{'config':<22}{'overlap@' + str(k):>11}{'recall@' + str(k):>10}{'f32 B':>8}{'quant B':>9}{'mean us':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, m in results.items():
+        print(
+            f"{name:<22}{m['overlap_at_k']:>11.3f}{m['recall_at_k']:>10.3f}"
+            f"{m['float32_bytes_per_vector']:>8}{m['quantized_bytes_per_vector']:>9}{m['mean_us']:>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate reduced-dimension and quantized vector search")
+    parser.add_argument("--dataset", default=str(DATASET_PATH), help="Labelled query set (JSON)")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query (default: 5)")
+    parser.add_argument("--threshold", type=float, default=0.4, help="Similarity threshold (default: 0.4)")
+    parser.add_argument("--offline", action="store_true", help="Use the hashing embedding backend instead of the configured one")
+    parser.add_argument("--limit", type=int, help="Only evaluate the first N queries")
+    parser.add_argument("--output", "-o", help="Write results as JSON")
+    args = parser.parse_args()
+
+    for key, value in OFFLINE_ENV.items():
+        os.environ.setdefault(key, value)
+    if args.offline:
+        os.environ["EMBEDDING_BACKEND"] = "hashing"
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    dataset = load_dataset(Path(args.dataset))[:args.limit]
+    chunks, corpus, queries = load_vectors(dataset)
+    # Hashed vectors are sparse, so the production threshold would drop most hits
+    threshold = 0.0 if args.offline else args.threshold
+    results = evaluate(dataset, chunks, corpus, queries, args.top_k, threshold)
+
+    print(f"\n{len(dataset)} queries, {len(chunks)} chunks (top_k={args.top_k}, threshold={threshold})\n")
+    print_table(results, args.top_k)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
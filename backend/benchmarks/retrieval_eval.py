@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Offline retrieval evaluation: recall, precision, context size and latency per strategy.
+
+Runs every rule-selection strategy used by the prep graph over a labelled
+query -> expected-rules dataset:
+- keyword: keyword_fallback_extraction
+- llm: extract_rules_node (LLM structured extraction)
+- combined: classify_extract_node (validation + extraction in one call, prep_mode="combined")
+- rag: semantic search over the ingestion chunks (in-process cosine search)
+- merge strategies: the union compile_context_node builds (llm+rag, keyword+rag)
+
+Embeddings for the corpus and the queries are cached on disk, so reruns make
+no embedding calls. The dataset is derived from EXTRACTION_PROMPT's rule
+descriptions, the scenarios in extended_content.json and a few hand-labelled
+multi-rule situations; rebuild it with --build-dataset.
+
+Usage:
+    cd backend
+    python -m benchmarks.retrieval_eval [--strategies keyword,rag,llm] [--top-k 5] [--threshold 0.4]
+    python -m benchmarks.retrieval_eval --strategies rag --sweep
+    python -m benchmarks.retrieval_eval --build-dataset
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+
+
+# Only the LLM and embeddings are called; Supabase settings just need to be present
+OFFLINE_ENV = {
+    "SUPABASE_URL": "http://supabase.invalid",
+    "SUPABASE_KEY": "unused",
+    "API_KEY": "unused",
+    "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+}
+
+DATA_DIR = Path(__file__).parent / "data"
+CACHE_DIR = Path(__file__).parent / ".cache"
+DATASET_PATH = DATA_DIR / "retrieval_queries.json"
+
+# Hand-labelled situations that span several rules
+CURATED_QUERIES = [
+    ("Two power-driven vessels are crossing, who gives way and what should each do?", ["rule_15", "rule_16", "rule_17"]),
+    ("I'm overtaking another vessel in a narrow channel, what signals do I sound?", ["rule_9", "rule_13", "rule_34"]),
+    ("In fog I hear a fog signal forward of my beam, what should I do?", ["rule_19", "rule_35"]),
+    ("What lights and shapes does a vessel aground show?", ["rule_30"]),
+    ("A sailing vessel is crossing a traffic lane, does it have right of way over a ship?", ["rule_10", "rule_18"]),
+    ("What lights does a trawler show and what is her fog signal?", ["rule_26", "rule_35"]),
+    ("Head-on with another power vessel at night, what do I see and do?", ["rule_14", "rule_23"]),
+    ("What is the hierarchy between a fishing vessel and a vessel not under command?", ["rule_18", "rule_3"]),
+    ("How far must a masthead light be visible on a 60 metre vessel?", ["rule_22"]),
+    ("What are the distress signals?", ["annex_iv"]),
+]
+
+QUERY_TEMPLATES = (
+    "What do the COLREGs say about {phrase}?",
+    "Explain {phrase}",
+    "I have a question about {phrase}",
+)
+
+
+# ===========================================
+# Dataset
+# ===========================================
+
+def _prompt_phrases(description: str) -> list[str]:
+    """Split an EXTRACTION_PROMPT rule description into short topic phrases."""
+    description = re.sub(r"^When user (asks about|needs) ", "", description)
+    description = re.sub(r"^definitions of terms like ", "", description)
+    phrases = re.split(r",\s*(?:or\s+)?|\s+or\s+", description)
+    return [p.strip().strip('"') for p in phrases if len(p.strip()) > 3]
+
+
+def build_dataset() -> list[dict]:
+    """Derive the labelled query set from the extraction prompt and extended content."""
+    from src.data.rules import COLREG_RULES
+    from src.graph.nodes import EXTRACTION_PROMPT
+
+    items: list[dict] = []
+
+    for match in re.finditer(r"^- ((?:rule|annex)_[a-z0-9]+): (.+)$", EXTRACTION_PROMPT, re.MULTILINE):
+        rule_id, description = match.groups()
+        if rule_id not in COLREG_RULES or description.startswith("Reference rule"):
+            continue
+        for template, phrase in zip(QUERY_TEMPLATES, _prompt_phrases(description)):
+            items.append({
+                "query": template.format(phrase=phrase),
+                "expected": [rule_id],
+                "source": "extraction_prompt",
+            })
+
+    extended = json.loads((Path(__file__).parent.parent / "src" / "data" / "extended_content.json").read_text())
+    for rule_id, content in extended.items():
+        if rule_id.startswith("_"):
+            continue
+        for scenario in content.get("scenarios", []):
+            items.append({
+                "query": scenario["description"],
+                "expected": scenario.get("rules_applied") or [rule_id],
+                "source": "extended_content",
+            })
+
+    for query, expected in CURATED_QUERIES:
+        items.append({"query": query, "expected": expected, "source": "curated"})
+
+    return items
+
+
+def load_dataset(path: Path) -> list[dict]:
+    """Load the labelled dataset."""
+    return json.loads(path.read_text())
+
+
+# ===========================================
+# Embedding cache
+# ===========================================
+
+def embedding_cache_name() -> str:
+    """Cache file name for the configured embedding backend (e.g. text-embedding-3-large-1536)."""
+    from src.services.embeddings import get_index_info
+
+    info = get_index_info()
+    return f"{info['model']}-{info['dimensions']}"
+
+
+class EmbeddingCache:
+    """On-disk cache of embeddings keyed by text hash (one JSONL file per model config)."""
+
+    def __init__(self, name: str):
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        self.path = CACHE_DIR / f"embeddings-{name}.jsonl"
+        self.entries: dict[str, dict] = {}
+        self.misses = 0
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                entry = json.loads(line)
+                self.entries[entry["key"]] = entry
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.strip().encode()).hexdigest()
+
+    def get(self, text: str) -> dict | None:
+        return self.entries.get(self.key(text))
+
+    def add(self, text: str, embedding: list[float], latency_ms: float) -> dict:
+        entry = {"key": self.key(text), "embedding": embedding, "latency_ms": round(latency_ms, 2)}
+        self.entries[entry["key"]] = entry
+        self.misses += 1
+        with self.path.open("a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def embed_query(self, text: str) -> dict:
+        """Embed a single query (measuring API latency), or return the cached entry."""
+        from src.services.embeddings import embed_text
+
+        entry = self.get(text)
+        if entry is None:
+            start = time.perf_counter()
+            embedding = embed_text(text)
+            entry = self.add(text, embedding, (time.perf_counter() - start) * 1000)
+        return entry
+
+    def embed_corpus(self, texts: list[str], batch_size: int = 50) -> list[list[float]]:
+        """Embed corpus texts in batches, skipping cached ones."""
+        from src.services.embeddings import embed_texts
+
+        missing = [t for t in dict.fromkeys(texts) if self.get(t) is None]
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i:i + batch_size]
+            start = time.perf_counter()
+            embeddings = embed_texts(batch)
+            latency = (time.perf_counter() - start) * 1000 / len(batch)
+            for text, embedding in zip(batch, embeddings):
+                self.add(text, embedding, latency)
+        return [self.get(t)["embedding"] for t in texts]
+
+
+# ===========================================
+# Strategies
+# ===========================================
+
+def _normalize(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class LocalRag:
+    """In-process equivalent of match_rule_embeddings over the ingestion chunks."""
+
+    def __init__(self, cache: EmbeddingCache, language: str = "en"):
+        from scripts.ingest_rules import create_chunks
+        from src.data.rules import COLREG_RULES
+
+        self.chunks = [
+            chunk for rule_id, rule in COLREG_RULES.items() for chunk in create_chunks(rule_id, rule, language)
+        ]
+        embeddings = cache.embed_corpus([c["content"] for c in self.chunks])
+        self.vectors = [_normalize(e) for e in embeddings]
+        self.cache = cache
+
+    def search(self, query: str, top_k: int, threshold: float) -> tuple[list[str], float]:
+        """Return (unique rule IDs by similarity, simulated wall time in ms)."""
+        entry = self.cache.embed_query(query)
+        start = time.perf_counter()
+        query_vector = _normalize(entry["embedding"])
+        scored = sorted(
+            ((sum(a * b for a, b in zip(query_vector, v)), chunk["rule_id"]) for v, chunk in zip(self.vectors, self.chunks)),
+            reverse=True,
+        )
+        rule_ids = []
+        for similarity, rule_id in scored[:top_k]:
+            if similarity > threshold and rule_id not in rule_ids:
+                rule_ids.append(rule_id)
+        search_ms = (time.perf_counter() - start) * 1000
+        # Cached queries report the embedding latency measured when they were first embedded
+        return rule_ids, entry["latency_ms"] + search_ms
+
+
+def run_keyword(query: str) -> tuple[list[str], dict]:
+    from src.services.rule_matcher import keyword_fallback_extraction
+    return keyword_fallback_extraction(query), {}
+
+
+def run_llm(query: str) -> tuple[list[str], dict]:
+    from src.graph.nodes import extract_rules_node
+    result = extract_rules_node({"query": query, "chat_history": []})
+    return result["extracted_rules"], {"include_general": result["include_general"], "method": result["extraction_method"]}
+
+
+def run_combined(query: str) -> tuple[list[str], dict]:
+    from src.graph.nodes import classify_extract_node
+    result = classify_extract_node({"query": query, "chat_history": []})
+    return result.get("extracted_rules", []), {"include_general": result.get("include_general", False), "method": result.get("extraction_method")}
+
+
+def merge(primary: list[str], secondary: list[str]) -> list[str]:
+    """Union preserving order, as compile_context_node merges LLM and RAG rules."""
+    return list(dict.fromkeys(primary + secondary))
+
+
+# ===========================================
+# Scoring
+# ===========================================
+
+def score(predicted: list[str], expected: list[str], k: int) -> dict:
+    """Per-query recall@k, recall and precision."""
+    expected_set = set(expected)
+    hits = expected_set & set(predicted)
+    return {
+        "recall_at_k": len(expected_set & set(predicted[:k])) / len(expected_set),
+        "recall": len(hits) / len(expected_set),
+        "precision": len(hits) / len(predicted) if predicted else 0.0,
+    }
+
+
+def context_chars(rules: list[str], include_general: bool = False) -> int:
+    """Size of the compiled rule context the generation call would receive."""
+    from src.graph.nodes import compile_context_node
+    return len(compile_context_node({"extracted_rules": rules, "rag_rules": [], "include_general": include_general})["rule_context"])
+
+
+def aggregate(rows: list[dict]) -> dict:
+    """Average per-query metrics for one strategy."""
+    times = [r["ms"] for r in rows]
+    return {
+        "queries": len(rows),
+        "recall_at_k": round(statistics.mean(r["recall_at_k"] for r in rows), 3),
+        "recall": round(statistics.mean(r["recall"] for r in rows), 3),
+        "precision": round(statistics.mean(r["precision"] for r in rows), 3),
+        "avg_rules": round(statistics.mean(r["n_rules"] for r in rows), 2),
+        "avg_context_chars": round(statistics.mean(r["context_chars"] for r in rows)),
+        "avg_context_tokens": round(statistics.mean(r["context_chars"] for r in rows) / 4),
+        "mean_ms": round(statistics.mean(times), 1),
+        "p95_ms": round(sorted(times)[max(0, math.ceil(0.95 * len(times)) - 1)], 1),
+    }
+
+
+def evaluate(dataset: list[dict], strategies: list[str], top_k: int, threshold: float, k: int, cache_name: str) -> dict:
+    """Run the selected strategies over the dataset and aggregate the metrics."""
+    needs_rag = any("rag" in s for s in strategies)
+    rag = LocalRag(EmbeddingCache(cache_name)) if needs_rag else None
+
+    rows: dict[str, list[dict]] = {s: [] for s in strategies}
+    for item in dataset:
+        query, expected = item["query"], item["expected"]
+        outputs: dict[str, tuple[list[str], float, bool]] = {}
+
+        if "keyword" in strategies or "keyword+rag" in strategies:
+            start = time.perf_counter()
+            rules, _ = run_keyword(query)
+            outputs["keyword"] = (rules, (time.perf_counter() - start) * 1000, False)
+        if "llm" in strategies or "llm+rag" in strategies:
+            start = time.perf_counter()
+            rules, info = run_llm(query)
+            outputs["llm"] = (rules, (time.perf_counter() - start) * 1000, info["include_general"])
+        if "combined" in strategies or "combined+rag" in strategies:
+            start = time.perf_counter()
+            rules, info = run_combined(query)
+            outputs["combined"] = (rules, (time.perf_counter() - start) * 1000, info["include_general"])
+        if rag is not None:
+            rules, ms = rag.search(query, top_k, threshold)
+            outputs["rag"] = (rules, ms, False)
+        for first in ("llm", "combined", "keyword"):
+            name = f"{first}+rag"
+            if name in strategies:
+                a, b = outputs[first], outputs["rag"]
+                # Extraction and RAG run back to back in the prep graph
+                outputs[name] = (merge(a[0], b[0]), a[1] + b[1], a[2])
+
+        for strategy in strategies:
+            rules, ms, include_general = outputs[strategy]
+            rows[strategy].append({
+                **score(rules, expected, k),
+                "ms": ms,
+                "n_rules": len(rules),
+                "context_chars": context_chars(rules, include_general),
+            })
+
+    result = {s: aggregate(r) for s, r in rows.items()}
+    if rag is not None:
+        result["_embedding_cache"] = {"path": str(rag.cache.path), "new_embeddings": rag.cache.misses}
+    return result
+
+
+def print_table(results: dict, k: int) -> None:
+    header = f"{'strategy':<14}{'recall@' + str(k):>10}{'recall':>9}{'prec':>8}{'rules':>7}{'ctx tok':>9}{'mean ms':>10}{'p95 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, m in results.items():
+        if name.startswith("_"):
+            continue
+        print(
+            f"{name:<14}{m['recall_at_k']:>10.3f}{m['recall']:>9.3f}{m['precision']:>8.3f}"
+            f"{m['avg_rules']:>7.2f}{m['avg_context_tokens']:>9}{m['mean_ms']:>10.1f}{m['p95_ms']:>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate rule retrieval strategies offline")
+    parser.add_argument("--dataset", default=str(DATASET_PATH), help="Labelled query set (JSON)")
+    parser.add_argument("--build-dataset", action="store_true", help="Regenerate the dataset and exit")
+    parser.add_argument(
+        "--strategies", "-s", default="keyword,rag,llm,llm+rag,keyword+rag",
+        help="Comma-separated strategies: keyword, rag, llm, combined, and <strategy>+rag merges",
+    )
+    parser.add_argument("--top-k", type=int, default=5, help="RAG top_k (default: 5, as in rag_retrieval_node)")
+    parser.add_argument("--threshold", type=float, default=0.4, help="RAG similarity threshold (default: 0.4)")
+    parser.add_argument("--k", type=int, default=5, help="Cut-off for recall@k (default: 5)")
+    parser.add_argument("--sweep", action="store_true", help="Evaluate RAG over a grid of top_k/threshold values")
+    parser.add_argument("--limit", type=int, help="Only evaluate the first N queries")
+    parser.add_argument("--output", "-o", help="Write results as JSON")
+    args = parser.parse_args()
+
+    for key, value in OFFLINE_ENV.items():
+        os.environ.setdefault(key, value)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    if args.build_dataset:
+        dataset = build_dataset()
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        Path(args.dataset).write_text(json.dumps(dataset, indent=2) + "\n")
+        print(f"Wrote {len(dataset)} labelled queries to {args.dataset}")
+        return
+
+    dataset = load_dataset(Path(args.dataset))[:args.limit]
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    cache_name = embedding_cache_name()
+
+    if args.sweep:
+        results = {}
+        for top_k in (3, 5, 8, 12):
+            for threshold in (0.3, 0.4, 0.5):
+                metrics = evaluate(dataset, ["rag"], top_k, threshold, args.k, cache_name)["rag"]
+                results[f"rag@{top_k}/{threshold}"] = metrics
+    else:
+        results = evaluate(dataset, strategies, args.top_k, args.threshold, args.k, cache_name)
+
+    print(f"\n{len(dataset)} queries (top_k={args.top_k}, threshold={args.threshold})\n")
+    print_table(results, args.k)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
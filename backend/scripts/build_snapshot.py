@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Build the corpus snapshot (see src/data/snapshot.py).
+
+Compiles the rules (rules.py plus compiled documents), their context
+sections, general info, the visual catalog and catalog reference, the keyword
+fallback table and optionally per-language chunk embeddings into one
+memory-mappable file. Run it as a build step; the app maps the file at
+startup (CORPUS_SNAPSHOT_PATH, default src/data/corpus.snapshot).
+
+Embeddings:
+    none      No embedding matrix (the local index loads from the database)
+    database  Copy the ingested rule_embeddings rows
+    embed     Embed the ingestion chunks with the configured EMBEDDING_BACKEND
+
+Usage:
+    cd backend
+    python -m scripts.build_snapshot [--embeddings database] [--language en] [--output path]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Build from the Python modules, never from a previous snapshot
+os.environ["CORPUS_SNAPSHOT_ENABLED"] = "false"
+
+import numpy as np
+from loguru import logger
+
+from src.config import get_settings
+from src.data.corpus import catalog_reference, format_rule_section, general_info, source_digest, visual_catalog
+from src.data.rule_store import get_rules
+from src.data.snapshot import DEFAULT_SNAPSHOT_PATH, FORMAT_VERSION, KEYWORD_SEPARATOR, Snapshot, write_snapshot
+from src.services.vector_index import truncate_embeddings
+
+# Fields of the chunk records kept next to the embedding matrix (as returned by load_rule_embeddings)
+CHUNK_FIELDS = ("id", "rule_id", "subsection", "content", "metadata")
+
+
+def database_embeddings(language: str, dimensions: int) -> tuple[list, list[dict], dict | None]:
+    """Stored chunk embeddings and index info for a language."""
+    from src.services.rag_retrieval import load_index_info, load_rule_embeddings
+
+    rows = load_rule_embeddings(language)
+    info = load_index_info(language)
+    if info is not None and info.get("dimensions", dimensions) > dimensions:
+        # Matryoshka truncation: queries are then embedded at the reduced size
+        info = {**info, "dimensions": dimensions}
+    return [row.pop("embedding") for row in rows], rows, info
+
+
+def embedded_chunks(language: str, dimensions: int, batch_size: int = 100) -> tuple[list, list[dict], dict]:
+    """Embed the ingestion chunks for a language with the configured backend."""
+    from scripts.ingest_rules import iter_chunks
+    from src.services.embeddings import embed_texts, get_embedding_backend
+
+    info = get_embedding_backend().index_info(dimensions)
+    chunks = list(iter_chunks(language, info, set()))
+    vectors = []
+    for i in range(0, len(chunks), batch_size):
+        vectors.extend(embed_texts([c["content"] for c in chunks[i:i + batch_size]], dimensions=dimensions))
+    records = [{**chunk, "id": chunk["content_hash"]} for chunk in chunks]
+    return vectors, records, info
+
+
+def build_snapshot(
+    output: Path = DEFAULT_SNAPSHOT_PATH,
+    embeddings: str = "none",
+    languages: list[str] | None = None,
+    dimensions: int | None = None,
+) -> dict:
+    """Build and write the snapshot.
+
+    Args:
+        output: Snapshot file
+        embeddings: "none", "database" or "embed"
+        languages: Languages whose embeddings to include (default: DEFAULT_LANGUAGE)
+        dimensions: Embedding dimensions (default: EMBEDDING_DIMENSIONS)
+
+    Returns:
+        The snapshot header
+    """
+    settings = get_settings()
+    languages = languages or [settings.default_language]
+    dimensions = dimensions or settings.embedding_dimensions
+
+    rules = dict(get_rules())
+    catalog = visual_catalog()
+    info = general_info()
+    sections = {
+        "rule_ids": list(rules),
+        "rule_records": [json.dumps(rule, ensure_ascii=False) for rule in rules.values()],
+        "rule_sections": [format_rule_section(rule_id, rule) for rule_id, rule in rules.items()],
+        "keyword_table": [
+            KEYWORD_SEPARATOR.join([rule.get("title", "").lower(), *(kw.lower() for kw in rule.get("keywords", []))])
+            for rule in rules.values()
+        ],
+        "general_info": json.dumps(info, ensure_ascii=False),
+        "visual_catalog": json.dumps(catalog, ensure_ascii=False),
+        "catalog_reference": catalog_reference(),
+    }
+
+    digest = hashlib.sha256(json.dumps([rules, info, catalog], sort_keys=True).encode())
+    embedding_info = {}
+    if embeddings != "none":
+        load = database_embeddings if embeddings == "database" else embedded_chunks
+        for language in languages:
+            vectors, records, index_info = load(language, dimensions)
+            if not records:
+                logger.warning(f"No chunks for language={language}; skipping its embeddings")
+                continue
+            matrix = truncate_embeddings(vectors, dimensions).astype(np.float32)
+            sections[f"embeddings/{language}"] = matrix
+            sections[f"chunks/{language}"] = [
+                json.dumps({key: record.get(key) for key in CHUNK_FIELDS}, ensure_ascii=False) for record in records
+            ]
+            embedding_info[language] = {"index": index_info, "count": len(records), "dimensions": matrix.shape[1]}
+            digest.update(matrix.tobytes())
+            logger.info(f"Included {len(records)} chunk embeddings for language={language} ({matrix.shape[1]} dimensions)")
+
+    write_snapshot(output, sections, {
+        "corpus_version": digest.hexdigest(),
+        "source_digest": source_digest(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "rules": len(rules),
+        "embeddings": embedding_info,
+    })
+    header = Snapshot(output).header
+    logger.info(
+        f"Wrote {output} (format {FORMAT_VERSION}, corpus {header['corpus_version'][:12]}, "
+        f"{len(rules)} rules, {output.stat().st_size / 1024:.0f} KB)"
+    )
+    return header
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mappable corpus snapshot")
+    parser.add_argument(
+        "--output", "-o",
+        type=Path,
+        default=DEFAULT_SNAPSHOT_PATH,
+        help="Snapshot file (default: src/data/corpus.snapshot)"
+    )
+    parser.add_argument(
+        "--embeddings", "-e",
+        choices=["none", "database", "embed"],
+        default="none",
+        help="Include chunk embeddings from the database or embedded now (default: none)"
+    )
+    parser.add_argument(
+        "--language", "-l",
+        action="append",
+        dest="languages",
+        help="Language whose embeddings to include (repeatable; default: DEFAULT_LANGUAGE)"
+    )
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        help="Embedding dimensions (default: EMBEDDING_DIMENSIONS)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        build_snapshot(args.output, args.embeddings, args.languages, args.dimensions)
+    except Exception as e:
+        logger.error(f"Snapshot build failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Pipelined, resumable embedding ingestion.
+
+Chunking, embedding and writing run as overlapping asyncio stages connected
+by bounded queues:
+- the producer batches chunks as they are created (skipping ones already stored)
+- embedding workers call the embeddings backend concurrently, bounded by an
+  AIMD limit that halves on rate-limit responses and grows back on success
+- a single writer bulk-upserts embedded chunks and records each committed
+  bulk in a local checkpoint file, so a failed run resumes where it stopped
+"""
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterable
+
+from loguru import logger
+
+from src.services.resilience import CircuitOpenError, backoff_delay
+
+
+EmbedFn = Callable[[list[str]], list[list[float]]]
+WriteFn = Callable[[list[dict]], None]
+
+
+class AdaptiveLimiter:
+    """Concurrency limit with additive increase, multiplicative decrease.
+
+    The limit grows by one after `limit` consecutive successes and halves on
+    every rate-limit response, never leaving [minimum, maximum].
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.limit = max(minimum, min(initial, maximum))
+        self.maximum = maximum
+        self.minimum = minimum
+        self.active = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    async def on_success(self) -> None:
+        async with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    async def on_rate_limit(self) -> None:
+        async with self._condition:
+            self.limit = max(self.minimum, self.limit // 2)
+            self._successes = 0
+        logger.warning(f"Embedding rate limited, concurrency limit now {self.limit}")
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an embeddings error is a rate limit (HTTP 429) or an open circuit."""
+    if isinstance(error, CircuitOpenError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+class Checkpoint:
+    """Content hashes committed by a run, persisted so a re-run can resume.
+
+    The file is only reused by a run with the same embedding index and mode,
+    and is removed once a run completes.
+    """
+
+    def __init__(self, path: Path, run: dict):
+        """
+        Args:
+            path: Checkpoint file
+            run: Identity of the run (language, embedding index, full/incremental)
+        """
+        self.path = path
+        self.run = run
+        self.committed: set[str] = set()
+        self.resumed = False
+        if path.exists():
+            data = json.loads(path.read_text())
+            if data.get("run") == run:
+                self.committed = set(data["committed"])
+                self.resumed = True
+            else:
+                logger.warning(f"Ignoring checkpoint {path} from a different run: {data.get('run')}")
+
+    def add(self, hashes: Iterable[str]) -> None:
+        """Record committed hashes (written atomically)."""
+        self.committed.update(hashes)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"run": self.run, "committed": sorted(self.committed)}))
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+async def _produce(chunks: Iterable[dict], skip: set[str], batches: asyncio.Queue, batch_size: int, workers: int) -> None:
+    batch = []
+    iterator = iter(chunks)
+    # The chunk source may block (PDF pages come from worker processes), so pull it off the event loop
+    while (chunk := await asyncio.to_thread(next, iterator, None)) is not None:
+        if chunk["content_hash"] in skip:
+            continue
+        skip.add(chunk["content_hash"])  # Identical chunks are embedded once
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            await batches.put(batch)
+            batch = []
+    if batch:
+        await batches.put(batch)
+    for _ in range(workers):
+        await batches.put(None)
+
+
+async def _embed_batch(batch: list[dict], embed: EmbedFn, limiter: AdaptiveLimiter, max_attempts: int) -> list[dict]:
+    texts = [chunk["content"] for chunk in batch]
+    for attempt in range(max_attempts):
+        try:
+            async with limiter:
+                embeddings = await asyncio.to_thread(embed, texts)
+            await limiter.on_success()
+            return [{**chunk, "embedding": embedding} for chunk, embedding in zip(batch, embeddings)]
+        except Exception as e:
+            if attempt == max_attempts - 1:
+                raise
+            if is_rate_limited(e):
+                await limiter.on_rate_limit()
+                delay = max(backoff_delay(attempt + 2), getattr(e, "retry_after", 0.0))
+            else:
+                delay = backoff_delay(attempt)
+            logger.warning(f"Embedding batch failed (attempt {attempt + 1}/{max_attempts}), retrying in {delay:.2f}s: {e}")
+            await asyncio.sleep(delay)
+
+
+async def _embed_worker(batches: asyncio.Queue, embedded: asyncio.Queue, embed: EmbedFn, limiter: AdaptiveLimiter, max_attempts: int) -> None:
+    while (batch := await batches.get()) is not None:
+        await embedded.put(await _embed_batch(batch, embed, limiter, max_attempts))
+    await embedded.put(None)
+
+
+async def _write(embedded: asyncio.Queue, write: WriteFn, checkpoint: Checkpoint, insert_batch_size: int, workers: int) -> int:
+    pending: list[dict] = []
+    written = 0
+    finished = 0
+
+    async def flush():
+        nonlocal pending, written
+        records, pending = pending, []
+        await asyncio.to_thread(write, records)
+        checkpoint.add(record["content_hash"] for record in records)
+        written += len(records)
+        logger.info(f"Upserted {len(records)} records (total: {written})")
+
+    while finished < workers:
+        records = await embedded.get()
+        if records is None:
+            finished += 1
+            continue
+        pending.extend(records)
+        if len(pending) >= insert_batch_size:
+            await flush()
+    if pending:
+        await flush()
+    return written
+
+
+async def run_pipeline(
+    chunks: Iterable[dict],
+    embed: EmbedFn,
+    write: WriteFn,
+    checkpoint: Checkpoint,
+    skip: set[str] | None = None,
+    batch_size: int = 20,
+    insert_batch_size: int = 100,
+    max_concurrency: int = 4,
+    max_attempts: int = 6,
+) -> int:
+    """Embed and write chunks through the staged pipeline.
+
+    Args:
+        chunks: Chunk dicts with content and content_hash (consumed lazily)
+        embed: Blocking batch embedding function (texts -> vectors)
+        write: Blocking bulk write of embedded chunk dicts
+        checkpoint: Checkpoint updated after every committed write (its hashes are skipped)
+        skip: Content hashes that don't need embedding (e.g. already stored)
+        batch_size: Chunks per embedding call
+        insert_batch_size: Rows per bulk write
+        max_concurrency: Upper bound on concurrent embedding calls
+        max_attempts: Attempts per embedding batch before the run fails
+
+    Returns:
+        Number of chunks written
+    """
+    skip = set(skip or ()) | checkpoint.committed
+    limiter = AdaptiveLimiter(initial=max(1, max_concurrency // 2), maximum=max_concurrency)
+    batches: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency * 2)
+    embedded: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency * 2)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(_produce(chunks, skip, batches, batch_size, max_concurrency))
+            for _ in range(max_concurrency):
+                group.create_task(_embed_worker(batches, embedded, embed, limiter, max_attempts))
+            writer = group.create_task(_write(embedded, write, checkpoint, insert_batch_size, max_concurrency))
+    except ExceptionGroup as group_error:
+        # Surface the first real failure; completed writes stay in the checkpoint
+        raise group_error.exceptions[0]
+    return writer.result()
@@ -2,18 +2,24 @@
 """
 Ingestion script for COLREG rules into vector store.
 
-Parses rules.py, splits each rule into subsection chunks,
-generates embeddings, and stores them in Supabase.
+Parses rules.py (plus compiled documents in the rule store, or a regulation
+PDF streamed with --pdf), splits each rule into subsection chunks,
+generates embeddings, and stores them in Supabase. Re-runs only embed
+chunks whose content hash changed (--full re-embeds everything).
 
 Usage:
     cd backend
-    python -m scripts.ingest_rules [--language en] [--dry-run]
+    python -m scripts.ingest_rules [--language en] [--dry-run] [--full] [--pdf ../data/eCOLREGs.pdf]
 """
 
 import argparse
+import asyncio
+import hashlib
+import json
 import re
 import sys
 from pathlib import Path
+from typing import Iterable, Iterator
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -22,8 +28,12 @@ from loguru import logger
 from supabase import create_client, Client
 
 from src.config import get_settings
-from src.data.rules import COLREG_RULES
-from src.services.embeddings import embed_texts
+from src.data.rule_store import available_languages, get_rules
+from src.data.extended_content import FIELD_TITLES, format_extended_field, get_extended_content
+from src.services.embeddings import embed_texts, get_embedding_backend
+from scripts.ingest_pipeline import Checkpoint, run_pipeline
+
+CHECKPOINT_DIR = Path(__file__).parent / ".checkpoints"
 
 
 def get_supabase() -> Client:
@@ -93,17 +103,22 @@ def parse_subsections(content: str) -> list[tuple[str, str]]:
     return subsections
 
 
-def create_chunks(rule_id: str, rule_data: dict, language: str = "en") -> list[dict]:
+def create_chunks(rule_id: str, rule_data: dict, language: str = "en", include_extended: bool = True) -> list[dict]:
     """Create embedding chunks for a single rule.
 
-    Each chunk contains:
+    Each rule chunk contains:
     - The subsection content
     - The rule summary (for context)
 
+    Rules with extended content also get one chunk per scenario and one each
+    for application guidance, common mistakes and exam tips. metadata
+    ["chunk_type"] tells them apart ("rule", "scenario", "application", ...).
+
     Args:
         rule_id: The rule identifier (e.g., "rule_27")
-        rule_data: The rule data dict from COLREG_RULES
+        rule_data: The rule data dict (COLREG_RULES or a rule_store language variant)
         language: Language code
+        include_extended: Add chunks for the rule's extended content
 
     Returns:
         List of chunk dicts ready for embedding
@@ -120,7 +135,8 @@ def create_chunks(rule_id: str, rule_data: dict, language: str = "en") -> list[d
     for subsection_id, subsection_content in subsections:
         # Create chunk text: subsection content + summary for context
         # This helps semantic search match queries to relevant subsections
-        chunk_text = f"{subsection_content}\n\nRule Summary: {summary}"
+        # (rules parsed from a PDF with no existing rule have no summary)
+        chunk_text = f"{subsection_content}\n\nRule Summary: {summary}" if summary else subsection_content
 
         chunk = {
             "rule_id": rule_id,
@@ -128,6 +144,7 @@ def create_chunks(rule_id: str, rule_data: dict, language: str = "en") -> list[d
             "content": chunk_text,
             "language": language,
             "metadata": {
+                "chunk_type": "rule",
                 "title": title,
                 "part": part,
                 "section": section,
@@ -136,74 +153,241 @@ def create_chunks(rule_id: str, rule_data: dict, language: str = "en") -> list[d
         }
         chunks.append(chunk)
 
+    if include_extended:
+        chunks.extend(create_extended_chunks(rule_id, rule_data, language))
+
     return chunks
 
 
-def ingest_rules(language: str = "en", dry_run: bool = False, batch_size: int = 20):
+def create_extended_chunks(rule_id: str, rule_data: dict, language: str = "en") -> list[dict]:
+    """Create chunks for a rule's extended content (scenarios, application, mistakes, tips).
+
+    Args:
+        rule_id: The rule identifier (e.g., "rule_14")
+        rule_data: The rule data dict (COLREG_RULES or a rule_store language variant)
+        language: Language code
+
+    Returns:
+        List of chunk dicts (empty if the rule has no extended content)
+    """
+    entry = get_extended_content().get(rule_id)
+    if not entry:
+        return []
+
+    title = rule_data.get("title", "")
+    base_metadata = {"title": title, "part": rule_data.get("part", ""), "section": rule_data.get("section")}
+    chunks = []
+
+    def add(chunk_type: str, subsection: str, heading: str, text: str, **metadata):
+        chunks.append({
+            "rule_id": rule_id,
+            "subsection": subsection,
+            "content": f"{title} - {heading}\n\n{text}",
+            "language": language,
+            "metadata": {"chunk_type": chunk_type, **base_metadata, **metadata},
+        })
+
+    for i, scenario in enumerate(entry.get("scenarios", []), start=1):
+        add(
+            "scenario", f"scenario_{i}", "Scenario", f"{scenario['title']}: {scenario['description']}",
+            rules_applied=scenario.get("rules_applied", [rule_id]),
+        )
+    for field in ("application", "common_mistakes", "exam_tips"):
+        if field in entry:
+            add(field, field, FIELD_TITLES[field], format_extended_field(field, entry[field]))
+
+    return chunks
+
+
+def chunk_content_hash(chunk: dict) -> str:
+    """Hash of everything stored for a chunk except its vector.
+
+    Covers rule_id, subsection, text and metadata, which includes the
+    embedding index (backend, model and dimensions), so a chunk is re-embedded
+    whenever its text or the embedding configuration changes.
+    """
+    payload = json.dumps(
+        {key: chunk[key] for key in ("rule_id", "subsection", "content", "language", "metadata")},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_stored_hashes(supabase: Client, language: str) -> list[dict]:
+    """Load the id and content_hash of every stored chunk for a language."""
+    response = (
+        supabase.table("rule_embeddings")
+        .select("id, content_hash")
+        .eq("language", language)
+        .execute()
+    )
+    return response.data or []
+
+
+def delete_chunks(supabase: Client, ids: list[str], batch_size: int = 100) -> None:
+    """Delete stored chunks by id (batched to keep request URLs short)."""
+    for i in range(0, len(ids), batch_size):
+        supabase.table("rule_embeddings").delete().in_("id", ids[i:i + batch_size]).execute()
+
+
+def iter_rules(language: str, pdf: Path | None = None, pdf_prefix: str = "") -> Iterator[tuple[str, dict]]:
+    """Yield the rules to ingest for a language.
+
+    With a PDF, its rules are streamed first (replacing the text of rules with
+    the same id, whose summary and keywords are kept) and the rule store's
+    remaining rules follow.
+    """
+    rules = get_rules(language)
+    if pdf is None:
+        yield from rules.items()
+        return
+
+    from scripts.pdf_rules import iter_pdf_rules
+
+    parsed = set()
+    for rule_id, record in iter_pdf_rules(pdf, prefix=pdf_prefix):
+        parsed.add(rule_id)
+        yield rule_id, {**rules.get(rule_id, {}), **record}
+    for rule_id, rule_data in rules.items():
+        if rule_id not in parsed:
+            yield rule_id, rule_data
+
+
+def iter_chunks(language: str, index_info: dict, seen: set[str], rules: Iterable[tuple[str, dict]] | None = None) -> Iterator[dict]:
+    """Yield every chunk with its index metadata and content hash, recording hashes in `seen`."""
+    for rule_id, rule_data in rules if rules is not None else get_rules(language).items():
+        chunks = create_chunks(rule_id, rule_data, language)
+        for chunk in chunks:
+            chunk["metadata"] = {**chunk["metadata"], "embedding_index": index_info}
+            chunk["content_hash"] = chunk_content_hash(chunk)
+            seen.add(chunk["content_hash"])
+            yield chunk
+        logger.debug(f"Created {len(chunks)} chunks for {rule_id}")
+
+
+def upsert_chunks(supabase: Client, chunks: list[dict]) -> None:
+    """Bulk upsert embedded chunks (re-runs after a partial failure don't duplicate them)."""
+    records = [
+        {
+            "rule_id": chunk["rule_id"],
+            "subsection": chunk["subsection"],
+            "content": chunk["content"],
+            "content_hash": chunk["content_hash"],
+            "embedding": chunk["embedding"],
+            "language": chunk["language"],
+            "metadata": chunk["metadata"],
+        }
+        for chunk in chunks
+    ]
+    supabase.table("rule_embeddings").upsert(records, on_conflict="language,content_hash").execute()
+
+
+def ingest_rules(
+    language: str = "en",
+    dry_run: bool = False,
+    batch_size: int = 20,
+    dimensions: int | None = None,
+    full: bool = False,
+    concurrency: int = 4,
+    insert_batch_size: int = 100,
+    checkpoint_path: Path | None = None,
+    pdf: Path | None = None,
+    pdf_prefix: str = "",
+) -> dict:
     """Main ingestion function.
 
+    By default ingestion is incremental: chunks are identified by their content
+    hash, only new or changed chunks are embedded and upserted, and stored
+    chunks that no longer exist are deleted afterwards. The index is never
+    empty during a run. With full=True every chunk for the language is
+    deleted first and the whole corpus is re-embedded.
+
+    Chunking, embedding and upserts overlap (see scripts.ingest_pipeline).
+    Committed chunks are recorded in a checkpoint file, so re-running after a
+    failure resumes instead of starting over (a resumed full run doesn't
+    delete again).
+
     Args:
         language: Language code for the embeddings
         dry_run: If True, don't actually insert into database
         batch_size: Number of chunks to embed at once
-    """
-    logger.info(f"Starting rule ingestion (language={language}, dry_run={dry_run})")
+        dimensions: Embedding dimensions (defaults to settings.embedding_dimensions;
+            must match the rule_embeddings.embedding column)
+        full: Delete and re-embed everything instead of diffing
+        concurrency: Maximum concurrent embedding calls (adapts down on rate limits)
+        insert_batch_size: Rows per bulk upsert
+        checkpoint_path: Checkpoint file (default: scripts/.checkpoints/ingest-<language>.json)
+        pdf: Regulation PDF to parse and ingest along with the rule store's rules
+        pdf_prefix: Prefix for the PDF's rule ids (e.g. "inland_")
 
-    # Create all chunks first
-    all_chunks = []
-    for rule_id, rule_data in COLREG_RULES.items():
-        chunks = create_chunks(rule_id, rule_data, language)
-        all_chunks.extend(chunks)
-        logger.debug(f"Created {len(chunks)} chunks for {rule_id}")
+    Returns:
+        Counts of chunks upserted by this run, committed by the run it resumed, unchanged and deleted
+    """
+    dimensions = dimensions or get_settings().embedding_dimensions
+    # Recorded with every chunk so retrieval can check it embeds queries the same way
+    index_info = get_embedding_backend().index_info(dimensions)
+    logger.info(f"Starting rule ingestion (language={language}, index={index_info}, full={full}, pdf={pdf}, dry_run={dry_run})")
+    if language not in available_languages():
+        logger.warning(f"No rule translations for language={language} (src/data/translations); ingesting English text")
 
-    logger.info(f"Total chunks to process: {len(all_chunks)}")
+    current: set[str] = set()
 
     if dry_run:
+        all_chunks = list(iter_chunks(language, index_info, current, iter_rules(language, pdf, pdf_prefix)))
+        logger.info(f"Total chunks to process: {len(all_chunks)}")
         logger.info("Dry run mode - showing sample chunks:")
         for chunk in all_chunks[:5]:
             logger.info(f"  {chunk['rule_id']} {chunk['subsection']}: {chunk['content'][:100]}...")
-        return
+        return {"upserted": 0, "resumed": 0, "unchanged": 0, "deleted": 0}
 
     # Get Supabase client
     supabase = get_supabase()
 
-    # Clear existing embeddings for this language (idempotent re-runs)
-    logger.info(f"Clearing existing embeddings for language={language}")
-    supabase.table("rule_embeddings").delete().eq("language", language).execute()
-
-    # Process in batches for efficient embedding
-    total_inserted = 0
-    for i in range(0, len(all_chunks), batch_size):
-        batch = all_chunks[i:i + batch_size]
-        texts = [chunk["content"] for chunk in batch]
-
-        logger.info(f"Embedding batch {i // batch_size + 1}/{(len(all_chunks) + batch_size - 1) // batch_size}")
-
-        try:
-            embeddings = embed_texts(texts)
-
-            # Prepare records for insertion
-            records = []
-            for chunk, embedding in zip(batch, embeddings):
-                records.append({
-                    "rule_id": chunk["rule_id"],
-                    "subsection": chunk["subsection"],
-                    "content": chunk["content"],
-                    "embedding": embedding,
-                    "language": chunk["language"],
-                    "metadata": chunk["metadata"],
-                })
-
-            # Insert batch
-            supabase.table("rule_embeddings").insert(records).execute()
-            total_inserted += len(records)
-            logger.info(f"Inserted {len(records)} records (total: {total_inserted})")
-
-        except Exception as e:
-            logger.error(f"Error processing batch: {e}")
-            raise
-
-    logger.info(f"Ingestion complete! Total records: {total_inserted}")
+    checkpoint = Checkpoint(
+        checkpoint_path or CHECKPOINT_DIR / f"ingest-{language}.json",
+        {"language": language, "index": index_info, "full": full, "pdf": str(pdf) if pdf else None},
+    )
+    if checkpoint.resumed:
+        logger.info(f"Resuming from {checkpoint.path} ({len(checkpoint.committed)} chunks already committed)")
+
+    if full:
+        stored = []
+        if not checkpoint.resumed:
+            # Clear existing embeddings for this language (idempotent re-runs)
+            logger.info(f"Clearing existing embeddings for language={language}")
+            supabase.table("rule_embeddings").delete().eq("language", language).execute()
+    else:
+        stored = load_stored_hashes(supabase, language)
+    stored_hashes = {row["content_hash"] for row in stored}
+    previously_committed = set(checkpoint.committed)
+
+    upserted = asyncio.run(run_pipeline(
+        iter_chunks(language, index_info, current, iter_rules(language, pdf, pdf_prefix)),
+        embed=lambda texts: embed_texts(texts, dimensions=dimensions),
+        write=lambda chunks: upsert_chunks(supabase, chunks),
+        checkpoint=checkpoint,
+        skip=stored_hashes,
+        batch_size=batch_size,
+        insert_batch_size=insert_batch_size,
+        max_concurrency=concurrency,
+    ))
+
+    # Only now remove chunks that were replaced or no longer exist
+    # (rows from before content hashing have a NULL hash and are replaced too)
+    orphan_ids = [row["id"] for row in stored if row["content_hash"] not in current]
+    if orphan_ids:
+        delete_chunks(supabase, orphan_ids)
+        logger.info(f"Deleted {len(orphan_ids)} orphaned records")
+
+    checkpoint.clear()
+    stats = {
+        "upserted": upserted,
+        "resumed": len((previously_committed & current) - stored_hashes),
+        "unchanged": len(current & stored_hashes),
+        "deleted": len(orphan_ids),
+    }
+    logger.info(f"Ingestion complete! {stats}")
+    return stats
 
 
 def main():
@@ -224,6 +408,43 @@ def main():
         default=20,
         help="Batch size for embedding API calls (default: 20)"
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Delete all embeddings for the language and re-embed everything (default: incremental)"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=4,
+        help="Maximum concurrent embedding calls, reduced automatically on rate limits (default: 4)"
+    )
+    parser.add_argument(
+        "--insert-batch-size",
+        type=int,
+        default=100,
+        help="Rows per bulk upsert (default: 100)"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="Checkpoint file for resuming (default: scripts/.checkpoints/ingest-<language>.json)"
+    )
+    parser.add_argument(
+        "--pdf",
+        type=Path,
+        help="Also ingest rules parsed from a regulation PDF, e.g. ../data/eCOLREGs.pdf (needs the pdf extra)"
+    )
+    parser.add_argument(
+        "--pdf-prefix",
+        default="",
+        help="Prefix for rule ids from --pdf, to keep another document's rules apart (e.g. inland_)"
+    )
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        help="Embedding dimensions (default: EMBEDDING_DIMENSIONS, 1536; must match the vector column)"
+    )
 
     args = parser.parse_args()
 
@@ -231,7 +452,14 @@ def main():
         ingest_rules(
             language=args.language,
             dry_run=args.dry_run,
-            batch_size=args.batch_size
+            batch_size=args.batch_size,
+            dimensions=args.dimensions,
+            full=args.full,
+            concurrency=args.concurrency,
+            insert_batch_size=args.insert_batch_size,
+            checkpoint_path=args.checkpoint,
+            pdf=args.pdf,
+            pdf_prefix=args.pdf_prefix,
         )
     except Exception as e:
         logger.error(f"Ingestion failed: {e}")
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Streaming rule extraction from regulation PDFs.
+
+Pages are extracted in parallel worker processes (each opens the PDF once) and
+fed in page order to a streaming parser, which emits a rule record as soon as
+the next rule heading starts. Only a bounded window of pages and the rule
+being parsed are held in memory, whatever the size of the document.
+
+Records have the COLREG_RULES shape (title, part, section, content), so they
+work with ingest_rules.create_chunks and the rule store. PDFs carry no
+summaries or keywords; merged with an existing rule of the same id they keep
+its summary and keywords.
+
+Recognised structure: "PART A - ...", "SECTION II ...", "Rule 14" / "RULE 19"
+followed by a title line, "ANNEX I" followed by an upper-case title. Text
+outside rules and annexes (convention articles, appended recommendations) is
+skipped.
+
+For data/eCOLREGs.pdf the CLI also checks that each annex reaches its final
+numbered paragraph and exits non-zero if one was cut short.
+
+Usage:
+    cd backend
+    python -m scripts.pdf_rules ../data/eCOLREGs.pdf [--output src/data/documents/colregs.json]
+    python -m scripts.pdf_rules inland.pdf --prefix inland_ --output src/data/documents/inland.json
+
+Requires the pdf extra (uv sync --extra pdf).
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+
+DEFAULT_PDF = Path(__file__).parent.parent.parent / "data" / "eCOLREGs.pdf"
+
+RULE_HEADING = re.compile(r"^rule\s+(\d+)\s*(?:\(added by .*\))?$", re.IGNORECASE)
+ANNEX_HEADING = re.compile(r"^annex\s*([IVX]+)$", re.IGNORECASE)
+PART_HEADING = re.compile(r"^PART\s+([A-Z])\b")
+# Section headings are title-only lines ("SECTION II CONDUCT OF ...", "Section III-Conduct of ..."),
+# unlike prose that wraps onto a line starting with a reference ("Section 3 (c) of this Annex shall ...")
+SECTION_HEADING = re.compile(r"^section\s+([IVX]+|\d+)(?![\w(])\s*([^.;,()]*)$", re.IGNORECASE)
+# Other top-level headings end the current rule ("ARTICLE IX", "IMO RECOMMENDATION ON ...")
+BREAK_HEADING = re.compile(r"^(?:ARTICLE\s+[IVX]+|[A-Z][A-Z ,'-]{20,})$")
+# Figure captions like "Rule 27(b)(i) - Vessels not under command ..."
+CAPTION = re.compile(r"^(?:rule|annex)\s*[\dIVX]+[,(].* - ", re.IGNORECASE)
+# Rule titles wrapped onto a second line ("... Restricted in their Ability to" / "Manoeuvre")
+WRAPPED_TITLE = re.compile(r"\b(?:to|of|and|or|in|by|for|the)$")
+# Lines that start a new paragraph: (a), (iv), 1, 2.1, [Introduction], * footnotes
+PARAGRAPH_START = re.compile(r"^(?:\([a-z]{1,4}\)|\d+(?:\.\d+)*\.?\s+[A-Z(\[]|\[|\*)")
+# Numbered headings in annexes ("2. Vertical positioning and spacing of lights") stand alone
+NUMBERED_HEADING = re.compile(r"^\d+(?:\.\d+)*\.?\s+[A-Z][^.;:,]{0,60}$")
+# A paragraph ending in a reference continues on the next line ("... prescribed by Rule 27(b)" / "(i) or ...")
+TRAILING_REFERENCE = re.compile(r"\b(?:rule|paragraph|section)\s*[\d()a-z]*$", re.IGNORECASE)
+
+# Final numbered paragraph of each annex in data/eCOLREGs.pdf; a prose line mistaken for a heading
+# would end the annex early, so the extraction of the default document is checked against these
+ECOLREGS_FINAL_PARAGRAPHS = {
+    "annex_i": "14. Approval",
+    "annex_ii": "3. Signals for purse seiners",
+    "annex_iii": "3. Approvals",
+}
+
+_document = None  # Per worker process
+
+
+def _open_document(path: str) -> None:
+    global _document
+    import pymupdf
+
+    _document = pymupdf.open(path)
+
+
+def _extract_pages(start: int, stop: int) -> list[list[str]]:
+    """Non-empty, whitespace-normalised text lines of pages [start, stop) (runs in a worker)."""
+    pages = []
+    for number in range(start, stop):
+        text = _document[number].get_text(sort=True)
+        lines = (" ".join(line.split()) for line in text.splitlines())
+        pages.append([line for line in lines if line and not CAPTION.match(line)])
+    return pages
+
+
+def page_count(path: Path) -> int:
+    try:
+        import pymupdf
+    except ImportError as e:
+        raise ImportError("PDF ingestion needs the pdf extra (uv sync --extra pdf)") from e
+
+    with pymupdf.open(path) as document:
+        return document.page_count
+
+
+def iter_pages(path: Path, workers: int | None = None, pages_per_task: int = 4) -> Iterator[list[str]]:
+    """Yield the text lines of each page in order, extracting pages in parallel.
+
+    At most 2 x workers tasks are in flight, so memory doesn't grow with the
+    document. workers=0 extracts in this process.
+    """
+    total = page_count(path)
+    ranges = [(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)]
+    workers = min(os.cpu_count() or 1, 4) if workers is None else workers
+
+    if workers <= 0:
+        _open_document(str(path))
+        for start, stop in ranges:
+            yield from _extract_pages(start, stop)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_open_document, initargs=(str(path),)) as pool:
+        pending: deque[Future] = deque()
+        for start, stop in ranges:
+            pending.append(pool.submit(_extract_pages, start, stop))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _section_heading(line: str) -> str | None:
+    """Section number of a section heading, or None for any other line."""
+    match = SECTION_HEADING.match(line)
+    if match is None:
+        return None
+    # Every significant word of a heading is capitalized ("Section 3 of this Annex" is prose)
+    if any(word[0].islower() for word in match.group(2).strip(" -:").split() if len(word) > 3):
+        return None
+    return match.group(1)
+
+
+def _roman(value: str) -> str:
+    return value.upper() if not value.isdigit() else value
+
+
+class RuleParser:
+    """Line-by-line state machine turning regulation text into rule records."""
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self.part = ""
+        self.section: str | None = None
+        self.seen: set[str] = set()
+
+        self._rule_id: str | None = None
+        self._record: dict | None = None
+        self._paragraphs: list[str] = []
+        self._state = "skip"  # skip | title | annex_title | note | body
+
+    def feed(self, lines: Iterable[str]) -> Iterator[tuple[str, dict]]:
+        """Consume lines, yielding each rule once the next heading closes it."""
+        for line in lines:
+            if match := RULE_HEADING.match(line):
+                yield from self._close()
+                self._open(f"rule_{match.group(1)}", {"part": self.part, "section": self.section})
+                self._state = "title"
+            elif match := ANNEX_HEADING.match(line):
+                yield from self._close()
+                self._open(f"annex_{match.group(1).lower()}", {"part": "Annex", "section": match.group(1).upper()})
+                self._state = "annex_title"
+            elif match := PART_HEADING.match(line):
+                yield from self._close()
+                self.part, self.section = match.group(1), None
+            elif (section := _section_heading(line)) and self._state != "annex_title":
+                yield from self._close()
+                self.section = _roman(section)
+            elif BREAK_HEADING.match(line) and self._state not in ("annex_title", "skip"):
+                yield from self._close()
+            else:
+                self._line(line)
+
+    def close(self) -> Iterator[tuple[str, dict]]:
+        """Yield the last rule (call after the final page)."""
+        yield from self._close()
+
+    def _open(self, rule_id: str, record: dict) -> None:
+        self._rule_id = self.prefix + rule_id
+        self._record = {"title": "", **record}
+        self._paragraphs = []
+
+    def _line(self, line: str) -> None:
+        if self._state == "skip":
+            return
+        if self._state == "title":
+            title = self._record["title"]
+            self._record["title"] = f"{title} {line}" if title else line
+            if not WRAPPED_TITLE.search(line):
+                self._state = "body"
+        elif self._state == "annex_title":
+            if line.isupper():
+                title = self._record["title"]
+                self._record["title"] = f"{title} {line}" if title else line
+                return
+            self._record["title"] = self._record["title"].capitalize()
+            self._state = "body"
+            self._line(line)
+        elif self._state == "note":
+            # Amendment notes like "(The new paragraph (f) shall enter into force ...)"
+            if line.endswith(")"):
+                self._state = "body"
+        elif not self._paragraphs and line.startswith("(") and not PARAGRAPH_START.match(line):
+            self._state = "body" if line.endswith(")") else "note"
+        elif (
+            not self._paragraphs
+            or NUMBERED_HEADING.match(self._paragraphs[-1])
+            or (PARAGRAPH_START.match(line) and not TRAILING_REFERENCE.search(self._paragraphs[-1]))
+        ):
+            self._paragraphs.append(line)
+        else:
+            previous = self._paragraphs[-1]
+            # Keep hyphens at line ends ("non-\ndisplacement") without a space
+            self._paragraphs[-1] = f"{previous}{line}" if previous.endswith("-") else f"{previous} {line}"
+
+    def _close(self) -> Iterator[tuple[str, dict]]:
+        rule_id, record = self._rule_id, self._record
+        self._rule_id = self._record = None
+        self._state = "skip"
+        if rule_id is None:
+            return
+        if rule_id in self.seen:
+            # e.g. an amended copy of an annex appended to the document
+            logger.warning(f"Skipping repeated {rule_id} (the first occurrence is kept)")
+            return
+        self.seen.add(rule_id)
+        record["content"] = "\n\n".join(self._paragraphs)
+        yield rule_id, record
+
+
+def iter_pdf_rules(path: Path, prefix: str = "", workers: int | None = None) -> Iterator[tuple[str, dict]]:
+    """Stream (rule_id, record) pairs parsed from a regulation PDF.
+
+    Args:
+        path: PDF file
+        prefix: Prepended to every rule id (e.g. "inland_" for a second rule set)
+        workers: Extraction processes (default: CPU count, at most 4; 0 for in-process)
+    """
+    parser = RuleParser(prefix)
+    for lines in iter_pages(path, workers):
+        yield from parser.feed(lines)
+    yield from parser.close()
+
+
+def check_rules(
+    rules: Iterable[tuple[str, dict]],
+    expected: dict[str, str],
+    problems: list[str],
+) -> Iterator[tuple[str, dict]]:
+    """Pass rules through, recording any expected rule that is missing or lacks its final paragraph.
+
+    Args:
+        rules: (rule_id, record) pairs
+        expected: rule id -> final paragraph (heading) its content must contain
+        problems: Receives a message per failed check once the rules are exhausted
+    """
+    seen = set()
+    for rule_id, record in rules:
+        seen.add(rule_id)
+        final = expected.get(rule_id)
+        if final is not None and final not in record["content"].split("\n\n"):
+            problems.append(f"{rule_id} ends before its final paragraph '{final}' ({len(record['content'])} chars)")
+        yield rule_id, record
+    problems.extend(f"{rule_id} not found" for rule_id in expected if rule_id not in seen)
+
+
+def write_rules(rules: Iterable[tuple[str, dict]], output: Path) -> int:
+    """Write rules as a JSON object keyed by rule id, one rule at a time.
+
+    Returns:
+        Number of rules written
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with output.open("w") as f:
+        f.write("{")
+        for rule_id, record in rules:
+            f.write(f"{',' if count else ''}\n  {json.dumps(rule_id)}: {json.dumps(record, ensure_ascii=False)}")
+            count += 1
+        f.write("\n}\n")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract rules from a regulation PDF")
+    parser.add_argument(
+        "pdf",
+        type=Path,
+        nargs="?",
+        default=DEFAULT_PDF,
+        help="PDF file (default: data/eCOLREGs.pdf)"
+    )
+    parser.add_argument(
+        "--output", "-o",
+        type=Path,
+        help="Write the rules as JSON, e.g. src/data/documents/<name>.json for the rule store (default: list them)"
+    )
+    parser.add_argument(
+        "--prefix",
+        default="",
+        help="Prefix for rule ids, to keep another document's rules apart (e.g. inland_)"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        help="Page extraction processes (default: CPU count, at most 4; 0 for in-process)"
+    )
+
+    args = parser.parse_args()
+
+    rules = iter_pdf_rules(args.pdf, args.prefix, args.workers)
+    problems: list[str] = []
+    if args.pdf.resolve() == DEFAULT_PDF.resolve():
+        expected = {args.prefix + rule_id: final for rule_id, final in ECOLREGS_FINAL_PARAGRAPHS.items()}
+        rules = check_rules(rules, expected, problems)
+    if args.output:
+        count = write_rules(rules, args.output)
+        logger.info(f"Wrote {count} rules from {args.pdf} to {args.output}")
+    else:
+        for rule_id, record in rules:
+            logger.info(f"{rule_id}: {record['title']} (part {record['part']}, {len(record['content'])} chars)")
+
+    for problem in problems:
+        logger.error(f"Incomplete extraction: {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,41 @@
+import asyncio
 import json
 import re
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+import time
+from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from datetime import datetime
 from loguru import logger
-from src.graph.workflow import create_prep_graph
-from src.graph.nodes import SYSTEM_PROMPT, VISUAL_INSTRUCTIONS, generate_suggestions_node
+from src.api.sse import format_sse
+from src.graph.workflow import get_complete_graph, get_prep_graph
+from src.graph.nodes import build_messages, generate_node, generate_suggestions_node
 from src.services.llm import generate_streaming_response
 from src.services.stream_parser import parse_streaming_response
 from src.services.chat_history import save_message
-from src.data.visual_catalog import generate_catalog_reference
-from src.data.rules import COLREG_RULES
+from src.services.summarizer import refresh_summary
+from src.services.metrics import ANSWER_CACHE, CONTENT_TYPE, StreamStats, render_metrics
+from src.services.answer_cache import answer_key, etag_matches, get_answer_cache
+from src.services.deadline import request_deadline
+from src.services.embeddings import embed_texts
+from src.services.batch_cache import BatchCache
+from src.services.language import resolve_language
+from src.services.warmup import readiness
+from src.data.rule_store import get_rules
 from src.models.extraction import RuleMetadata
 from src.config import get_settings
 
 
-def extract_mentioned_rules(text: str, existing_rule_ids: set[str]) -> list[RuleMetadata]:
+def extract_mentioned_rules(text: str, existing_rule_ids: set[str], language: str = "en") -> list[RuleMetadata]:
     """Extract rule mentions from LLM response that aren't already in matched rules.
 
     Parses patterns like "Rule 30", "Rule 35(a)", "rule 14" from text and returns
-    RuleMetadata for any rules not already included.
+    RuleMetadata (in the request language) for any rules not already included.
     """
+    rules = get_rules(language)
     # Match "Rule X" or "Rule X(y)" patterns (case insensitive)
     pattern = r'\brule\s+(\d+)(?:\s*\([a-z]\))?'
     matches = re.findall(pattern, text, re.IGNORECASE)
@@ -36,7 +49,7 @@ def extract_mentioned_rules(text: str, existing_rule_ids: set[str]) -> list[Rule
         if rule_id in existing_rule_ids or rule_id in seen:
             continue
 
-        rule = COLREG_RULES.get(rule_id)
+        rule = rules.get(rule_id)
         if rule:
             seen.add(rule_id)
             additional_rules.append(RuleMetadata(
@@ -53,7 +66,6 @@ def extract_mentioned_rules(text: str, existing_rule_ids: set[str]) -> list[Rule
 
 
 router = APIRouter()
-prep_graph = create_prep_graph()
 security = HTTPBearer()
 
 
@@ -69,6 +81,7 @@ class ChatRequest(BaseModel):
     message: str
     session_id: str | None = None
     is_mobile: bool = False
+    language: str | None = None  # e.g. "en" or "es-ES"; detected from the message when omitted
 
 
 @router.post("/chat")
@@ -79,16 +92,21 @@ async def chat(request: ChatRequest, _: HTTPAuthorizationCredentials = Depends(v
     Accepts a user message and optional session_id, returns a streaming response.
     Uses prep graph for context, then streams LLM response directly.
     """
+    started_at = time.perf_counter()
     try:
         # Generate session ID if not provided
         session_id = request.session_id or datetime.now().strftime("%Y%m%d%H%M%S")
 
         logger.info(f"Chat request for session {session_id}: {request.message[:50]}...")
 
+        language = resolve_language(request.language, request.message)
+
         # Run preparation graph (preprocess, load_history, extract_rules, compile_context)
-        prep_result = await prep_graph.ainvoke({
+        prep_result = await get_prep_graph().ainvoke({
             "query": request.message,
             "session_id": session_id,
+            "deadline": request_deadline(),
+            "language": language,
         })
 
         matched_rules = prep_result.get("matched_rules", [])
@@ -99,55 +117,52 @@ async def chat(request: ChatRequest, _: HTTPAuthorizationCredentials = Depends(v
             fallback_text = prep_result["response"]
 
             async def fallback_generator():
-                yield f"data: {json.dumps({'text': fallback_text})}\n\n"
+                yield format_sse({'text': fallback_text})
 
             return StreamingResponse(fallback_generator(), media_type="text/event-stream")
 
         # Build messages for LLM with visual catalog
-        visual_catalog = generate_catalog_reference(matched_rules)
-        visual_instructions = VISUAL_INSTRUCTIONS.format(visual_catalog=visual_catalog)
-        system_content = SYSTEM_PROMPT.format(
-            rule_context=prep_result.get("rule_context", ""),
-            visual_instructions=visual_instructions
-        )
-        messages = [{"role": "system", "content": system_content}]
-        messages.extend(prep_result.get("chat_history", []))
-        messages.append({"role": "user", "content": request.message})
+        messages = build_messages(prep_result, request.message)
 
         # Stream response with visual marker parsing
         async def event_generator():
             full_response = ""  # Accumulate full response (text only, for history)
+            stats = StreamStats(started_at)
             try:
                 # Send matched rules immediately (before streaming starts)
                 if matched_rules:
                     rules_metadata = {"matched_rules": [rule.model_dump() for rule in matched_rules]}
-                    yield f"event: metadata\ndata: {json.dumps(rules_metadata)}\n\n"
+                    stats.frames += 1
+                    yield format_sse(rules_metadata, event="metadata")
 
                 # Stream LLM response with visual marker parsing
-                raw_stream = generate_streaming_response(messages)
+                raw_stream = stats.count_tokens(generate_streaming_response(messages))
                 async for chunk in parse_streaming_response(raw_stream):
+                    stats.frames += 1
                     if chunk.type == "text":
                         text = chunk.data.get("text", "")
                         full_response += text
-                        yield f"data: {json.dumps({'type': 'text', 'text': text})}\n\n"
+                        yield format_sse({'type': 'text', 'text': text})
                     elif chunk.type == "visual":
                         # Emit visual event (don't add to full_response - keep history text-only)
-                        yield f"event: visual\ndata: {json.dumps(chunk.data)}\n\n"
+                        yield format_sse(chunk.data, event="visual")
 
                 # After streaming, check for additional rules mentioned in response
                 existing_rule_ids = {r.id for r in matched_rules}
-                additional_rules = extract_mentioned_rules(full_response, existing_rule_ids)
+                additional_rules = extract_mentioned_rules(full_response, existing_rule_ids, language)
 
                 # Send additional rules if found
                 if additional_rules:
                     additional_metadata = {"additional_rules": [rule.model_dump() for rule in additional_rules]}
-                    yield f"event: metadata\ndata: {json.dumps(additional_metadata)}\n\n"
+                    stats.frames += 1
+                    yield format_sse(additional_metadata, event="metadata")
                     logger.info(f"Found {len(additional_rules)} additional rules in response: {[r.id for r in additional_rules]}")
 
                 # Generate suggestions (skip for mobile)
                 suggested_questions = []
                 if not request.is_mobile:
-                    suggestion_result = generate_suggestions_node({
+                    # Blocking LLM call: run it off the event loop so other streams keep flowing
+                    suggestion_result = await run_in_threadpool(generate_suggestions_node, {
                         **prep_result,
                         "query": request.message,
                         "response": full_response,
@@ -155,26 +170,241 @@ async def chat(request: ChatRequest, _: HTTPAuthorizationCredentials = Depends(v
                     suggested_questions = suggestion_result.get("suggested_questions", [])
 
                 # Save to history (text only, markers stripped)
-                save_message(session_id, "user", request.message)
-                save_message(session_id, "assistant", full_response)
+                await run_in_threadpool(save_message, session_id, "user", request.message)
+                await run_in_threadpool(save_message, session_id, "assistant", full_response)
 
                 # Send suggested questions
                 if suggested_questions:
-                    yield f"event: metadata\ndata: {json.dumps({'suggested_questions': suggested_questions})}\n\n"
+                    stats.frames += 1
+                    yield format_sse({'suggested_questions': suggested_questions}, event="metadata")
 
                 logger.info(f"Chat completed for session {session_id}")
 
             except Exception as e:
                 logger.error(f"Error in streaming: {e}")
-                yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+                stats.frames += 1
+                yield format_sse({'type': 'error', 'error': str(e)})
+
+            finally:
+                stats.record()
 
-        return StreamingResponse(event_generator(), media_type="text/event-stream")
+        # Fold older turns into the rolling summary once the response has been sent
+        background = BackgroundTask(refresh_summary, session_id) if get_settings().summary_enabled else None
+
+        return StreamingResponse(event_generator(), media_type="text/event-stream", background=background)
 
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class BatchRequest(BaseModel):
+    questions: list[str]
+    language: str | None = None  # Applied to every question; detected per question when omitted
+    classify: bool = False  # Run the query classifier on each question (skipped by default)
+
+
+async def answer_question(
+    index: int,
+    question: str,
+    language: str | None,
+    classify: bool,
+    cache: BatchCache,
+) -> dict:
+    """Prepare and answer one batch question (stateless: no history is loaded or saved)."""
+    started_at = time.perf_counter()
+    result = {"index": index, "question": question}
+    try:
+        language = resolve_language(language, question)
+        prep_result = await get_prep_graph().ainvoke({
+            "query": question,
+            "session_id": None,
+            "deadline": request_deadline(),
+            "language": language,
+            "skip_classifier": not classify,
+            "batch_cache": cache,
+        })
+        matched_rules = prep_result.get("matched_rules", [])
+        result.update(language=language, matched_rules=[rule.model_dump() for rule in matched_rules])
+
+        if prep_result.get("response"):
+            # Invalid query (classify=true): fallback text, no generation
+            result.update(valid=False, text=prep_result["response"], visuals=[])
+        else:
+            generated = await generate_node({**prep_result, "query": question})
+            text, visuals = generated["response"], generated["visuals"]
+            additional_rules = extract_mentioned_rules(text, {r.id for r in matched_rules}, language)
+            result.update(
+                valid=True,
+                text=text,
+                visuals=visuals,
+                additional_rules=[rule.model_dump() for rule in additional_rules],
+            )
+    except Exception as e:
+        logger.error(f"Batch question {index} failed: {e}")
+        result["error"] = str(e)
+    result["elapsed_ms"] = round((time.perf_counter() - started_at) * 1000, 1)
+    return result
+
+
+@router.post("/chat/batch")
+async def chat_batch(request: BatchRequest, _: HTTPAuthorizationCredentials = Depends(verify_api_key)):
+    """
+    Answer a list of questions, streaming one NDJSON line per question as it completes.
+
+    Questions are independent (no session history) and run through the prep graph
+    and generation with at most batch_concurrency in flight. Query embeddings are
+    computed in one embed_texts call, and extractions and compiled contexts are
+    shared between questions of the batch. Each line carries the question's
+    index; a final {"done": true, ...} line closes the stream.
+    """
+    settings = get_settings()
+    questions = [q.strip() for q in request.questions]
+    if not questions:
+        raise HTTPException(status_code=422, detail="questions must not be empty")
+    if len(questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.batch_max_questions} questions per batch"
+        )
+
+    logger.info(f"Batch request with {len(questions)} questions")
+    started_at = time.perf_counter()
+
+    # One embedding call for every distinct question (RAG queries are the bare question without history)
+    distinct = list(dict.fromkeys(q for q in questions if q))
+    embeddings = {}
+    try:
+        if distinct:
+            embeddings = dict(zip(distinct, await run_in_threadpool(embed_texts, distinct)))
+    except Exception as e:
+        logger.warning(f"Batch embedding failed, embedding questions individually: {e}")
+    cache = BatchCache(embeddings)
+
+    semaphore = asyncio.Semaphore(max(1, settings.batch_concurrency))
+
+    async def bounded(index: int, question: str) -> dict:
+        if not question:
+            return {"index": index, "question": question, "error": "Empty question"}
+        async with semaphore:
+            return await answer_question(index, question, request.language, request.classify, cache)
+
+    async def ndjson_generator():
+        tasks = [asyncio.create_task(bounded(i, q)) for i, q in enumerate(questions)]
+        errors = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                errors += "error" in result
+                yield json.dumps(result) + "\n"
+            yield json.dumps({
+                "done": True,
+                "questions": len(questions),
+                "errors": errors,
+                "cache_hits": cache.hits,
+                "elapsed_ms": round((time.perf_counter() - started_at) * 1000, 1),
+            }) + "\n"
+            logger.info(f"Batch completed: {len(questions)} questions, {errors} errors, cache hits {cache.hits}")
+        finally:
+            # Client went away: don't keep answering
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(ndjson_generator(), media_type="application/x-ndjson")
+
+
+class CompleteRequest(BaseModel):
+    message: str
+    session_id: str | None = None  # Omit for a stateless (cacheable) completion
+    language: str | None = None
+
+
+async def complete(request: CompleteRequest, if_none_match: str | None = None) -> Response:
+    """Run the full graph and return the whole answer as one JSON payload.
+
+    Stateless requests are served from the answer cache when possible and
+    carry an ETag; if_none_match (GET only) turns a matching cached answer into
+    a 304. Requests with a session load and save history and are never cached.
+    """
+    message = request.message.strip()
+    if not message:
+        raise HTTPException(status_code=422, detail="message must not be empty")
+
+    language = resolve_language(request.language, message)
+    cache = get_answer_cache() if request.session_id is None else None
+    key = answer_key(message, language)
+
+    if cache is not None:
+        entry = cache.get(key)
+        if entry is not None:
+            headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+            if etag_matches(if_none_match, entry.etag):
+                ANSWER_CACHE.inc(outcome="not_modified")
+                return Response(status_code=304, headers=headers)
+            ANSWER_CACHE.inc(outcome="hit")
+            return JSONResponse(content=entry.payload, headers=headers)
+        ANSWER_CACHE.inc(outcome="miss")
+
+    logger.info(f"Completion request (session {request.session_id}): {message[:50]}...")
+    try:
+        result = await get_complete_graph().ainvoke({
+            "query": message,
+            "session_id": request.session_id,
+            "deadline": request_deadline(),
+            "language": language,
+        })
+    except Exception as e:
+        logger.error(f"Error in completion endpoint: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    matched_rules = result.get("matched_rules", [])
+    text = result.get("response", "")
+    valid = result.get("is_valid_query", True)
+    additional_rules = extract_mentioned_rules(text, {r.id for r in matched_rules}, language) if valid else []
+    payload = {
+        "text": text,
+        "visuals": result.get("visuals", []),
+        "matched_rules": [rule.model_dump() for rule in matched_rules],
+        "additional_rules": [rule.model_dump() for rule in additional_rules],
+        "suggested_questions": result.get("suggested_questions", []),
+        "language": language,
+        "valid": valid,
+    }
+
+    if request.session_id is not None:
+        payload["session_id"] = request.session_id
+        background = BackgroundTask(refresh_summary, request.session_id) if get_settings().summary_enabled else None
+        return JSONResponse(content=payload, headers={"Cache-Control": "no-store"}, background=background)
+
+    headers = {"Cache-Control": "no-cache"}
+    if cache is not None and valid and text:
+        headers["ETag"] = cache.put(key, payload).etag
+    return JSONResponse(content=payload, headers=headers)
+
+
+@router.post("/chat/complete")
+async def chat_complete(request: CompleteRequest, _: HTTPAuthorizationCredentials = Depends(verify_api_key)):
+    """
+    Non-streaming chat: the full graph (prep, generation, suggestions, history)
+    in one JSON response with text, visuals, matched rules and suggested questions.
+    """
+    return await complete(request)
+
+
+@router.get("/chat/complete")
+async def chat_complete_get(
+    message: str,
+    language: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    _: HTTPAuthorizationCredentials = Depends(verify_api_key),
+):
+    """
+    Stateless completion for a question, revalidatable with If-None-Match.
+
+    Returns 304 Not Modified when the tag matches the cached answer.
+    """
+    return await complete(CompleteRequest(message=message, language=language), if_none_match)
+
+
 @router.get("/")
 async def root():
     """Root endpoint."""
@@ -185,3 +415,16 @@ async def root():
 async def health():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness check: 503 until the startup warm-up has finished."""
+    is_ready, details = readiness()
+    return JSONResponse(content=details, status_code=200 if is_ready else 503)
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint (text exposition format)."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,18 @@
+"""Server-Sent Events frame encoding for the streaming endpoints."""
+
+import json
+
+
+def format_sse(data: dict, event: str | None = None) -> str:
+    """Encode a payload as a single SSE frame.
+
+    Args:
+        data: JSON-serializable payload
+        event: Optional event name (e.g., "metadata", "visual"); omitted for plain data frames
+
+    Returns:
+        The encoded frame, terminated by a blank line
+    """
+    if event:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return f"data: {json.dumps(data)}\n\n"
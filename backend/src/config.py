@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -8,7 +9,12 @@ class Settings(BaseSettings):
     # LiteLLM Model Configuration
     # Supports: "gpt-4o", "gpt-4o-mini", "claude-3-5-sonnet-20241022", "gemini/gemini-2.0-flash", etc.
     model_name: str = "gpt-4o-mini"
-    classifier_model: str = "gpt-4o-mini"  # Fast model for query classification
+    classifier_model: str = "gpt-4o-mini"  # Fast model for the small calls (classify, extract, suggest, summarize)
+
+    # Per-call-site overrides of the LLM routing table (see src/services/llm.py), as JSON, e.g.
+    # MODEL_ROUTES='{"classify": {"model": "gpt-4o-mini", "fallbacks": ["claude-3-5-haiku-20241022"]}}'
+    # Call sites: classify, extract, generate, suggest, summarize
+    model_routes: dict[str, dict] = {}
 
     # API Keys - LiteLLM auto-detects based on model prefix
     # Set the appropriate key for your chosen model
@@ -20,6 +26,103 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_key: str
 
+    # Database backend for vector search and chat history
+    # "supabase" goes through PostgREST, "postgres" uses a direct asyncpg pool
+    db_backend: Literal["supabase", "postgres"] = "supabase"
+    database_url: str | None = None  # Postgres connection string (required for "postgres")
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    db_statement_cache_size: int = 100  # Set to 0 behind a transaction-mode pooler (pgbouncer)
+
+    # In-memory session history cache (write-through, falls back to the database on a miss)
+    session_cache_enabled: bool = True
+    session_cache_max_messages: int = 20  # Messages kept per session
+    session_cache_max_sessions: int = 1000
+    session_cache_ttl_seconds: float = 1800.0  # Idle time before a session is evicted
+    session_cache_max_bytes: int = 32 * 1024 * 1024
+
+    # Embeddings and vector search
+    embedding_backend: Literal["openai", "hashing", "onnx"] = "openai"
+    embedding_model: str = "text-embedding-3-large"  # For "onnx": directory with model.onnx and tokenizer.json
+    embedding_dimensions: int = 1536  # Must match rule_embeddings.embedding for database search
+    vector_search: Literal["database", "local"] = "database"  # "local" searches an in-process index
+    vector_quantization: Literal["none", "int8", "binary"] = "int8"  # Coarse pass of the local index
+    vector_rescore_factor: int = 4  # Candidates per result rescored exactly (0 disables rescoring)
+
+    # Compiled corpus snapshot (scripts.build_snapshot), memory-mapped at startup instead of importing
+    # rules.py/visual_catalog.py; its embeddings back the local index. Path defaults to src/data/corpus.snapshot
+    corpus_snapshot_enabled: bool = True
+    corpus_snapshot_path: str | None = None
+
+    # Languages: requests without a language are detected among supported_languages
+    # (skipped when only one is configured); anything else falls back to default_language
+    default_language: str = "en"
+    supported_languages: list[str] = ["en"]
+    language_idle_seconds: float = 1800.0  # Non-default language shards are evicted after this idle time
+
+    # Micro-batching of concurrent query embeddings into one API call
+    embedding_batch_enabled: bool = True
+    embedding_batch_max_size: int = 64
+    embedding_batch_max_wait_ms: float = 5.0
+
+    # Prep graph: "two_call" runs the classifier and rule extraction as separate LLM calls,
+    # "combined" validates and extracts in a single structured call
+    prep_mode: Literal["two_call", "combined"] = "two_call"
+
+    # Extended rule content (scenarios, application, common mistakes, exam tips) added to the
+    # context for the fields matching the extracted query_type, up to a character budget
+    extended_context_enabled: bool = True
+    extended_context_max_chars: int = 1500
+
+    # Conversation history sent to the LLM
+    history_max_messages: int = 10  # Recent messages loaded per turn
+    summary_enabled: bool = True  # Fold older turns into a rolling summary (needs chat_summaries table)
+    history_token_budget: int = 1500  # Tokens of recent history kept verbatim
+    summary_max_tokens: int = 300
+
+    # Latency budgets (seconds). The request budget is shared by the prep stages;
+    # each stage also has its own cap and degrades instead of waiting past it.
+    request_budget_seconds: float = 8.0  # 0 disables deadlines
+    classifier_budget_seconds: float = 2.0  # On overrun: treat the query as valid
+    extraction_budget_seconds: float = 5.0  # On overrun: keyword fallback extraction
+    rag_budget_seconds: float = 3.0  # On overrun: skip RAG
+    deadline_max_workers: int = 32  # Threads for deadline-bound calls
+
+    # Hedged requests for the classifier and extraction calls: if the first attempt is
+    # slower than the call site's recent p<hedge_percentile>, send a duplicate and keep the first result
+    hedging_enabled: bool = True
+    hedge_call_sites: list[str] = ["classify", "extract"]
+    hedge_model: str | None = None  # Alternate model/provider for the hedge (defaults to the same model)
+    hedge_percentile: float = 95.0
+    hedge_window_size: int = 200  # Recent latencies kept per call site
+    hedge_min_samples: int = 20  # Use hedge_initial_delay_ms until this many samples
+    hedge_initial_delay_ms: float = 2000.0
+    hedge_min_delay_ms: float = 100.0
+    hedge_max_ratio: float = 0.1  # Hedges allowed per call (token bucket refill)
+    hedge_burst: float = 5.0
+
+    # Upstream resilience: circuit breakers fail fast after repeated errors, retries back off with jitter
+    circuit_failure_threshold: int = 5  # Consecutive failures before a breaker opens
+    circuit_reset_seconds: float = 30.0  # Open time before a half-open probe
+    retry_base_delay_ms: float = 200.0
+    retry_max_delay_ms: float = 2000.0
+
+    # Batch endpoint (/chat/batch): questions per request and how many run through prep + generation at once
+    batch_max_questions: int = 200
+    batch_concurrency: int = 8
+
+    # Answer cache for stateless /chat/complete requests (also backs their ETag / If-None-Match)
+    answer_cache_enabled: bool = True
+    answer_cache_max_entries: int = 1000
+    answer_cache_ttl_seconds: float = 3600.0
+
+    # Startup warm-up: import LiteLLM, build the prep graph and schemas, load the corpus and open the
+    # database and embedding connections in the background; /ready returns 503 until it has finished
+    warmup_enabled: bool = True
+    warmup_connections: bool = True  # Open database/embedding connections (one embedding request)
+    warmup_prefetch_embeddings: bool = False  # Also load the default language's local index ("local" search)
+    warmup_timeout_seconds: float = 30.0  # Report ready after this long even if warm-up hasn't finished
+
     # API Security
     api_key: str
 
@@ -1,3 +1,22 @@
-from .rules import COLREG_RULES, GENERAL_INFO
+"""Rule data.
 
-__all__ = ["COLREG_RULES", "GENERAL_INFO"]
+Attributes are resolved on first access, so importing a submodule (for
+example the corpus snapshot reader) doesn't execute the rules.py literals.
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "COLREG_RULES": "src.data.rules",
+    "GENERAL_INFO": "src.data.rules",
+    "get_extended_content": "src.data.extended_content",
+    "get_rules": "src.data.rule_store",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_EXPORTS[name]), name)
@@ -0,0 +1,134 @@
+"""
+Corpus accessors
+
+Rule records, general info and the visual catalog come from the memory-mapped
+corpus snapshot when one is available (see src/data/snapshot.py), and
+otherwise from rules.py and visual_catalog.py, imported on first use. Callers
+go through these functions instead of importing the modules, so a cold start
+with a snapshot never executes the large Python literals.
+
+A snapshot records a hash of the files it was compiled from (source_digest);
+one that no longer matches them is stale and ignored, so edited rules are
+never shadowed by an old build.
+"""
+
+import hashlib
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+
+from loguru import logger
+
+from src.config import get_settings
+from src.data.snapshot import DEFAULT_SNAPSHOT_PATH, Snapshot, SnapshotError
+
+DATA_DIR = Path(__file__).parent
+DOCUMENTS_DIR = DATA_DIR / "documents"
+
+# Modules the snapshot is compiled from (with the compiled documents)
+SOURCE_MODULES = ("rules.py", "visual_catalog.py")
+
+
+def source_digest() -> str:
+    """Hash of the corpus sources: the rule modules and compiled documents (read as bytes, not imported)."""
+    paths = [DATA_DIR / name for name in SOURCE_MODULES]
+    if DOCUMENTS_DIR.is_dir():
+        paths += sorted(DOCUMENTS_DIR.glob("*.json"))
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.name.encode() + b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def get_snapshot() -> Snapshot | None:
+    """The corpus snapshot, or None if disabled, missing or unreadable."""
+    settings = get_settings()
+    if not settings.corpus_snapshot_enabled:
+        return None
+    path = Path(settings.corpus_snapshot_path) if settings.corpus_snapshot_path else DEFAULT_SNAPSHOT_PATH
+    if not path.exists():
+        if settings.corpus_snapshot_path:
+            logger.warning(f"Corpus snapshot {path} not found; using the Python rule modules")
+        return None
+    try:
+        snapshot = Snapshot(path)
+    except SnapshotError as e:
+        logger.error(f"{e}; using the Python rule modules")
+        return None
+    if snapshot.header.get("source_digest") != source_digest():
+        logger.warning(
+            f"Corpus snapshot {path} is stale (rules.py, visual_catalog.py or documents changed since it was built); "
+            "using the Python rule modules. Re-run scripts.build_snapshot"
+        )
+        return None
+    logger.info(f"Mapped corpus snapshot {path} (corpus {snapshot.corpus_version[:12]})")
+    return snapshot
+
+
+@lru_cache(maxsize=1)
+def corpus_version() -> str:
+    """Version of the corpus being served: the snapshot's, or the hash of the source files."""
+    snapshot = get_snapshot()
+    return snapshot.corpus_version if snapshot is not None else source_digest()
+
+
+def colreg_rules() -> Mapping[str, dict]:
+    """Built-in rules (plus compiled documents, if the snapshot was built with them)."""
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.rules
+    from src.data.rules import COLREG_RULES
+
+    return COLREG_RULES
+
+
+@lru_cache(maxsize=1)
+def general_info() -> dict:
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.json("general_info")
+    from src.data.rules import GENERAL_INFO
+
+    return GENERAL_INFO
+
+
+def format_rule_section(rule_id: str, rule: dict) -> str:
+    """Context section for a rule."""
+    formatted_id = rule_id.replace("_", " ").title()
+    return f"## {rule['title']} ({formatted_id})\n{rule['content']}"
+
+
+def rule_section(rule_id: str, rule: dict) -> str:
+    """Context section for a rule, pre-rendered when it is the snapshot's own record."""
+    snapshot = get_snapshot()
+    if snapshot is not None and rule_id in snapshot.rules and snapshot.rules[rule_id] is rule:
+        return snapshot.rule_section(rule_id)
+    return format_rule_section(rule_id, rule)
+
+
+@lru_cache(maxsize=1)
+def visual_catalog() -> dict[str, dict]:
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.json("visual_catalog")
+    from src.data.visual_catalog import VISUAL_CATALOG
+
+    return VISUAL_CATALOG
+
+
+def get_visual_by_id(visual_id: str) -> dict | None:
+    """Retrieve visual config by catalog ID (e.g. "vessel-lights:power-driven")."""
+    return visual_catalog().get(visual_id.lower())
+
+
+@lru_cache(maxsize=1)
+def catalog_reference() -> str:
+    """Compact visual catalog reference for the system prompt."""
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.text("catalog_reference")
+    from src.data.visual_catalog import generate_catalog_reference
+
+    return generate_catalog_reference([])
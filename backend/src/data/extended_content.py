@@ -0,0 +1,47 @@
+"""
+Extended Rule Content
+
+Scenarios, practical application guidance, exam tips and common mistakes for
+selected rules, stored in extended_content.json. The file is read on first
+use and cached.
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+
+EXTENDED_CONTENT_PATH = Path(__file__).parent / "extended_content.json"
+
+# Fields of each rule's entry, in display order
+EXTENDED_FIELDS = ("application", "scenarios", "common_mistakes", "exam_tips")
+
+FIELD_TITLES = {
+    "application": "Application",
+    "scenarios": "Scenarios",
+    "common_mistakes": "Common mistakes",
+    "exam_tips": "Exam tips",
+}
+
+# Extended fields worth adding to the context for each extraction query_type
+QUERY_TYPE_FIELDS: dict[str, tuple[str, ...]] = {
+    "specific": ("application", "common_mistakes"),
+    "scenario": ("scenarios", "application"),
+    "comparison": ("application", "common_mistakes"),
+    "general": (),
+}
+
+
+@lru_cache(maxsize=1)
+def get_extended_content() -> dict[str, dict]:
+    """Load extended content keyed by rule ID (authoring notes like "_instructions" are dropped)."""
+    data = json.loads(EXTENDED_CONTENT_PATH.read_text())
+    return {rule_id: entry for rule_id, entry in data.items() if not rule_id.startswith("_")}
+
+
+def format_extended_field(field: str, value) -> str:
+    """Render one extended field as plain text (lists become bullet lines)."""
+    if field == "scenarios":
+        return "\n".join(f"- {s['title']}: {s['description']}" for s in value)
+    if isinstance(value, list):
+        return "\n".join(f"- {item}" for item in value)
+    return str(value)
@@ -0,0 +1,93 @@
+"""
+Rule Store
+
+Per-language variants of COLREG_RULES. English is the rules.py data itself;
+another language is read from translations/rules_<language>.json on first use:
+
+    {"rule_14": {"title": "...", "summary": "...", "content": "...", "keywords": [...]}, ...}
+
+Translated fields override the English ones rule by rule, so a partial
+translation still returns every rule. Non-default languages are evicted after
+LANGUAGE_IDLE_SECONDS without a request.
+
+Compiled documents in documents/<name>.json (written by scripts.pdf_rules from
+regulation PDFs) are merged into the rules of every language: a record with a
+new id adds a rule, one with an existing id replaces its text and keeps its
+summary and keywords. A corpus snapshot is built from the merged rules, so
+with one the documents are not read again.
+"""
+
+import json
+from collections.abc import Mapping
+from functools import lru_cache
+from pathlib import Path
+
+from src.config import get_settings
+from src.data.corpus import DOCUMENTS_DIR, colreg_rules, get_snapshot
+from src.services.shard_cache import ShardCache
+
+TRANSLATIONS_DIR = Path(__file__).parent / "translations"
+
+# Fields a translation may override (structure like part and section stays shared)
+TRANSLATED_FIELDS = ("title", "summary", "content", "keywords")
+
+
+def translation_path(language: str) -> Path:
+    return TRANSLATIONS_DIR / f"rules_{language}.json"
+
+
+def available_languages() -> list[str]:
+    """English plus every language with a translation file."""
+    languages = ["en"]
+    if TRANSLATIONS_DIR.is_dir():
+        languages += sorted(p.stem.removeprefix("rules_") for p in TRANSLATIONS_DIR.glob("rules_*.json"))
+    return languages
+
+
+@lru_cache(maxsize=1)
+def document_paths() -> tuple[Path, ...]:
+    """Compiled document files, in name order (later documents win on id clashes)."""
+    if not DOCUMENTS_DIR.is_dir():
+        return ()
+    return tuple(sorted(DOCUMENTS_DIR.glob("*.json")))
+
+
+@lru_cache(maxsize=1)
+def _base_rules() -> Mapping[str, dict]:
+    if get_snapshot() is not None or not document_paths():
+        return colreg_rules()
+
+    rules = dict(colreg_rules())
+    for path in document_paths():
+        for rule_id, record in json.loads(path.read_text()).items():
+            rules[rule_id] = {**rules.get(rule_id, {"summary": "", "keywords": []}), **record}
+    return rules
+
+
+def _load_rules(language: str) -> Mapping[str, dict]:
+    base = _base_rules()
+    path = translation_path(language)
+    if language == "en" or not path.exists():
+        return base
+
+    translations = json.loads(path.read_text())
+    rules = {}
+    for rule_id, rule in base.items():
+        overrides = {k: v for k, v in translations.get(rule_id, {}).items() if k in TRANSLATED_FIELDS}
+        rules[rule_id] = {**rule, **overrides} if overrides else rule
+    return rules
+
+
+_store: ShardCache[Mapping[str, dict]] | None = None
+
+
+def get_rules(language: str = "en") -> Mapping[str, dict]:
+    """Rules for a language (English text for anything without a translation)."""
+    if language == "en":
+        return _base_rules()
+
+    global _store
+    if _store is None:
+        settings = get_settings()
+        _store = ShardCache("rules", _load_rules, settings.language_idle_seconds, pinned=[settings.default_language])
+    return _store.get(language)
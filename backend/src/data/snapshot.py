@@ -0,0 +1,226 @@
+"""
+Corpus Snapshot
+
+A versioned binary artifact built by scripts.build_snapshot that holds what
+the app otherwise builds from Python modules and the database:
+- rule records and their pre-rendered context sections
+- general info, the visual catalog and the pre-rendered catalog reference
+- the keyword fallback table (lowercased titles and keywords)
+- per language, the float32 chunk embedding matrix and its chunk records
+
+The file is memory-mapped read-only, so worker processes share its pages and
+opening it only parses a small JSON header. Strings are stored as tables
+(uint32 offsets + UTF-8 blob) and decoded one entry at a time on access;
+embedding matrices are numpy views of the mapping.
+
+Layout:
+    MAGIC | u32 header length | JSON header | sections (64-byte aligned)
+
+The header lists each section's offset, length and kind ("bytes", "strings"
+or "array" with dtype and shape) along with the corpus metadata.
+"""
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Iterator
+
+MAGIC = b"COLSNAP\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+KEYWORD_SEPARATOR = "\x1f"
+
+DEFAULT_SNAPSHOT_PATH = Path(__file__).parent / "corpus.snapshot"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or of another format version."""
+
+
+def encode_strings(values: list[str]) -> bytes:
+    """Encode strings as a table: count + 1 uint32 end offsets, then the UTF-8 blob."""
+    blobs = [value.encode() for value in values]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    return struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(blobs)
+
+
+class StringTable:
+    """Read-only sequence of strings decoded lazily from an encoded table."""
+
+    def __init__(self, buffer: memoryview, count: int):
+        self._offsets = buffer[:4 * (count + 1)].cast("I")
+        self._blob = buffer[4 * (count + 1):]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(len(self)))
+
+
+class SnapshotRules(Mapping):
+    """rule_id -> rule record, each record decoded (once) on first access."""
+
+    def __init__(self, positions: dict[str, int], records: StringTable):
+        self._positions = positions
+        self._records = records
+        self._decoded: dict[str, dict] = {}
+
+    def __getitem__(self, rule_id: str) -> dict:
+        record = self._decoded.get(rule_id)
+        if record is None:
+            record = json.loads(self._records[self._positions[rule_id]])
+            self._decoded[rule_id] = record
+        return record
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, rule_id: object) -> bool:
+        return rule_id in self._positions
+
+
+class Snapshot:
+    """Memory-mapped corpus snapshot."""
+
+    def __init__(self, path: Path):
+        try:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot map corpus snapshot {path}: {e}") from e
+
+        self.path = path
+        self._buffer = memoryview(self._mmap)
+        if self._buffer[:len(MAGIC)] != MAGIC:
+            raise SnapshotError(f"{path} is not a corpus snapshot")
+        (header_length,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header: dict[str, Any] = json.loads(self._buffer[start:start + header_length].tobytes())
+        if self.header.get("format_version") != FORMAT_VERSION:
+            raise SnapshotError(
+                f"{path} has format version {self.header.get('format_version')}, expected {FORMAT_VERSION}; "
+                "rebuild it with scripts.build_snapshot"
+            )
+
+    @property
+    def corpus_version(self) -> str:
+        return self.header["corpus_version"]
+
+    def _section(self, name: str) -> memoryview:
+        section = self.header["sections"][name]
+        return self._buffer[section["offset"]:section["offset"] + section["length"]]
+
+    def strings(self, name: str) -> StringTable:
+        return StringTable(self._section(name), self.header["sections"][name]["count"])
+
+    def json(self, name: str) -> Any:
+        return json.loads(self._section(name).tobytes())
+
+    def text(self, name: str) -> str:
+        return str(self._section(name), "utf-8")
+
+    def array(self, name: str):
+        """numpy view of an array section (no copy; read-only)."""
+        import numpy as np
+
+        section = self.header["sections"][name]
+        return np.frombuffer(
+            self._mmap, dtype=section["dtype"], count=section["length"] // np.dtype(section["dtype"]).itemsize,
+            offset=section["offset"],
+        ).reshape(section["shape"])
+
+    @cached_property
+    def _rule_positions(self) -> dict[str, int]:
+        return {rule_id: i for i, rule_id in enumerate(self.strings("rule_ids"))}
+
+    @cached_property
+    def rules(self) -> SnapshotRules:
+        return SnapshotRules(self._rule_positions, self.strings("rule_records"))
+
+    def rule_section(self, rule_id: str) -> str:
+        """Pre-rendered context section of a rule."""
+        return self.strings("rule_sections")[self._rule_positions[rule_id]]
+
+    def keyword_table(self) -> list[tuple[str, str, list[str]]]:
+        """(rule_id, lowercased title, lowercased keywords) for every rule."""
+        table = []
+        for rule_id, entry in zip(self._rule_positions, self.strings("keyword_table")):
+            title, *keywords = entry.split(KEYWORD_SEPARATOR)
+            table.append((rule_id, title, keywords))
+        return table
+
+    def embedding_languages(self) -> list[str]:
+        return list(self.header.get("embeddings", {}))
+
+    def embeddings(self, language: str) -> tuple[Any, list[dict], dict] | None:
+        """(float32 matrix, chunk records, embedding index info) for a language, if included."""
+        info = self.header.get("embeddings", {}).get(language)
+        if info is None:
+            return None
+        records = [json.loads(record) for record in self.strings(f"chunks/{language}")]
+        return self.array(f"embeddings/{language}"), records, info["index"]
+
+
+def write_snapshot(path: Path, sections: dict[str, Any], metadata: dict[str, Any]) -> None:
+    """Write a snapshot atomically (readers of the old file keep their mapping).
+
+    Args:
+        path: Output file
+        sections: name -> bytes, str, list[str] (string table) or numpy array
+        metadata: Extra header fields (corpus_version, embeddings, ...)
+    """
+    import numpy as np
+
+    entries = []
+    for name, value in sections.items():
+        if isinstance(value, np.ndarray):
+            value = np.ascontiguousarray(value)
+            entries.append((name, {"kind": "array", "dtype": value.dtype.str, "shape": list(value.shape)}, value.tobytes()))
+        elif isinstance(value, list):
+            entries.append((name, {"kind": "strings", "count": len(value)}, encode_strings(value)))
+        elif isinstance(value, str):
+            entries.append((name, {"kind": "bytes"}, value.encode()))
+        else:
+            entries.append((name, {"kind": "bytes"}, bytes(value)))
+
+    def header_bytes(offset: int) -> tuple[bytes, dict]:
+        table = {}
+        for name, info, data in entries:
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            table[name] = {**info, "offset": offset, "length": len(data)}
+            offset += len(data)
+        header = {"format_version": FORMAT_VERSION, **metadata, "sections": table}
+        return json.dumps(header).encode(), table
+
+    # Section offsets depend on the header size, so iterate until it is stable
+    prefix_length = len(MAGIC) + 4
+    header, table = header_bytes(prefix_length)
+    while True:
+        start = -(-(prefix_length + len(header)) // ALIGNMENT) * ALIGNMENT
+        new_header, table = header_bytes(start)
+        if len(new_header) == len(header):
+            header = new_header
+            break
+        header = new_header
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for name, _info, data in entries:
+            f.write(b"\x00" * (table[name]["offset"] - f.tell()))
+            f.write(data)
+    os.replace(tmp, path)
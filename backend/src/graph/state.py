@@ -1,5 +1,6 @@
 from typing import TypedDict
 from src.models.extraction import RuleMetadata
+from src.services.batch_cache import BatchCache
 
 
 class GraphState(TypedDict):
@@ -7,7 +8,11 @@ class GraphState(TypedDict):
 
     # Input
     query: str
-    session_id: str
+    session_id: str | None  # None for stateless requests (no history is loaded)
+    deadline: float | None  # time.monotonic() by which prep must finish (None = no budget)
+    language: str  # Retrieval and rule text language (see services.language.resolve_language)
+    skip_classifier: bool  # Treat the query as valid without the classifier call (trusted batch callers)
+    batch_cache: BatchCache | None  # Embeddings, extractions and contexts shared across a /chat/batch request
 
     # Chat history (plain dicts for LiteLLM compatibility)
     chat_history: list[dict]
@@ -18,6 +23,7 @@ class GraphState(TypedDict):
     # Rule extraction - LLM-based
     extracted_rules: list[str]  # e.g., ["rule_14", "rule_15", "annex_i"]
     include_general: bool  # Whether to include general COLREG overview
+    query_type: str | None  # "specific", "general", "comparison" or "scenario" (None from keyword fallback)
     extraction_method: str  # "llm" or "fallback" (for logging/debugging)
 
     # Rule extraction - RAG-based (parallel retrieval)
@@ -29,6 +35,7 @@ class GraphState(TypedDict):
 
     # Output
     response: str
+    visuals: list[dict]  # Visual events parsed from the response (non-streaming path)
     suggested_questions: list[str]  # Follow-up questions for user
 
 
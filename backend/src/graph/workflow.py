@@ -1,14 +1,25 @@
-"""LangGraph workflow for the COLREG assistant."""
+"""LangGraph workflow for the COLREG assistant.
+
+LangGraph is imported when a graph is first built, not at module import, to
+keep it off the serverless cold-start path.
+"""
+
+from functools import lru_cache
 
-from langgraph.graph import StateGraph, START, END
 from src.graph.state import GraphState
+from src.config import get_settings
+from src.services.metrics import instrument_node
 from src.graph.nodes import (
     preprocess_node,
     fallback_node,
     load_history_node,
     extract_rules_node,
+    classify_extract_node,
     rag_retrieval_node,
     compile_context_node,
+    generate_node,
+    generate_suggestions_node,
+    save_history_node,
 )
 
 
@@ -19,6 +30,33 @@ def route_after_preprocess(state: GraphState) -> str:
     return "fallback"
 
 
+def route_after_classify_extract(state: GraphState) -> str:
+    """Route based on the combined call's validity verdict."""
+    if state.get("is_valid_query", True):
+        return "rag_retrieval"
+    return "fallback"
+
+
+def route_after_prep(state: GraphState) -> str:
+    """Skip generation when prep already produced the (fallback) response."""
+    if state.get("response"):
+        return "end"
+    return "generate"
+
+
+def route_after_suggestions(state: GraphState) -> str:
+    """Save the exchange only for requests with a session."""
+    if state.get("session_id"):
+        return "save_history"
+    return "end"
+
+
+@lru_cache(maxsize=1)
+def get_prep_graph():
+    """The compiled prep graph, built on first use and shared by all requests."""
+    return create_prep_graph()
+
+
 def create_prep_graph():
     """Create preparation-only graph for streaming architecture.
 
@@ -32,17 +70,26 @@ def create_prep_graph():
 
     Results are merged (union + dedupe) in compile_context_node.
 
+    With prep_mode="combined", validation and extraction share one LLM call:
+        START -> load_history -> classify_extract -> (valid) -> rag_retrieval -> compile_context -> END
+                                                  -> (invalid) -> fallback -> END
+
     Response generation and suggestions are handled separately in the endpoint for true streaming.
     """
+    if get_settings().prep_mode == "combined":
+        return _create_combined_prep_graph()
+
+    from langgraph.graph import StateGraph, START, END
+
     graph = StateGraph(GraphState)
 
-    # Add nodes
-    graph.add_node("preprocess", preprocess_node)
-    graph.add_node("fallback", fallback_node)
-    graph.add_node("load_history", load_history_node)
-    graph.add_node("extract_rules", extract_rules_node)
-    graph.add_node("rag_retrieval", rag_retrieval_node)
-    graph.add_node("compile_context", compile_context_node)
+    # Add nodes (each timed in the colreg_graph_node_duration_seconds histogram)
+    graph.add_node("preprocess", instrument_node("preprocess", preprocess_node))
+    graph.add_node("fallback", instrument_node("fallback", fallback_node))
+    graph.add_node("load_history", instrument_node("load_history", load_history_node))
+    graph.add_node("extract_rules", instrument_node("extract_rules", extract_rules_node))
+    graph.add_node("rag_retrieval", instrument_node("rag_retrieval", rag_retrieval_node))
+    graph.add_node("compile_context", instrument_node("compile_context", compile_context_node))
 
     # Define edges
     graph.add_edge(START, "preprocess")
@@ -54,3 +101,60 @@ def create_prep_graph():
     graph.add_edge("compile_context", END)
 
     return graph.compile()
+
+
+def _create_combined_prep_graph():
+    """Prep graph with a single classify + extract LLM call (prep_mode="combined")."""
+    from langgraph.graph import StateGraph, START, END
+
+    graph = StateGraph(GraphState)
+
+    graph.add_node("load_history", instrument_node("load_history", load_history_node))
+    graph.add_node("classify_extract", instrument_node("classify_extract", classify_extract_node))
+    graph.add_node("fallback", instrument_node("fallback", fallback_node))
+    graph.add_node("rag_retrieval", instrument_node("rag_retrieval", rag_retrieval_node))
+    graph.add_node("compile_context", instrument_node("compile_context", compile_context_node))
+
+    graph.add_edge(START, "load_history")
+    graph.add_edge("load_history", "classify_extract")
+    graph.add_conditional_edges("classify_extract", route_after_classify_extract)
+    graph.add_edge("fallback", END)
+    graph.add_edge("rag_retrieval", "compile_context")
+    graph.add_edge("compile_context", END)
+
+    return graph.compile()
+
+
+@lru_cache(maxsize=1)
+def get_complete_graph():
+    """The compiled full graph (prep plus generation), built on first use."""
+    return create_complete_graph()
+
+
+def create_complete_graph():
+    """Create the full non-streaming graph used by /chat/complete.
+
+    Flow:
+        START -> prep -> (valid) -> generate -> suggestions -> (session) -> save_history -> END
+                                                            -> (stateless) -> END
+                      -> (invalid) -> END
+
+    The prep graph (either prep_mode) runs as a subgraph, so both endpoints
+    share the same preparation.
+    """
+    from langgraph.graph import StateGraph, START, END
+
+    graph = StateGraph(GraphState)
+
+    graph.add_node("prep", get_prep_graph())
+    graph.add_node("generate", instrument_node("generate", generate_node))
+    graph.add_node("suggestions", instrument_node("suggestions", generate_suggestions_node))
+    graph.add_node("save_history", instrument_node("save_history", save_history_node))
+
+    graph.add_edge(START, "prep")
+    graph.add_conditional_edges("prep", route_after_prep, {"generate": "generate", "end": END})
+    graph.add_edge("generate", "suggestions")
+    graph.add_conditional_edges("suggestions", route_after_suggestions, {"save_history": "save_history", "end": END})
+    graph.add_edge("save_history", END)
+
+    return graph.compile()
@@ -5,6 +5,8 @@ from loguru import logger
 import sys
 from src.api.routes import router
 from src.config import get_settings
+from src.services.postgres import close_pool
+from src.services.warmup import start_warmup
 
 
 settings = get_settings()
@@ -21,11 +23,15 @@ async def lifespan(app: FastAPI):
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>",
     )
     logger.info("Starting COLREG Assistant API")
+    warmup = start_warmup()
 
     yield
 
     # Shutdown
     logger.info("Shutting down COLREG Assistant API")
+    if warmup is not None and not warmup.done():
+        warmup.cancel()  # The worker thread finishes its current step on its own
+    close_pool()
 
 
 app = FastAPI(
@@ -0,0 +1,110 @@
+"""In-memory cache of complete answers for /chat/complete.
+
+Stateless completions (no session history) depend only on the question, its
+language, the model answering it and the rule corpus, so their JSON payload
+is cached under a key derived from those. Each entry carries an ETag (a hash of the payload): a client that
+sends it back in If-None-Match gets 304 Not Modified, and any client asking
+the same question gets the cached answer without a graph run. Entries are
+evicted LRU-first and after a TTL.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from src.config import get_settings
+from src.data.corpus import corpus_version
+from src.services.llm import get_route
+
+
+@dataclass
+class CachedAnswer:
+    """A cached completion payload and its entity tag."""
+    payload: dict
+    etag: str
+    created: float
+
+
+def answer_key(message: str, language: str) -> str:
+    """Cache key for a stateless question (whitespace and case don't matter).
+
+    Includes the routed generate model and the corpus version, so rerouting
+    answers or deploying edited rules doesn't serve stale answers.
+    """
+    normalized = " ".join(message.lower().split())
+    parts = [normalized, language, get_route("generate").model, corpus_version()]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def make_etag(payload: dict) -> str:
+    """Strong entity tag for a completion payload."""
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches the entity tag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class AnswerCache:
+    """Thread-safe LRU cache of completion payloads with a TTL."""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedAnswer | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, payload: dict) -> CachedAnswer:
+        entry = CachedAnswer(payload=payload, etag=make_etag(payload), created=time.monotonic())
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_cache: AnswerCache | None = None
+
+
+def get_answer_cache() -> AnswerCache | None:
+    """Get or create the process-wide answer cache (None when disabled)."""
+    global _cache
+    settings = get_settings()
+    if not settings.answer_cache_enabled:
+        return None
+    if _cache is None:
+        _cache = AnswerCache(
+            max_entries=settings.answer_cache_max_entries,
+            ttl_seconds=settings.answer_cache_ttl_seconds,
+        )
+    return _cache
@@ -0,0 +1,53 @@
+"""Background event loop for driving async clients from synchronous code.
+
+Graph nodes and the history helpers are synchronous (LangGraph runs sync nodes
+in worker threads), while async clients such as asyncpg pools are bound to the
+event loop they were created on. A single daemon thread owns that loop for the
+lifetime of the process so every caller shares the same clients.
+"""
+
+import asyncio
+import threading
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Get or start the shared background event loop (lazy initialization)."""
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever,
+                name="colreg-background-loop",
+                daemon=True,
+            )
+            thread.start()
+            _loop = loop
+    return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+    """Run a coroutine on the background loop and block until it completes.
+
+    Args:
+        coro: Coroutine to execute
+        timeout: Optional timeout in seconds
+
+    Returns:
+        The coroutine's result
+
+    Raises:
+        TimeoutError: If the coroutine doesn't finish within timeout
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
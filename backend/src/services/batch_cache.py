@@ -0,0 +1,58 @@
+"""Caches shared by the questions of one /chat/batch request.
+
+A batch passes one BatchCache through the prep graph state of each of its
+questions. Query embeddings are computed up front in a single embed_texts
+call; rule extractions and compiled contexts are computed once per distinct
+key, so repeated questions (common in exam sets) and questions that resolve
+to the same rules share the work. The cache lives only as long as the batch.
+"""
+
+import threading
+from typing import Any, Callable, Hashable
+
+from loguru import logger
+
+
+class BatchCache:
+    """Thread-safe compute-once caches for a batch (prep nodes run in worker threads)."""
+
+    def __init__(self, embeddings: dict[str, list[float]] | None = None):
+        """
+        Args:
+            embeddings: Precomputed query embeddings by (stripped) query text
+        """
+        self.embeddings = embeddings or {}
+        self.hits: dict[str, int] = {}
+
+        self._values: dict[tuple[str, Hashable], Any] = {}
+        self._lock = threading.Lock()
+        self._key_locks: dict[tuple[str, Hashable], threading.Lock] = {}
+
+    def embedding(self, text: str) -> list[float] | None:
+        """Precomputed embedding for a query, if the batch has one."""
+        return self.embeddings.get(text.strip())
+
+    def get_or_compute(self, kind: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for (kind, key), computing it once.
+
+        Concurrent callers with the same key wait for the first computation
+        instead of repeating it (e.g. the same LLM extraction call). A
+        computation that raises is not cached.
+        """
+        cache_key = (kind, key)
+        with self._lock:
+            if cache_key in self._values:
+                self.hits[kind] = self.hits.get(kind, 0) + 1
+                return self._values[cache_key]
+            key_lock = self._key_locks.setdefault(cache_key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if cache_key in self._values:
+                    self.hits[kind] = self.hits.get(kind, 0) + 1
+                    return self._values[cache_key]
+            value = compute()
+            with self._lock:
+                self._values[cache_key] = value
+        logger.debug(f"Batch cache computed {kind}")
+        return value
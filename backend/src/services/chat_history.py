@@ -1,16 +1,25 @@
-from datetime import datetime
-from supabase import create_client, Client
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 from loguru import logger
 from src.config import get_settings
+from src.services import postgres
+from src.services.metrics import track_upstream
+from src.services.resilience import database_breaker
+from src.services.session_cache import get_session_cache
 
+if TYPE_CHECKING:
+    from supabase import Client
 
-_supabase_client: Client | None = None
 
+_supabase_client: "Client | None" = None
 
-def get_supabase() -> Client:
+
+def get_supabase() -> "Client":
     """Get or create the Supabase client (lazy initialization for serverless)."""
     global _supabase_client
     if _supabase_client is None:
+        from supabase import create_client
+
         settings = get_settings()
         _supabase_client = create_client(settings.supabase_url, settings.supabase_key)
     return _supabase_client
@@ -20,49 +29,127 @@ def save_message(session_id: str, role: str, content: str):
     """
     Save a message to chat history in Supabase.
 
+    Also appends the message to the in-memory session cache (write-through).
+
     Args:
         session_id: Unique session identifier
         role: Message role ('user' or 'assistant')
         content: Message content
     """
     try:
-        data = {
-            "session_id": session_id,
-            "role": role,
-            "content": content,
-            "timestamp": datetime.utcnow().isoformat(),
-        }
-
-        get_supabase().table("chat_history").insert(data).execute()
+        timestamp = datetime.utcnow()
+        backend = get_settings().db_backend
+        with database_breaker(backend), track_upstream(backend, "save_message"):
+            if backend == "postgres":
+                postgres.insert_message(session_id, role, content, timestamp.replace(tzinfo=timezone.utc))
+            else:
+                data = {
+                    "session_id": session_id,
+                    "role": role,
+                    "content": content,
+                    "timestamp": timestamp.isoformat(),
+                }
+
+                get_supabase().table("chat_history").insert(data).execute()
         logger.info(f"Saved {role} message for session {session_id}")
 
+        cache = get_session_cache()
+        if cache is not None:
+            cache.append(session_id, {"role": role, "content": content, "timestamp": timestamp.isoformat()})
+
     except Exception as e:
         # Don't fail the response if history saving fails
         logger.error(f"Error saving message: {e}")
 
 
-def load_session_history(session_id: str, limit: int = 10) -> list[dict]:
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO timestamp into a naive UTC datetime for comparisons."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def load_messages_between(session_id: str, after: str | None, before: str, limit: int) -> list[dict]:
     """
-    Load chat history for a session from Supabase.
+    Load the messages of a session with after < timestamp < before from the store.
+
+    Used to fold turns into the rolling summary, so it bypasses the session
+    cache (which only holds the most recent messages).
 
     Args:
         session_id: Unique session identifier
-        limit: Maximum number of messages to load
+        after: Exclusive lower bound (ISO timestamp), or None for the start of the session
+        before: Exclusive upper bound (ISO timestamp)
+        limit: Maximum number of (oldest) messages to load
 
     Returns:
         List of messages ordered by timestamp
     """
-    try:
+    backend = get_settings().db_backend
+    with database_breaker(backend), track_upstream(backend, "load_history"):
+        if backend == "postgres":
+            as_utc = lambda value: parse_timestamp(value).replace(tzinfo=timezone.utc)
+            return postgres.fetch_history_range(
+                session_id, as_utc(after) if after else None, as_utc(before), limit
+            )
+
+        query = get_supabase().table("chat_history").select("role, content, timestamp").eq("session_id", session_id)
+        if after:
+            query = query.gt("timestamp", after)
+        response = query.lt("timestamp", before).order("timestamp").limit(limit).execute()
+    return response.data
+
+
+def _fetch_session_history(session_id: str, limit: int) -> list[dict]:
+    """Fetch the most recent messages for a session from the store."""
+    backend = get_settings().db_backend
+    with database_breaker(backend), track_upstream(backend, "load_history"):
+        if backend == "postgres":
+            return postgres.fetch_session_history(session_id, limit)
+
         response = (
             get_supabase().table("chat_history")
             .select("role, content, timestamp")
             .eq("session_id", session_id)
-            .order("timestamp", desc=False)
+            .order("timestamp", desc=True)
             .limit(limit)
             .execute()
         )
+    # Newest-first from the query, return oldest-first
+    return list(reversed(response.data))
+
+
+def load_session_history(session_id: str, limit: int = 10) -> list[dict]:
+    """
+    Load recent chat history for a session.
+
+    Served from the in-memory session cache when it holds enough messages,
+    otherwise read from Supabase and used to hydrate the cache.
+
+    Args:
+        session_id: Unique session identifier
+        limit: Maximum number of (most recent) messages to load
+
+    Returns:
+        List of messages ordered by timestamp
+    """
+    cache = get_session_cache()
+    if cache is not None:
+        cached = cache.get(session_id, limit)
+        if cached is not None:
+            logger.info(f"Loaded {len(cached)} cached messages for session {session_id}")
+            return cached
+
+    try:
+        # Fetch enough to fill the cache entry, not just this caller's limit
+        fetch_limit = max(limit, cache.max_messages) if cache is not None else limit
+        messages = _fetch_session_history(session_id, fetch_limit)
+
+        if cache is not None:
+            cache.put(session_id, messages, complete=len(messages) < fetch_limit)
+            messages = messages[-limit:]
 
-        messages = response.data
         logger.info(f"Loaded {len(messages)} messages for session {session_id}")
         return messages
 
@@ -0,0 +1,104 @@
+"""Request deadlines and per-stage latency budgets.
+
+Each /chat request gets an absolute deadline (request_budget_seconds from
+arrival). A prep stage may use the smaller of its own budget and whatever is
+left of the request budget; run_with_deadline runs the stage's blocking call
+in a worker thread and stops waiting once that time is up, so the caller can
+fall back instead of blocking the response. The abandoned call keeps running
+in its thread until the upstream returns or its own timeout fires.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, TypeVar
+
+from loguru import logger
+from src.config import get_settings
+from src.services.metrics import BUDGET_OVERRUNS
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+# Settings attribute holding each stage's budget
+STAGE_BUDGETS = {
+    "classifier": "classifier_budget_seconds",
+    "extraction": "extraction_budget_seconds",
+    "rag": "rag_budget_seconds",
+}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage does not finish within its budget."""
+
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"{stage} exceeded its {timeout:.2f}s budget")
+        self.stage = stage
+        self.timeout = timeout
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get or create the worker pool for deadline-bound calls (lazy initialization)."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_settings().deadline_max_workers,
+                thread_name_prefix="colreg-deadline",
+            )
+    return _executor
+
+
+def request_deadline() -> float | None:
+    """Absolute deadline (time.monotonic) for a request starting now, or None if disabled."""
+    budget = get_settings().request_budget_seconds
+    return time.monotonic() + budget if budget > 0 else None
+
+
+def stage_timeout(stage: str, deadline: float | None) -> float | None:
+    """Time a stage may take: its own budget, capped by what is left of the request.
+
+    Args:
+        stage: Stage name (a key of STAGE_BUDGETS)
+        deadline: Request deadline from request_deadline(), or None
+
+    Returns:
+        Seconds available (0 if the request is already over budget), or None if deadlines are disabled
+    """
+    settings = get_settings()
+    if settings.request_budget_seconds <= 0:
+        return None
+    timeout = getattr(settings, STAGE_BUDGETS[stage])
+    if deadline is not None:
+        timeout = min(timeout, deadline - time.monotonic())
+    return max(timeout, 0.0)
+
+
+def run_with_deadline(stage: str, timeout: float | None, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run func(*args, **kwargs), giving up after timeout seconds.
+
+    Args:
+        stage: Stage name (used for logging and the overrun metric)
+        timeout: Seconds to wait, or None to call func directly without a limit
+
+    Returns:
+        func's result
+
+    Raises:
+        DeadlineExceeded: If func doesn't finish in time (counted in colreg_budget_overruns_total)
+    """
+    if timeout is None:
+        return func(*args, **kwargs)
+
+    if timeout > 0:
+        future = _get_executor().submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+
+    logger.warning(f"{stage} stage exceeded its {timeout:.2f}s budget, degrading")
+    BUDGET_OVERRUNS.inc(stage=stage)
+    raise DeadlineExceeded(stage, timeout)
@@ -0,0 +1,169 @@
+"""Embedding backends selected by EMBEDDING_BACKEND.
+
+- openai: OpenAI embeddings API (text-embedding-3-large by default)
+- hashing: deterministic signed feature hashing of word tokens; no network or
+  model files, for tests, benchmarks and offline development
+- onnx: a local sentence-embedding model (e.g. all-MiniLM-L6-v2 exported to
+  ONNX) run on CPU with onnxruntime; needs the "local-embeddings" extra
+
+Vectors from different backends, models or dimensions are not comparable, so
+each backend describes the index it produces (index_info) and ingestion
+records it next to the stored vectors.
+"""
+
+import hashlib
+import math
+import re
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from src.config import get_settings
+from src.services.metrics import track_upstream
+from src.services.resilience import get_breaker
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+# Initialize OpenAI client
+_client: "OpenAI | None" = None
+
+
+def get_openai_client() -> "OpenAI":
+    """Get or create OpenAI client (the SDK is imported on first use)."""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+
+        settings = get_settings()
+        _client = OpenAI(api_key=settings.openai_api_key)
+    return _client
+
+
+class EmbeddingBackend(ABC):
+    """Turns texts into embedding vectors."""
+
+    name: str = ""
+    batched: bool = True  # Whether concurrent single-text requests are worth micro-batching
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @abstractmethod
+    def embed(self, texts: list[str], dimensions: int) -> list[list[float]]:
+        """Embed non-empty texts, returning one vector per text in input order."""
+
+    def index_info(self, dimensions: int) -> dict:
+        """Identity of the vectors this backend produces (stored with the index)."""
+        return {"backend": self.name, "model": self.model, "dimensions": dimensions}
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """OpenAI embeddings API (text-embedding-3 models accept a `dimensions` parameter)."""
+
+    name = "openai"
+
+    def embed(self, texts: list[str], dimensions: int) -> list[list[float]]:
+        operation = "embed" if len(texts) == 1 else "embed_batch"
+        with get_breaker("embeddings"), track_upstream("embeddings", operation):
+            response = get_openai_client().embeddings.create(
+                model=self.model,
+                input=texts,
+                dimensions=dimensions,
+                encoding_format="float"
+            )
+        # Embeddings are returned in the same order as input
+        return [item.embedding for item in response.data]
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def hashed_embedding(text: str, dimensions: int = 1536) -> list[float]:
+    """Deterministic L2-normalised bag-of-words vector (signed feature hashing)."""
+    vector = [0.0] * dimensions
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """Signed feature hashing of word tokens.
+
+    Only captures word overlap, not meaning, but is free, instant and
+    deterministic, so retrieval behaves sensibly without any network access.
+    """
+
+    name = "hashing"
+    batched = False
+
+    def embed(self, texts: list[str], dimensions: int) -> list[list[float]]:
+        return [hashed_embedding(text, dimensions) for text in texts]
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """Local sentence-embedding model run with onnxruntime on CPU.
+
+    `model` is a directory holding model.onnx and tokenizer.json (a Hugging
+    Face sentence-transformers export). Token embeddings are mean-pooled over
+    the attention mask and L2-normalised; vectors longer than the requested
+    dimensions are truncated.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model: str, max_length: int = 256):
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=onnx needs the local-embeddings extra (uv sync --extra local-embeddings)"
+            ) from e
+
+        path = Path(model)
+        super().__init__(path.name)
+        self.tokenizer = Tokenizer.from_file(str(path / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+        self.session = onnxruntime.InferenceSession(str(path / "model.onnx"), providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def embed(self, texts: list[str], dimensions: int) -> list[list[float]]:
+        import numpy as np
+        from src.services.vector_index import truncate_embeddings
+
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        with track_upstream("embeddings", "onnx"):
+            token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return truncate_embeddings(pooled, dimensions).tolist()
+
+    def index_info(self, dimensions: int) -> dict:
+        # The model's own width caps the vector size
+        width = self.session.get_outputs()[0].shape[-1]
+        if isinstance(width, int):
+            dimensions = min(dimensions, width)
+        return super().index_info(dimensions)
+
+
+def create_embedding_backend(backend: str, model: str) -> EmbeddingBackend:
+    """Instantiate an embedding backend by name ("openai", "hashing" or "onnx")."""
+    if backend == "openai":
+        return OpenAIEmbeddingBackend(model)
+    if backend == "hashing":
+        return HashingEmbeddingBackend("hashing")
+    if backend == "onnx":
+        return OnnxEmbeddingBackend(model)
+    raise ValueError(f"Unknown embedding backend: {backend}")
@@ -0,0 +1,86 @@
+"""Micro-batching of concurrent single-text embedding requests.
+
+Under concurrency every /chat request embeds its own query. The batcher
+collects embed requests arriving within embedding_batch_max_wait_ms of each
+other (up to embedding_batch_max_size texts), sends them as one embeddings
+call and fans the vectors back out to the waiting callers. Fewer, larger
+requests cut per-request overhead and help stay under the provider's request
+rate limits at peak.
+
+Batches are assembled on the shared background loop; the blocking API call
+itself runs in the loop's default executor.
+"""
+
+import asyncio
+from typing import Callable
+
+from loguru import logger
+from src.services.background_loop import run_sync
+from src.services.metrics import EMBEDDING_BATCH_SIZE
+
+
+EmbedBatch = Callable[[list[str], int], list[list[float]]]
+
+
+class EmbeddingBatcher:
+    """Collects concurrent embedding requests into batched API calls."""
+
+    def __init__(self, send: EmbedBatch, max_batch_size: int, max_wait_ms: float):
+        """
+        Args:
+            send: Blocking batch embedding function (texts, dimensions) -> vectors in input order
+            max_batch_size: Flush as soon as this many requests are waiting
+            max_wait_ms: Flush this long after the first request of a batch arrives
+        """
+        self.send = send
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        # Per dimensions: waiting (text, future) pairs and the pending flush timer
+        self._pending: dict[int, list[tuple[str, asyncio.Future]]] = {}
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+
+    async def embed(self, text: str, dimensions: int) -> list[float]:
+        """Queue a text for the next batch and wait for its vector (call on the background loop)."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = dimensions
+        batch = self._pending.setdefault(key, [])
+        batch.append((text, future))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: int) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, [])
+        if batch:
+            asyncio.get_running_loop().create_task(self._send(key, batch))
+
+    async def _send(self, key: int, batch: list[tuple[str, asyncio.Future]]) -> None:
+        # Identical texts (e.g. retried queries) are embedded once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        logger.debug(f"Embedding batch of {len(texts)} texts ({len(batch)} requests)")
+
+        try:
+            vectors = await asyncio.get_running_loop().run_in_executor(None, self.send, texts, key)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():  # Callers that gave up have cancelled their future
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, vectors))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    def embed_sync(self, text: str, dimensions: int) -> list[float]:
+        """Blocking wrapper for synchronous callers (e.g. graph nodes in worker threads)."""
+        return run_sync(self.embed(text, dimensions))
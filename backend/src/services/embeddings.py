@@ -1,50 +1,78 @@
-"""Embedding service using OpenAI text-embedding-3-large."""
+"""Embedding service backed by the configured embedding backend.
+
+EMBEDDING_BACKEND selects OpenAI (text-embedding-3-large by default), a
+deterministic hashing embedder or a local ONNX model (see embedding_backends).
+Vectors default to 1536 dimensions; text-embedding-3 models are Matryoshka-trained,
+so EMBEDDING_DIMENSIONS can request shorter vectors (e.g. 512 or 256) directly.
+"""
 
-import math
-from openai import OpenAI
 from loguru import logger
 from src.config import get_settings
+from src.services.embedding_backends import EmbeddingBackend, create_embedding_backend
+from src.services.embedding_batcher import EmbeddingBatcher
 
 
-# Initialize OpenAI client
-_client: OpenAI | None = None
+_backend: EmbeddingBackend | None = None
 
 
-def get_openai_client() -> OpenAI:
-    """Get or create OpenAI client."""
-    global _client
-    if _client is None:
+def get_embedding_backend() -> EmbeddingBackend:
+    """Get or create the configured embedding backend."""
+    global _backend
+    if _backend is None:
         settings = get_settings()
-        _client = OpenAI(api_key=settings.openai_api_key)
-    return _client
+        _backend = create_embedding_backend(settings.embedding_backend, settings.embedding_model)
+        logger.info(f"Using {_backend.name} embedding backend ({_backend.model})")
+    return _backend
+
+
+def get_index_info() -> dict:
+    """Backend, model and dimensions of the vectors this process produces."""
+    return get_embedding_backend().index_info(get_settings().embedding_dimensions)
+
+
+_batcher: EmbeddingBatcher | None = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Get or create the shared embedding micro-batcher."""
+    global _batcher
+    if _batcher is None:
+        settings = get_settings()
+        _batcher = EmbeddingBatcher(
+            embed_texts,
+            max_batch_size=settings.embedding_batch_max_size,
+            max_wait_ms=settings.embedding_batch_max_wait_ms,
+        )
+    return _batcher
 
 
-def embed_text(text: str, model: str = "text-embedding-3-large") -> list[float]:
+def embed_text(text: str, dimensions: int | None = None) -> list[float]:
     """Embed a single text string.
 
+    With embedding_batch_enabled, concurrent calls are combined into one
+    embed_texts request by the micro-batcher (for backends that benefit).
+
     Args:
         text: The text to embed
-        model: The embedding model to use (default: text-embedding-3-large)
+        dimensions: Output dimensions (defaults to settings.embedding_dimensions, 1536)
 
     Returns:
-        List of floats representing the embedding vector (1536 dimensions)
+        List of floats representing the embedding vector
     """
-    client = get_openai_client()
-
     # Clean and truncate text if needed (model has 8191 token limit)
     text = text.strip()
     if not text:
         raise ValueError("Cannot embed empty text")
 
-    try:
-        response = client.embeddings.create(
-            model=model,
-            input=text,
-            dimensions=1536,
-            encoding_format="float"
-        )
-        embedding = response.data[0].embedding
+    settings = get_settings()
+    dimensions = dimensions or settings.embedding_dimensions
+    backend = get_embedding_backend()
 
+    if settings.embedding_batch_enabled and backend.batched:
+        return get_embedding_batcher().embed_sync(text, dimensions)
+
+    try:
+        embedding = backend.embed([text], dimensions)[0]
         logger.debug(f"Generated embedding with {len(embedding)} dimensions")
         return embedding
     except Exception as e:
@@ -52,32 +80,23 @@ def embed_text(text: str, model: str = "text-embedding-3-large") -> list[float]:
         raise
 
 
-def embed_texts(texts: list[str], model: str = "text-embedding-3-large") -> list[list[float]]:
-    """Embed multiple texts in a single API call (more efficient).
+def embed_texts(texts: list[str], dimensions: int | None = None) -> list[list[float]]:
+    """Embed multiple texts in a single backend call (more efficient).
 
     Args:
         texts: List of texts to embed
-        model: The embedding model to use
+        dimensions: Output dimensions (defaults to settings.embedding_dimensions, 1536)
 
     Returns:
         List of embedding vectors, one per input text
     """
-    client = get_openai_client()
-
     # Filter and clean texts
     cleaned_texts = [t.strip() for t in texts if t.strip()]
     if not cleaned_texts:
         raise ValueError("No valid texts to embed")
 
     try:
-        response = client.embeddings.create(
-            model=model,
-            input=cleaned_texts,
-            dimensions=1536,
-            encoding_format="float"
-        )
-        # Embeddings are returned in the same order as input
-        embeddings = [item.embedding for item in response.data]
+        embeddings = get_embedding_backend().embed(cleaned_texts, dimensions or get_settings().embedding_dimensions)
         logger.info(f"Generated {len(embeddings)} embeddings")
         return embeddings
     except Exception as e:
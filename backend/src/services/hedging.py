@@ -0,0 +1,162 @@
+"""Hedged LLM requests for small latency-sensitive calls.
+
+The latency of short classifier/extraction calls has a long tail. A hedged
+call starts the request and, if it hasn't completed within the call site's
+recent p<hedge_percentile> latency, fires a duplicate (optionally to
+hedge_model). Whichever finishes first wins and the other is cancelled, which
+closes its HTTP request.
+
+Hedges are rate limited per call site with a token bucket: every call earns
+hedge_max_ratio tokens (up to hedge_burst) and every hedge spends one, so
+hedges stay at or below that fraction of calls.
+
+Attempts run as asyncio tasks on the shared background loop, so a caller
+from a worker thread blocks only on the winning result.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+from src.config import get_settings
+from src.services.background_loop import run_sync
+from src.services.metrics import HEDGES
+
+
+class LatencyWindow:
+    """Rolling window of call latencies (seconds), as seen by the caller."""
+
+    def __init__(self, size: int):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile of the window (0.0 if empty)."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class HedgeBudget:
+    """Token bucket limiting hedges to a fraction of calls."""
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+
+    def deposit(self) -> None:
+        """Credit one call."""
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend a token for a hedge if one is available."""
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class CallSite:
+    """Latency history and hedge budget for one call site."""
+
+    def __init__(self, name: str):
+        settings = get_settings()
+        self.name = name
+        self.latencies = LatencyWindow(settings.hedge_window_size)
+        self.budget = HedgeBudget(settings.hedge_max_ratio, settings.hedge_burst)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the first attempt before hedging."""
+        settings = get_settings()
+        if len(self.latencies) < settings.hedge_min_samples:
+            return settings.hedge_initial_delay_ms / 1000
+        return max(self.latencies.percentile(settings.hedge_percentile), settings.hedge_min_delay_ms / 1000)
+
+
+# Only touched from the background loop, so no locking is needed
+_call_sites: dict[str, CallSite] = {}
+
+
+def get_call_site(name: str) -> CallSite:
+    """Get or create the state for a call site."""
+    if name not in _call_sites:
+        _call_sites[name] = CallSite(name)
+    return _call_sites[name]
+
+
+async def hedged_call(call_site: str, call: Callable[[str], Awaitable[Any]], model: str) -> Any:
+    """Run call(model), hedging with a duplicate if it is slower than usual.
+
+    Args:
+        call_site: Name used for latency tracking, the hedge budget and metrics
+        call: Coroutine factory taking the model to call
+        model: Model for the first attempt
+
+    Returns:
+        The first successful result
+
+    Raises:
+        The last error if every attempt fails
+    """
+    site = get_call_site(call_site)
+    site.budget.deposit()
+
+    # One sample per call, from the primary's start to the first success: a
+    # slow primary that loses the race still contributes the time it ran
+    start = time.perf_counter()
+    result = await _race(site, call, model)
+    site.latencies.add(time.perf_counter() - start)
+    return result
+
+
+async def _race(site: CallSite, call: Callable[[str], Awaitable[Any]], model: str) -> Any:
+    """Run the primary attempt and, if it is slow and the budget allows, a hedge; return the first success."""
+    settings = get_settings()
+    call_site = site.name
+    primary = asyncio.ensure_future(call(model))
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=site.hedge_delay())
+        if done:
+            return primary.result()
+
+        if not site.budget.try_acquire():
+            HEDGES.inc(call_site=call_site, outcome="throttled")
+            return await primary
+
+        hedge_model = settings.hedge_model or model
+        logger.debug(f"Hedging {call_site} call with {hedge_model}")
+        HEDGES.inc(call_site=call_site, outcome="fired")
+        hedge = asyncio.ensure_future(call(hedge_model))
+        tasks.add(hedge)
+
+        error: BaseException | None = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    HEDGES.inc(call_site=call_site, outcome="won" if task is hedge else "lost")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Cancel the losing attempt (or both, if the caller gave up)
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+def run_hedged(call_site: str, call: Callable[[str], Awaitable[Any]], model: str) -> Any:
+    """Blocking wrapper around hedged_call for synchronous callers."""
+    return run_sync(hedged_call(call_site, call, model))
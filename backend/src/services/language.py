@@ -0,0 +1,68 @@
+"""Request language resolution.
+
+An explicit language on the request wins. Otherwise the query is matched
+against short stopword lists of the supported languages; detection is skipped
+entirely when only one language is supported.
+"""
+
+import re
+
+from src.config import get_settings
+
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+STOPWORDS: dict[str, frozenset[str]] = {
+    "en": frozenset("the a an is are what which when who how do does should i my of to in on at and or with for vessel".split()),
+    "es": frozenset("el la los las un una es son que qué cuál cuándo cómo debo mi de del en y o con para por buque barco".split()),
+    "fr": frozenset("le la les un une est sont que quel quelle quand comment dois je mon de du des en et ou avec pour navire".split()),
+    "de": frozenset("der die das ein eine ist sind was welche wann wie muss ich mein von zu im auf und oder mit für schiff".split()),
+    "pt": frozenset("o a os as um uma é são que qual quando como devo meu de do da em e ou com para navio embarcação".split()),
+    "it": frozenset("il lo la gli le un una è sono che quale quando come devo mio di del in e o con per nave".split()),
+    "nl": frozenset("de het een is zijn wat welke wanneer hoe moet ik mijn van te in op en of met voor schip vaartuig".split()),
+}
+
+
+def normalize_language(language: str) -> str:
+    """Primary language subtag in lowercase ("es-ES" -> "es")."""
+    return language.strip().lower().replace("_", "-").split("-")[0]
+
+
+def detect_language(text: str, candidates: list[str]) -> str | None:
+    """Best-matching candidate language by stopword hits, or None if unclear.
+
+    Args:
+        text: Text to classify
+        candidates: Languages to choose between
+
+    Returns:
+        Language code with the most hits (at least two, and strictly more than any other)
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    scores = sorted(
+        ((sum(word in STOPWORDS[lang] for word in words), lang) for lang in candidates if lang in STOPWORDS),
+        reverse=True,
+    )
+    if not scores or scores[0][0] < 2 or (len(scores) > 1 and scores[0][0] == scores[1][0]):
+        return None
+    return scores[0][1]
+
+
+def resolve_language(requested: str | None, text: str) -> str:
+    """Language to retrieve and answer in for a request.
+
+    Args:
+        requested: Language from the request, if any (e.g. "es" or "es-ES")
+        text: The user's message (used for detection)
+
+    Returns:
+        A supported language code (default_language if none matches)
+    """
+    settings = get_settings()
+    supported = settings.supported_languages
+    if requested:
+        language = normalize_language(requested)
+        return language if language in supported else settings.default_language
+    if len(supported) <= 1:
+        return settings.default_language
+    return detect_language(text, supported) or settings.default_language
@@ -3,21 +3,120 @@
 Supports OpenAI, Anthropic, Google, and other providers.
 """
 
+import time
+from functools import lru_cache
 from typing import AsyncGenerator
-import litellm
 from pydantic import BaseModel
 from loguru import logger
 from src.config import get_settings
+from src.services.hedging import run_hedged
+from src.services.metrics import track_upstream
+from src.services.resilience import CircuitOpenError, backoff_delay, get_breaker
 
-# Configure LiteLLM
-litellm.set_verbose = False
+@lru_cache(maxsize=1)
+def get_litellm():
+    """Import and configure LiteLLM on first use (its import is most of the app's cold start)."""
+    import litellm
+
+    litellm.set_verbose = False
+    return litellm
+
+
+class ModelRoute(BaseModel):
+    """Model and sampling settings for one LLM call site."""
+
+    model: str
+    max_tokens: int | None = None
+    temperature: float | None = None
+    fallbacks: list[str] = []  # Models tried in order if the primary fails or its circuit is open
+
+
+def default_routes() -> dict[str, ModelRoute]:
+    """Built-in routing table: fast model for the small calls, main model for answers."""
+    settings = get_settings()
+    return {
+        "classify": ModelRoute(model=settings.classifier_model, max_tokens=10, temperature=0.0),
+        "extract": ModelRoute(model=settings.classifier_model, temperature=0.3),
+        "generate": ModelRoute(model=settings.model_name, max_tokens=800, temperature=0.6),
+        "suggest": ModelRoute(model=settings.classifier_model, temperature=0.7),
+        "summarize": ModelRoute(model=settings.classifier_model, max_tokens=settings.summary_max_tokens, temperature=0.3),
+    }
+
+
+def get_route(call_site: str | None) -> ModelRoute:
+    """Resolve a call site's route: built-in defaults overridden by settings.model_routes.
+
+    Unknown or missing call sites use settings.model_name.
+    """
+    settings = get_settings()
+    route = default_routes().get(call_site) if call_site else None
+    if route is None:
+        route = ModelRoute(model=settings.model_name)
+    overrides = settings.model_routes.get(call_site, {}) if call_site else {}
+    return route.model_copy(update=overrides) if overrides else route
+
+
+def _models(route: ModelRoute, model: str | None) -> list[str]:
+    """Models to try in order (an explicit model replaces the route's primary)."""
+    models = [model or route.model] + route.fallbacks
+    return list(dict.fromkeys(models))
+
+
+def _completion(call_site: str | None, models: list[str], **kwargs):
+    """Call litellm.completion, falling back through `models` on failure.
+
+    Each model is called through its circuit breaker, so a model with an open
+    circuit is skipped immediately (with hedging, the primary and hedge model
+    each use their own). Calls are hedged for the call sites in
+    settings.hedge_call_sites.
+    """
+    settings = get_settings()
+    hedged = settings.hedging_enabled and call_site in settings.hedge_call_sites
+
+    async def attempt(m: str):
+        # Each hedged attempt counts against its own model's circuit
+        with get_breaker(f"llm:{m}"):
+            return await get_litellm().acompletion(**kwargs, model=m)
+
+    for index, model in enumerate(models):
+        try:
+            if hedged:
+                return run_hedged(call_site, attempt, model)
+            with get_breaker(f"llm:{model}"):
+                return get_litellm().completion(**kwargs, model=model)
+        except Exception as e:
+            if index == len(models) - 1:
+                raise
+            logger.warning(f"{model} failed for {call_site or 'default'} call, falling back to {models[index + 1]}: {e}")
+
+
+def _pick(value, route_value, default):
+    """First of: explicit argument, route setting, built-in default."""
+    if value is not None:
+        return value
+    return route_value if route_value is not None else default
+
+
+@lru_cache(maxsize=32)
+def _json_schema_format(response_schema: type[BaseModel]) -> dict:
+    """response_format for a Pydantic schema (built once per schema)."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response_schema.__name__,
+            "schema": response_schema.model_json_schema(),
+            "strict": True,
+        }
+    }
 
 
 def generate_sync_response(
     prompt: str,
     model: str | None = None,
-    temperature: float = 0.7,
-    max_tokens: int = 2048,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    timeout: float | None = None,
+    call_site: str | None = None,
 ) -> str:
     """
     Generate a synchronous response using LiteLLM.
@@ -25,23 +124,28 @@ def generate_sync_response(
 
     Args:
         prompt: The prompt string
-        model: Optional model name (defaults to settings.model_name)
-        temperature: Model temperature (0.0-1.0)
-        max_tokens: Maximum tokens to generate
+        model: Optional model name (defaults to the call site's route)
+        temperature: Model temperature (0.0-1.0, defaults to the route's or 0.7)
+        max_tokens: Maximum tokens to generate (defaults to the route's or 2048)
+        timeout: Optional request timeout in seconds
+        call_site: Routing table entry (e.g. "classify", "summarize"); None uses settings.model_name
 
     Returns:
         The generated text response
     """
-    settings = get_settings()
-    model_name = model or settings.model_name
-    logger.info(f"Generating sync response with {model_name}")
+    route = get_route(call_site)
+    models = _models(route, model)
+    logger.info(f"Generating sync response with {models[0]}")
 
-    response = litellm.completion(
-        model=model_name,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=temperature,
-        max_tokens=max_tokens,
-    )
+    with track_upstream("llm", "completion"):
+        response = _completion(
+            call_site,
+            models,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=_pick(temperature, route.temperature, 0.7),
+            max_tokens=_pick(max_tokens, route.max_tokens, 2048),
+            timeout=timeout,
+        )
 
     return response.choices[0].message.content or ""
 
@@ -51,43 +155,61 @@ def generate_structured_response(
     response_schema: type[BaseModel],
     model: str | None = None,
     max_retries: int = 3,
-    temperature: float = 0.3,
+    temperature: float | None = None,
+    timeout: float | None = None,
+    call_site: str | None = None,
 ) -> BaseModel | None:
     """
     Generate structured response using Pydantic schema.
-    Retries up to max_retries times on failure.
+    Retries up to max_retries times on failure, with jittered exponential backoff.
+    Gives up immediately if the model's circuit breaker is open.
 
     Args:
         prompt: The prompt string
         response_schema: Pydantic model class for response validation
-        model: Optional model name (defaults to settings.model_name)
+        model: Optional model name (defaults to the call site's route)
         max_retries: Number of retry attempts on failure
-        temperature: Model temperature (lower for more deterministic output)
+        temperature: Model temperature (defaults to the route's or 0.3; lower for more deterministic output)
+        timeout: Optional total time in seconds across all attempts (no retry starts after it)
+        call_site: Routing table entry (e.g. "extract", "suggest"); None uses settings.model_name
 
     Returns:
         Validated Pydantic model instance, or None if all retries failed
     """
-    settings = get_settings()
-    model_name = model or settings.model_name
-    logger.info(f"Generating structured response with {model_name}")
+    route = get_route(call_site)
+    models = _models(route, model)
+    logger.info(f"Generating structured response with {models[0]}")
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    response_format = _json_schema_format(response_schema)
 
     for attempt in range(max_retries):
+        if attempt > 0:
+            delay = backoff_delay(attempt - 1)
+            if deadline is not None:
+                delay = min(delay, max(deadline - time.monotonic(), 0.0))
+            time.sleep(delay)
+
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        if remaining is not None and remaining <= 0:
+            logger.warning(f"Structured output timed out after {attempt} attempts")
+            return None
         try:
-            response = litellm.completion(
-                model=model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature,
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": response_schema.__name__,
-                        "schema": response_schema.model_json_schema(),
-                        "strict": True,
-                    }
-                },
-            )
+            with track_upstream("llm", "structured"):
+                response = _completion(
+                    call_site,
+                    models,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=_pick(temperature, route.temperature, 0.3),
+                    max_tokens=route.max_tokens,
+                    timeout=remaining,
+                    response_format=response_format,
+                )
             json_str = response.choices[0].message.content
             return response_schema.model_validate_json(json_str)
+        except CircuitOpenError as e:
+            logger.warning(f"Structured output skipped: {e}")
+            return None
         except Exception as e:
             logger.warning(f"Structured output attempt {attempt + 1}/{max_retries} failed: {e}")
 
@@ -98,34 +220,49 @@ def generate_structured_response(
 async def generate_streaming_response(
     messages: list[dict],
     model: str | None = None,
-    temperature: float = 0.6,
-    max_tokens: int = 800,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    call_site: str = "generate",
 ) -> AsyncGenerator[str, None]:
     """
     Generate streaming response using LiteLLM.
     Supports OpenAI, Anthropic, Google, and other providers.
 
+    Falls back to the route's fallback models if a model fails before its first token.
+
     Args:
         messages: List of message dicts with 'role' and 'content'
-        model: Optional model name (defaults to settings.model_name)
-        temperature: Model temperature (0.0-1.0)
-        max_tokens: Maximum tokens to generate (default 800 for concise responses)
+        model: Optional model name (defaults to the call site's route)
+        temperature: Model temperature (0.0-1.0, defaults to the route's or 0.6)
+        max_tokens: Maximum tokens to generate (defaults to the route's or 800 for concise responses)
+        call_site: Routing table entry (default "generate")
 
     Yields:
         Text chunks from the streaming response
     """
-    settings = get_settings()
-    model_name = model or settings.model_name
-    logger.info(f"Generating streaming response with {model_name}")
-
-    response = await litellm.acompletion(
-        model=model_name,
-        messages=messages,
-        temperature=temperature,
-        max_tokens=max_tokens,
-        stream=True,
-    )
-
-    async for chunk in response:
-        if chunk.choices[0].delta.content:
-            yield chunk.choices[0].delta.content
+    route = get_route(call_site)
+    models = _models(route, model)
+
+    for index, model_name in enumerate(models):
+        logger.info(f"Generating streaming response with {model_name}")
+        started = False
+        try:
+            with get_breaker(f"llm:{model_name}"), track_upstream("llm", "stream"):
+                response = await get_litellm().acompletion(
+                    model=model_name,
+                    messages=messages,
+                    temperature=_pick(temperature, route.temperature, 0.6),
+                    max_tokens=_pick(max_tokens, route.max_tokens, 800),
+                    stream=True,
+                )
+
+                async for chunk in response:
+                    if chunk.choices[0].delta.content:
+                        started = True
+                        yield chunk.choices[0].delta.content
+            return
+        except Exception as e:
+            # Once text has been sent the answer can't be restarted on another model
+            if started or index == len(models) - 1:
+                raise
+            logger.warning(f"Streaming with {model_name} failed before the first token, falling back to {models[index + 1]}: {e}")
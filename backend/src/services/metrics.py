@@ -0,0 +1,303 @@
+"""Lightweight Prometheus metrics for request stages and upstream calls.
+
+A minimal in-process registry (counters and histograms with labels) rendered
+in the Prometheus text exposition format at /metrics. Kept dependency-free and
+cheap on the hot path: an observation is a dict lookup, a bisect and a few
+additions under a per-metric lock.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import AsyncGenerator, Callable, Iterator
+
+
+# Latency buckets in seconds (5ms .. 60s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonically increasing counter with optional labels."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increment the counter for the given label values."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Current value for the given label values."""
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0.0)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets and optional labels."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation for the given label values."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[key] = state
+            state[0][index] += 1
+            state[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Number of observations for the given label values."""
+        state = self._values.get(tuple(str(labels[name]) for name in self.labelnames))
+        return sum(state[0]) if state else 0
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+
+    def register(self, metric: Counter | Histogram) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            name = f"{metric.name}_total" if metric.type_name == "counter" else metric.name
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ===========================================
+# Metric definitions
+# ===========================================
+
+NODE_DURATION = Histogram(
+    "colreg_graph_node_duration_seconds",
+    "Duration of each LangGraph node",
+    ("node",),
+)
+UPSTREAM_DURATION = Histogram(
+    "colreg_upstream_request_duration_seconds",
+    "Duration of calls to upstream services (LLM, embeddings, Supabase)",
+    ("upstream", "operation"),
+)
+UPSTREAM_ERRORS = Counter(
+    "colreg_upstream_errors",
+    "Failed calls to upstream services",
+    ("upstream", "operation"),
+)
+STREAM_TTFT = Histogram(
+    "colreg_stream_time_to_first_token_seconds",
+    "Time from request receipt to the first streamed LLM token",
+)
+STREAM_DURATION = Histogram(
+    "colreg_stream_duration_seconds",
+    "Total duration of a streamed response",
+)
+STREAM_TOKENS_PER_SECOND = Histogram(
+    "colreg_stream_tokens_per_second",
+    "Streaming generation rate after the first token",
+    buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 300, 500),
+)
+SSE_FRAMES = Histogram(
+    "colreg_sse_frames_per_response",
+    "Number of SSE frames sent per /chat response",
+    buckets=(1, 5, 10, 25, 50, 100, 200, 400, 800),
+)
+EXTRACTIONS = Counter(
+    "colreg_rule_extractions",
+    "Rule extractions by method (llm or fallback)",
+    ("method",),
+)
+FALLBACKS = Counter(
+    "colreg_fallbacks",
+    "Degraded code paths taken (invalid query responses, classifier errors, keyword extraction)",
+    ("kind",),
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "colreg_embedding_batch_size",
+    "Texts per micro-batched embeddings request",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+HEDGES = Counter(
+    "colreg_llm_hedges",
+    "Hedged LLM requests by call site and outcome (fired, won, lost, throttled)",
+    ("call_site", "outcome"),
+)
+CIRCUIT_TRANSITIONS = Counter(
+    "colreg_circuit_transitions",
+    "Circuit breaker state changes by upstream and new state",
+    ("upstream", "state"),
+)
+CIRCUIT_REJECTIONS = Counter(
+    "colreg_circuit_rejections",
+    "Calls failed fast because the upstream's circuit was open",
+    ("upstream",),
+)
+ANSWER_CACHE = Counter(
+    "colreg_answer_cache",
+    "Answer cache lookups by /chat/complete (hit, miss, not_modified)",
+    ("outcome",),
+)
+BUDGET_OVERRUNS = Counter(
+    "colreg_budget_overruns",
+    "Prep stages that missed their latency budget and degraded",
+    ("stage",),
+)
+
+
+@contextmanager
+def track_upstream(upstream: str, operation: str) -> Iterator[None]:
+    """Time an upstream call and count it as an error if it raises.
+
+    Args:
+        upstream: Upstream service (e.g., "llm", "embeddings", "supabase")
+        operation: Operation name (e.g., "completion", "rpc")
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(upstream=upstream, operation=operation)
+        raise
+    finally:
+        UPSTREAM_DURATION.observe(time.perf_counter() - start, upstream=upstream, operation=operation)
+
+
+def instrument_node(name: str, func: Callable) -> Callable:
+    """Wrap a graph node (sync or async) to record its duration."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(state):
+            with NODE_DURATION.time(node=name):
+                return await func(state)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state):
+        with NODE_DURATION.time(node=name):
+            return func(state)
+    return wrapper
+
+
+class StreamStats:
+    """Collects per-response streaming metrics (TTFT, rate, duration, frames)."""
+
+    def __init__(self, started_at: float):
+        self.started_at = started_at
+        self.first_token_at: float | None = None
+        self.tokens = 0
+        self.frames = 0
+
+    async def count_tokens(self, stream: AsyncGenerator[str, None]) -> AsyncGenerator[str, None]:
+        """Pass an LLM token stream through, noting first-token time and token count."""
+        async for chunk in stream:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self.tokens += 1
+            yield chunk
+
+    def record(self) -> None:
+        """Record the collected stats once the response is complete."""
+        finished_at = time.perf_counter()
+        STREAM_DURATION.observe(finished_at - self.started_at)
+        SSE_FRAMES.observe(self.frames)
+        if self.first_token_at is not None:
+            STREAM_TTFT.observe(self.first_token_at - self.started_at)
+            generation_time = finished_at - self.first_token_at
+            if generation_time > 0 and self.tokens > 1:
+                STREAM_TOKENS_PER_SECOND.observe((self.tokens - 1) / generation_time)
+
+
+def render_metrics() -> str:
+    """Render the default registry."""
+    return REGISTRY.render()
@@ -0,0 +1,309 @@
+"""Direct Postgres backend using an asyncpg connection pool.
+
+Optional alternative to the Supabase (PostgREST) client for the hot-path
+queries: pgvector similarity search and chat history reads/writes. Skips the
+HTTP hop, sends query vectors in pgvector's binary wire format, and relies on
+asyncpg's per-connection statement cache so each query is prepared once per
+connection and then executed by name.
+
+Enabled with DB_BACKEND=postgres and DATABASE_URL. Requires the optional
+`asyncpg` dependency (`uv sync --extra postgres`).
+"""
+
+import asyncio
+import json
+import struct
+from datetime import datetime, timezone
+from typing import Any
+
+from loguru import logger
+
+from src.config import get_settings
+from src.services.background_loop import run_sync
+
+
+MATCH_RULE_EMBEDDINGS_SQL = """
+SELECT id, rule_id, subsection, content, similarity, metadata
+FROM match_rule_embeddings($1, $2, $3, $4)
+"""
+
+SELECT_RULE_EMBEDDINGS_SQL = """
+SELECT id, rule_id, subsection, content, embedding, metadata
+FROM rule_embeddings
+WHERE language = $1
+"""
+
+SELECT_INDEX_INFO_SQL = """
+SELECT metadata->'embedding_index'
+FROM rule_embeddings
+WHERE language = $1
+LIMIT 1
+"""
+
+INSERT_MESSAGE_SQL = """
+INSERT INTO chat_history (session_id, role, content, timestamp)
+VALUES ($1, $2, $3, $4::timestamptz)
+"""
+
+SELECT_HISTORY_SQL = """
+SELECT role, content, timestamp FROM (
+    SELECT role, content, timestamp
+    FROM chat_history
+    WHERE session_id = $1
+    ORDER BY timestamp DESC
+    LIMIT $2
+) recent
+ORDER BY timestamp ASC
+"""
+
+SELECT_HISTORY_RANGE_SQL = """
+SELECT role, content, timestamp
+FROM chat_history
+WHERE session_id = $1 AND ($2::timestamptz IS NULL OR timestamp > $2) AND timestamp < $3
+ORDER BY timestamp ASC
+LIMIT $4
+"""
+
+SELECT_SUMMARY_SQL = """
+SELECT summary, summarized_until
+FROM chat_summaries
+WHERE session_id = $1
+"""
+
+UPSERT_SUMMARY_SQL = """
+INSERT INTO chat_summaries (session_id, summary, summarized_until)
+VALUES ($1, $2, $3)
+ON CONFLICT (session_id) DO UPDATE
+SET summary = EXCLUDED.summary, summarized_until = EXCLUDED.summarized_until
+"""
+
+_VECTOR_SCHEMA_SQL = "SELECT typnamespace::regnamespace::text FROM pg_type WHERE typname = 'vector' LIMIT 1"
+
+
+_pool = None  # asyncpg.Pool, created lazily on the background loop
+_pool_lock = asyncio.Lock()
+
+
+def encode_vector(vector: list[float]) -> bytes:
+    """Encode a vector in pgvector's binary format (dim, unused, float32 values)."""
+    return struct.pack(f">HH{len(vector)}f", len(vector), 0, *vector)
+
+
+def decode_vector(data: bytes) -> list[float]:
+    """Decode a vector from pgvector's binary format."""
+    dim, _ = struct.unpack_from(">HH", data)
+    return list(struct.unpack_from(f">{dim}f", data, 4))
+
+
+async def _init_connection(conn) -> None:
+    """Register binary codecs on a new pool connection."""
+    # Supabase installs pgvector into the "extensions" schema, vanilla Postgres into "public"
+    vector_schema = await conn.fetchval(_VECTOR_SCHEMA_SQL) or "public"
+    await conn.set_type_codec(
+        "vector",
+        schema=vector_schema,
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary",
+    )
+    await conn.set_type_codec(
+        "jsonb",
+        schema="pg_catalog",
+        encoder=json.dumps,
+        decoder=json.loads,
+        format="text",
+    )
+
+
+async def get_pool():
+    """Get or create the asyncpg pool (lazy initialization for serverless)."""
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    async with _pool_lock:
+        if _pool is None:
+            try:
+                import asyncpg
+            except ImportError as e:
+                raise RuntimeError("DB_BACKEND=postgres requires asyncpg (install the 'postgres' extra)") from e
+
+            settings = get_settings()
+            if not settings.database_url:
+                raise RuntimeError("DB_BACKEND=postgres requires DATABASE_URL")
+
+            _pool = await asyncpg.create_pool(
+                dsn=settings.database_url,
+                min_size=settings.db_pool_min_size,
+                max_size=settings.db_pool_max_size,
+                statement_cache_size=settings.db_statement_cache_size,
+                init=_init_connection,
+            )
+            logger.info(
+                f"Created Postgres pool (min={settings.db_pool_min_size}, max={settings.db_pool_max_size})"
+            )
+    return _pool
+
+
+async def _match_rule_embeddings(
+    query_embedding: list[float],
+    match_threshold: float,
+    match_count: int,
+    filter_language: str,
+) -> list[dict[str, Any]]:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            MATCH_RULE_EMBEDDINGS_SQL,
+            query_embedding,
+            match_threshold,
+            match_count,
+            filter_language,
+        )
+    return [
+        {
+            "id": str(row["id"]),
+            "rule_id": row["rule_id"],
+            "subsection": row["subsection"],
+            "content": row["content"],
+            "similarity": row["similarity"],
+            "metadata": row["metadata"],
+        }
+        for row in rows
+    ]
+
+
+async def _fetch_rule_embeddings(language: str) -> list[dict[str, Any]]:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(SELECT_RULE_EMBEDDINGS_SQL, language)
+    return [{**dict(row), "id": str(row["id"])} for row in rows]
+
+
+async def _fetch_index_info(language: str) -> dict[str, Any] | None:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchval(SELECT_INDEX_INFO_SQL, language)
+
+
+async def _insert_message(session_id: str, role: str, content: str, timestamp: datetime) -> None:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(INSERT_MESSAGE_SQL, session_id, role, content, timestamp)
+
+
+def _history_rows(rows) -> list[dict[str, Any]]:
+    return [
+        {
+            "role": row["role"],
+            "content": row["content"],
+            # Match the ISO strings PostgREST returns
+            "timestamp": row["timestamp"].isoformat() if isinstance(row["timestamp"], datetime) else row["timestamp"],
+        }
+        for row in rows
+    ]
+
+
+async def _fetch_session_history(session_id: str, limit: int) -> list[dict[str, Any]]:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(SELECT_HISTORY_SQL, session_id, limit)
+    return _history_rows(rows)
+
+
+async def _fetch_history_range(
+    session_id: str, after: datetime | None, before: datetime, limit: int
+) -> list[dict[str, Any]]:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(SELECT_HISTORY_RANGE_SQL, session_id, after, before, limit)
+    return _history_rows(rows)
+
+
+async def _fetch_summary(session_id: str) -> dict[str, Any] | None:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(SELECT_SUMMARY_SQL, session_id)
+    if row is None:
+        return None
+    return {"summary": row["summary"], "summarized_until": row["summarized_until"].isoformat()}
+
+
+async def _upsert_summary(session_id: str, summary: str, summarized_until: datetime) -> None:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(UPSERT_SUMMARY_SQL, session_id, summary, summarized_until)
+
+
+def match_rule_embeddings(
+    query_embedding: list[float],
+    match_threshold: float,
+    match_count: int,
+    filter_language: str,
+) -> list[dict[str, Any]]:
+    """Run the match_rule_embeddings similarity search over the pool.
+
+    Args:
+        query_embedding: Query vector (sent in binary format)
+        match_threshold: Minimum similarity score (0-1)
+        match_count: Maximum number of chunks to return
+        filter_language: Language to filter by
+
+    Returns:
+        List of row dicts shaped like the Supabase RPC response
+    """
+    return run_sync(_match_rule_embeddings(query_embedding, match_threshold, match_count, filter_language))
+
+
+def fetch_rule_embeddings(language: str) -> list[dict[str, Any]]:
+    """Load every rule chunk (with its embedding) for a language over the pool."""
+    return run_sync(_fetch_rule_embeddings(language))
+
+
+def fetch_index_info(language: str) -> dict[str, Any] | None:
+    """Load the embedding index metadata recorded with a language's rule chunks over the pool."""
+    return run_sync(_fetch_index_info(language))
+
+
+def insert_message(session_id: str, role: str, content: str, timestamp: datetime | None = None) -> None:
+    """Insert a chat history message over the pool."""
+    run_sync(_insert_message(session_id, role, content, timestamp or datetime.now(timezone.utc)))
+
+
+def fetch_session_history(session_id: str, limit: int) -> list[dict[str, Any]]:
+    """Load the most recent messages for a session over the pool, oldest first."""
+    return run_sync(_fetch_session_history(session_id, limit))
+
+
+def fetch_history_range(session_id: str, after: datetime | None, before: datetime, limit: int) -> list[dict[str, Any]]:
+    """Load the messages with after < timestamp < before over the pool, oldest first."""
+    return run_sync(_fetch_history_range(session_id, after, before, limit))
+
+
+def fetch_summary(session_id: str) -> dict[str, Any] | None:
+    """Load the rolling summary for a session over the pool."""
+    return run_sync(_fetch_summary(session_id))
+
+
+def upsert_summary(session_id: str, summary: str, summarized_until: datetime) -> None:
+    """Insert or replace the rolling summary for a session over the pool."""
+    run_sync(_upsert_summary(session_id, summary, summarized_until))
+
+
+async def _close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def open_pool() -> None:
+    """Create the pool and its minimum connections (called by the startup warm-up)."""
+    run_sync(get_pool())
+
+
+def close_pool() -> None:
+    """Close the pool if it was created (called on shutdown)."""
+    if _pool is not None:
+        run_sync(_close_pool())
+        logger.info("Closed Postgres pool")
@@ -1,29 +1,232 @@
 """RAG retrieval service for semantic rule search."""
 
+import json
+import threading
+from typing import TYPE_CHECKING
+
 from loguru import logger
-from supabase import create_client, Client
 
 from src.config import get_settings
-from src.services.embeddings import embed_text
+from src.data.corpus import get_snapshot
+from src.services import postgres
+from src.services.metrics import track_upstream
+from src.services.resilience import database_breaker
+from src.services.shard_cache import ShardCache
+from src.services.embeddings import embed_text, get_index_info
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
-_supabase_client: Client | None = None
+_supabase_client: "Client | None" = None
 
 
-def get_supabase() -> Client:
+def get_supabase() -> "Client":
     """Get or create Supabase client."""
     global _supabase_client
     if _supabase_client is None:
+        from supabase import create_client
+
         settings = get_settings()
         _supabase_client = create_client(settings.supabase_url, settings.supabase_key)
     return _supabase_client
 
 
+class EmbeddingIndexMismatch(RuntimeError):
+    """Stored rule vectors were produced by a different embedding backend, model or size."""
+
+
+def load_index_info(language: str) -> dict | None:
+    """Load the embedding index metadata ingestion recorded with a language's chunks."""
+    backend = get_settings().db_backend
+    with database_breaker(backend), track_upstream(backend, "load_index_info"):
+        if backend == "postgres":
+            return postgres.fetch_index_info(language)
+
+        response = (
+            get_supabase().table("rule_embeddings")
+            .select("metadata")
+            .eq("language", language)
+            .limit(1)
+            .execute()
+        )
+    if not response.data:
+        return None
+    return (response.data[0].get("metadata") or {}).get("embedding_index")
+
+
+def check_index(language: str) -> None:
+    """Ensure the stored vectors for a language match the configured embedding backend.
+
+    The stored metadata is cached per language (like the local index shards). Chunks ingested before
+    index metadata was recorded are accepted with a warning.
+
+    Raises:
+        EmbeddingIndexMismatch: If backend, model or dimensions differ
+    """
+    stored = _language_shards("index_info").get(language)
+    expected = get_index_info()
+    if stored is not None and stored != expected:
+        raise EmbeddingIndexMismatch(
+            f"rule_embeddings for language={language} were built with {stored}, "
+            f"but queries are embedded with {expected}; re-run scripts.ingest_rules"
+        )
+
+
+def load_rule_embeddings(language: str) -> list[dict]:
+    """Load every rule chunk with its embedding for a language from the configured backend."""
+    backend = get_settings().db_backend
+    with database_breaker(backend), track_upstream(backend, "load_rule_embeddings"):
+        if backend == "postgres":
+            return postgres.fetch_rule_embeddings(language)
+
+        response = (
+            get_supabase().table("rule_embeddings")
+            .select("id, rule_id, subsection, content, embedding, metadata")
+            .eq("language", language)
+            .execute()
+        )
+    rows = response.data or []
+    for row in rows:
+        # PostgREST returns vectors in their text form ("[0.1,0.2,...]")
+        if isinstance(row["embedding"], str):
+            row["embedding"] = json.loads(row["embedding"])
+    return rows
+
+
+def _snapshot_embeddings(language: str):
+    """(matrix, records, index info) from the corpus snapshot for a local index, if it has the language."""
+    snapshot = get_snapshot()
+    if get_settings().vector_search != "local" or snapshot is None:
+        return None
+    return snapshot.embeddings(language)
+
+
+def _load_index_info_shard(language: str) -> dict | None:
+    if (embeddings := _snapshot_embeddings(language)) is not None:
+        return embeddings[2]
+    stored = load_index_info(language)
+    if stored is None:
+        logger.warning(f"No embedding index metadata for language={language}; re-run scripts.ingest_rules to record it")
+    return stored
+
+
+def _build_local_index(language: str):
+    from src.services.vector_index import VectorIndex
+
+    settings = get_settings()
+    if (embeddings := _snapshot_embeddings(language)) is not None:
+        vectors, rows, _ = embeddings
+        source = "snapshot"
+    else:
+        rows = load_rule_embeddings(language)
+        vectors = [row.pop("embedding") for row in rows]
+        source = "database"
+        if not rows:
+            logger.warning(f"No rule_embeddings for language={language}; its local index is empty until ingested")
+    index = VectorIndex(
+        vectors,
+        rows,
+        dimensions=settings.embedding_dimensions,
+        quantization=settings.vector_quantization,
+        rescore_factor=settings.vector_rescore_factor,
+    )
+    logger.info(
+        f"Built local vector index for language={language} from the {source}: {len(index)} chunks, "
+        f"{index.dimensions} dimensions, {settings.vector_quantization} ({index.nbytes})"
+    )
+    return index
+
+
+_LOADERS = {"index_info": _load_index_info_shard, "local_index": _build_local_index}
+# Missing index metadata is re-read until it is recorded (ingestion can run after startup)
+_CACHE_NONE = {"index_info": False, "local_index": True}
+_shards: dict[str, ShardCache] = {}
+_shards_lock = threading.Lock()
+
+
+def _language_shards(kind: str) -> ShardCache:
+    """Per-language cache of `kind` (loaded on first use, evicted when idle except the default language)."""
+    with _shards_lock:
+        if kind not in _shards:
+            settings = get_settings()
+            _shards[kind] = ShardCache(
+                kind,
+                _LOADERS[kind],
+                settings.language_idle_seconds,
+                pinned=[settings.default_language],
+                cache_none=_CACHE_NONE[kind],
+            )
+        return _shards[kind]
+
+
+def get_local_index(language: str):
+    """Get or build the in-process vector index for a language (VECTOR_SEARCH=local).
+
+    Built on first use from the corpus snapshot's embeddings if it has the
+    language, otherwise from the stored embeddings, truncated to EMBEDDING_DIMENSIONS
+    and quantized per VECTOR_QUANTIZATION. Non-default languages are dropped after
+    LANGUAGE_IDLE_SECONDS without a query.
+    """
+    return _language_shards("local_index").get(language)
+
+
+def match_rule_embeddings(
+    query_embedding: list[float],
+    similarity_threshold: float,
+    top_k: int,
+    language: str,
+) -> list[dict]:
+    """Run the match_rule_embeddings similarity search on the configured backend.
+
+    With VECTOR_SEARCH=local the search runs against the in-process index instead.
+    Either way the stored vectors must come from the configured embedding backend.
+
+    Args:
+        query_embedding: Query embedding vector
+        similarity_threshold: Minimum similarity score (0-1)
+        top_k: Maximum number of results
+        language: Language to filter by
+
+    Returns:
+        List of matching chunk rows ordered by similarity
+    """
+    check_index(language)
+
+    settings = get_settings()
+    if settings.vector_search == "local":
+        index = get_local_index(language)
+        return [
+            {**record, "similarity": similarity}
+            for record, similarity in index.search(query_embedding, top_k, similarity_threshold)
+        ]
+
+    backend = settings.db_backend
+    with database_breaker(backend, "rpc"), track_upstream(backend, "match_rule_embeddings"):
+        if backend == "postgres":
+            return postgres.match_rule_embeddings(query_embedding, similarity_threshold, top_k, language)
+
+        # Convert embedding list to string format for pgvector
+        embedding_str = f"[{','.join(str(x) for x in query_embedding)}]"
+
+        response = get_supabase().rpc(
+            "match_rule_embeddings",
+            {
+                "query_embedding": embedding_str,
+                "match_threshold": similarity_threshold,
+                "match_count": top_k,
+                "filter_language": language
+            }
+        ).execute()
+        return response.data or []
+
+
 def retrieve_relevant_rules(
     query: str,
     top_k: int = 5,
     similarity_threshold: float = 0.4,
-    language: str = "en"
+    language: str = "en",
+    query_embedding: list[float] | None = None,
 ) -> list[str]:
     """Retrieve relevant rule IDs using semantic search.
 
@@ -35,6 +238,7 @@ def retrieve_relevant_rules(
         top_k: Maximum number of results to retrieve
         similarity_threshold: Minimum similarity score (0-1)
         language: Language to filter by
+        query_embedding: Precomputed embedding of the query (skips embedding it here)
 
     Returns:
         List of unique rule IDs (e.g., ["rule_27", "rule_18"])
@@ -45,33 +249,21 @@ def retrieve_relevant_rules(
 
     try:
         # Generate query embedding
-        logger.debug(f"Generating embedding for query: {query[:100]}...")
-        query_embedding = embed_text(query)
+        if query_embedding is None:
+            logger.debug(f"Generating embedding for query: {query[:100]}...")
+            query_embedding = embed_text(query)
 
-        # Call the Supabase RPC function for similarity search
-        supabase = get_supabase()
+        # Similarity search via the match_rule_embeddings function
+        results = match_rule_embeddings(query_embedding, similarity_threshold, top_k, language)
 
-        # Convert embedding list to string format for pgvector
-        embedding_str = f"[{','.join(str(x) for x in query_embedding)}]"
-
-        response = supabase.rpc(
-            "match_rule_embeddings",
-            {
-                "query_embedding": embedding_str,
-                "match_threshold": similarity_threshold,
-                "match_count": top_k,
-                "filter_language": language
-            }
-        ).execute()
-
-        if not response.data:
+        if not results:
             logger.info(f"No RAG results found above threshold {similarity_threshold}")
             return []
 
         # Extract unique rule IDs, preserving order by similarity
         seen = set()
         rule_ids = []
-        for result in response.data:
+        for result in results:
             rule_id = result["rule_id"]
             similarity = result["similarity"]
             if rule_id not in seen:
@@ -113,22 +305,7 @@ def retrieve_with_scores(
 
     try:
         query_embedding = embed_text(query)
-        supabase = get_supabase()
-
-        # Convert embedding list to string format for pgvector
-        embedding_str = f"[{','.join(str(x) for x in query_embedding)}]"
-
-        response = supabase.rpc(
-            "match_rule_embeddings",
-            {
-                "query_embedding": embedding_str,
-                "match_threshold": similarity_threshold,
-                "match_count": top_k,
-                "filter_language": language
-            }
-        ).execute()
-
-        results = response.data or []
+        results = match_rule_embeddings(query_embedding, similarity_threshold, top_k, language)
         logger.info(f"RAG retrieval returned {len(results)} chunks")
 
         return [
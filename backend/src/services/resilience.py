@@ -0,0 +1,131 @@
+"""Circuit breakers and retry backoff for upstream dependencies.
+
+Each upstream (one breaker per LLM model, embeddings, Supabase REST, Supabase
+RPC, direct Postgres) gets a circuit breaker. After circuit_failure_threshold
+consecutive failures the breaker opens and calls fail fast with
+CircuitOpenError, so callers take their fallback immediately instead of
+waiting out timeouts. After circuit_reset_seconds one probe call is let
+through (half-open): success closes the breaker, failure reopens it.
+
+Usage:
+    with get_breaker("embeddings"):
+        response = client.embeddings.create(...)
+"""
+
+import random
+import threading
+import time
+
+from loguru import logger
+from src.config import get_settings
+from src.services.metrics import CIRCUIT_REJECTIONS, CIRCUIT_TRANSITIONS
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open (retry in {retry_after:.1f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing (thread-safe).
+
+    Also a context manager: entering checks the breaker, exiting records the
+    outcome. Only Exception subclasses count as failures, so a cancelled or
+    closed generator doesn't trip the breaker.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            log = logger.warning if state == OPEN else logger.info
+            log(f"Circuit '{self.name}': {self.state} -> {state}")
+            CIRCUIT_TRANSITIONS.inc(upstream=self.name, state=state)
+            self.state = state
+
+    def allow(self) -> None:
+        """Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with a probe already in flight
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if self.state == OPEN and elapsed >= self.reset_seconds:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+        CIRCUIT_REJECTIONS.inc(upstream=self.name)
+        raise CircuitOpenError(self.name, max(self.reset_seconds - elapsed, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def __enter__(self) -> "CircuitBreaker":
+        self.allow()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.record_failure()
+        else:
+            self.record_success()
+        return False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get or create the breaker for an upstream."""
+    with _lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            settings = get_settings()
+            breaker = CircuitBreaker(name, settings.circuit_failure_threshold, settings.circuit_reset_seconds)
+            _breakers[name] = breaker
+    return breaker
+
+
+def database_breaker(backend: str, operation: str = "rest") -> CircuitBreaker:
+    """Breaker for a database call: "postgres", or "supabase_rest"/"supabase_rpc"."""
+    return get_breaker("postgres" if backend == "postgres" else f"supabase_{operation}")
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for a retry after `attempt` failures (seconds)."""
+    settings = get_settings()
+    ceiling = min(settings.retry_max_delay_ms, settings.retry_base_delay_ms * 2 ** attempt)
+    return random.uniform(0, ceiling) / 1000
@@ -4,9 +4,24 @@ Used when LLM structured output fails after retries.
 Uses fuzzy string matching to identify relevant COLREG rules.
 """
 
+from functools import lru_cache
+
 from rapidfuzz import fuzz
 from loguru import logger
-from src.data.rules import COLREG_RULES
+from src.data.corpus import get_snapshot
+from src.data.rule_store import get_rules
+
+
+@lru_cache(maxsize=1)
+def _keyword_table() -> list[tuple[str, str, list[str]]]:
+    """(rule_id, lowercased title, lowercased keywords) for every rule."""
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        return snapshot.keyword_table()
+    return [
+        (rule_id, rule_data.get("title", "").lower(), [kw.lower() for kw in rule_data.get("keywords", [])])
+        for rule_id, rule_data in get_rules().items()
+    ]
 
 
 def keyword_fallback_extraction(query: str, top_k: int = 5) -> list[str]:
@@ -26,15 +41,12 @@ def keyword_fallback_extraction(query: str, top_k: int = 5) -> list[str]:
     query_lower = query.lower()
     scores: dict[str, float] = {}
 
-    for rule_id, rule_data in COLREG_RULES.items():
-        keywords = rule_data.get("keywords", [])
-        title = rule_data.get("title", "").lower()
-
+    for rule_id, title, keywords in _keyword_table():
         # Score based on keyword matches
         keyword_score = 0.0
         if keywords:
             keyword_score = sum(
-                fuzz.partial_ratio(query_lower, kw.lower())
+                fuzz.partial_ratio(query_lower, kw)
                 for kw in keywords
             ) / len(keywords)
 
@@ -64,7 +76,7 @@ def get_rule_by_number(rule_number: int | str) -> str | None:
         Rule identifier (e.g., "rule_14") or None if not found
     """
     rule_id = f"rule_{rule_number}"
-    if rule_id in COLREG_RULES:
+    if rule_id in get_rules():
         return rule_id
     return None
 
@@ -85,7 +97,7 @@ def get_annex_by_number(annex_number: int | str) -> str | None:
 
     if annex_str in roman_map:
         annex_id = f"annex_{roman_map[annex_str]}"
-        if annex_id in COLREG_RULES:
+        if annex_id in get_rules():
             return annex_id
 
     return None
@@ -0,0 +1,188 @@
+"""In-memory write-through cache for recent chat history.
+
+Holds the last N messages per session so an active conversation can load its
+history without a Supabase round-trip. Messages are appended by save_message
+(write-through) and the cache is hydrated from the store on a miss, which also
+covers restarts and sessions that moved between workers. Entries are evicted
+LRU-first, after an idle TTL, and when the total cached content exceeds a
+memory cap.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+from src.config import get_settings
+
+
+# Rough per-message overhead (dict + strings) added to content length
+_MESSAGE_OVERHEAD_BYTES = 200
+
+
+def _message_size(message: dict) -> int:
+    return len(message.get("content", "")) + _MESSAGE_OVERHEAD_BYTES
+
+
+@dataclass
+class _SessionEntry:
+    """Cached history for a single session."""
+    messages: deque
+    complete: bool  # True when the entry holds the session's entire history
+    last_access: float
+    size: int = field(default=0)
+
+
+class SessionHistoryCache:
+    """Thread-safe LRU cache of the most recent messages per session."""
+
+    def __init__(
+        self,
+        max_messages: int = 20,
+        max_sessions: int = 1000,
+        ttl_seconds: float = 1800.0,
+        max_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._entries: OrderedDict[str, _SessionEntry] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, limit: int) -> list[dict] | None:
+        """Return the last `limit` messages, or None if the cache can't answer.
+
+        Args:
+            session_id: Unique session identifier
+            limit: Maximum number of messages wanted
+
+        Returns:
+            Messages ordered by timestamp, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+
+            now = time.monotonic()
+            if now - entry.last_access > self.ttl_seconds:
+                self._remove(session_id)
+                return None
+
+            # Only answer if we hold enough messages (or all there are)
+            if len(entry.messages) < limit and not entry.complete:
+                return None
+
+            entry.last_access = now
+            self._entries.move_to_end(session_id)
+            messages = list(entry.messages)
+            return messages[-limit:] if limit < len(messages) else messages
+
+    def put(self, session_id: str, messages: list[dict], complete: bool) -> None:
+        """Hydrate a session from the store, replacing any existing entry.
+
+        Args:
+            session_id: Unique session identifier
+            messages: Most recent messages ordered by timestamp
+            complete: Whether `messages` is the session's entire history
+        """
+        kept = messages[-self.max_messages:]
+        entry = _SessionEntry(
+            messages=deque(kept, maxlen=self.max_messages),
+            complete=complete and len(kept) == len(messages),
+            last_access=time.monotonic(),
+            size=sum(_message_size(m) for m in kept),
+        )
+        with self._lock:
+            self._remove(session_id)
+            self._entries[session_id] = entry
+            self._total_bytes += entry.size
+            self._evict()
+
+    def append(self, session_id: str, message: dict) -> bool:
+        """Write-through a newly saved message.
+
+        Only sessions that are already cached are updated; an uncached session
+        is hydrated from the store on its next load instead, so a partial
+        history is never served.
+
+        Returns:
+            True if the message was appended to a cached session
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return False
+
+            if len(entry.messages) == self.max_messages:
+                # Oldest message falls out, so the entry is no longer the full history
+                entry.size -= _message_size(entry.messages[0])
+                self._total_bytes -= _message_size(entry.messages[0])
+                entry.complete = False
+
+            entry.messages.append(message)
+            entry.size += _message_size(message)
+            self._total_bytes += _message_size(message)
+            entry.last_access = time.monotonic()
+            self._entries.move_to_end(session_id)
+            self._evict()
+            return True
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop a session from the cache."""
+        with self._lock:
+            self._remove(session_id)
+
+    def clear(self) -> None:
+        """Drop all cached sessions."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _remove(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+
+    def _evict(self) -> None:
+        """Evict idle, least recently used and over-budget entries (lock held)."""
+        now = time.monotonic()
+        while self._entries:
+            session_id, entry = next(iter(self._entries.items()))
+            expired = now - entry.last_access > self.ttl_seconds
+            over_capacity = len(self._entries) > self.max_sessions or self._total_bytes > self.max_bytes
+            if not (expired or over_capacity):
+                break
+            self._remove(session_id)
+            logger.debug(f"Evicted session {session_id} from history cache")
+
+
+_cache: SessionHistoryCache | None = None
+
+
+def get_session_cache() -> SessionHistoryCache | None:
+    """Get or create the process-wide history cache (None when disabled)."""
+    global _cache
+    settings = get_settings()
+    if not settings.session_cache_enabled:
+        return None
+    if _cache is None:
+        _cache = SessionHistoryCache(
+            max_messages=settings.session_cache_max_messages,
+            max_sessions=settings.session_cache_max_sessions,
+            ttl_seconds=settings.session_cache_ttl_seconds,
+            max_bytes=settings.session_cache_max_bytes,
+        )
+    return _cache
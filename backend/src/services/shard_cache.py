@@ -0,0 +1,92 @@
+"""Per-language shards loaded on first use and evicted when idle.
+
+Language-specific data (rule text variants, local vector indexes, embedding
+index metadata) is only loaded once a request in that language arrives, and
+dropped again after language_idle_seconds without one. Pinned keys (the
+default language) are never evicted, so English traffic pays nothing extra
+for other languages being configured.
+"""
+
+import threading
+import time
+from typing import Callable, Generic, Iterable, TypeVar
+
+from loguru import logger
+
+
+T = TypeVar("T")
+
+
+class ShardCache(Generic[T]):
+    """Thread-safe map of key -> lazily loaded value with idle eviction."""
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[str], T],
+        idle_seconds: float,
+        pinned: Iterable[str] = (),
+        cache_none: bool = True,
+    ):
+        """
+        Args:
+            name: Label for log messages
+            loader: Builds the value for a key (called once per load, outside the cache lock)
+            idle_seconds: Unpinned values unused for this long are evicted (0 disables eviction)
+            pinned: Keys that are never evicted
+            cache_none: Whether a None result is cached; if not, the next get loads again
+                (a loader that raises is never cached)
+        """
+        self.name = name
+        self.loader = loader
+        self.idle_seconds = idle_seconds
+        self.pinned = set(pinned)
+        self.cache_none = cache_none
+
+        self._values: dict[str, T] = {}
+        self._last_used: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+
+    def get(self, key: str) -> T:
+        """Return the value for a key, loading it on first use."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            if key in self._values:
+                self._last_used[key] = now
+                return self._values[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Loading one shard doesn't block lookups of the others
+        with load_lock:
+            with self._lock:
+                if key in self._values:
+                    self._last_used[key] = time.monotonic()
+                    return self._values[key]
+            value = self.loader(key)
+            if value is None and not self.cache_none:
+                return None
+            with self._lock:
+                self._values[key] = value
+                self._last_used[key] = time.monotonic()
+        logger.info(f"Loaded {self.name} shard for {key}")
+        return value
+
+    def _evict_idle(self, now: float) -> None:
+        if self.idle_seconds <= 0:
+            return
+        for key, last_used in list(self._last_used.items()):
+            if key not in self.pinned and now - last_used > self.idle_seconds:
+                del self._values[key]
+                del self._last_used[key]
+                logger.info(f"Evicted idle {self.name} shard for {key}")
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._values
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._last_used.clear()
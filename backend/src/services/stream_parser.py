@@ -9,7 +9,7 @@ from dataclasses import dataclass
 from typing import AsyncGenerator, Literal
 from loguru import logger
 
-from src.data.visual_catalog import get_visual_by_id
+from src.data.corpus import get_visual_by_id
 
 
 # Pattern: [[VISUAL:type:config]] where type:config forms the catalog ID
@@ -0,0 +1,176 @@
+"""Rolling conversation summarization for long sessions.
+
+Keeps prompt size bounded: the most recent turns that fit a token budget are
+sent verbatim, and everything older is folded into a per-session summary
+stored in Supabase (chat_summaries) next to chat_history. The summary is
+refreshed in the background after each turn completes.
+"""
+
+from datetime import timezone
+from loguru import logger
+from src.config import get_settings
+from src.services import postgres
+from src.services.chat_history import get_supabase, load_messages_between, load_session_history, parse_timestamp
+from src.services.llm import generate_sync_response
+from src.services.metrics import track_upstream
+from src.services.resilience import database_breaker
+
+
+# Messages folded per refresh (a long unsummarized backlog is folded over several turns)
+FOLD_BATCH_MESSAGES = 100
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and a COLREGs (International Regulations for Preventing Collisions at Sea) assistant.
+
+{existing_summary}New messages to fold into the summary:
+{new_messages}
+
+Write an updated summary in under {max_words} words. Keep the vessel types, situations and rule numbers discussed, what the user wanted to know and any conclusions reached. Write plain prose with no preamble."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def split_history(messages: list[dict], token_budget: int, min_recent: int = 2) -> tuple[list[dict], list[dict]]:
+    """Split history into older messages (to summarize) and recent ones (kept verbatim).
+
+    Walks back from the newest message until the token budget is spent. The
+    recent window always keeps at least `min_recent` messages and starts on a
+    user message so turns aren't cut in half.
+
+    Args:
+        messages: Messages ordered by timestamp
+        token_budget: Token budget for verbatim history
+        min_recent: Minimum number of messages kept verbatim
+
+    Returns:
+        Tuple of (older, recent) message lists
+    """
+    cut = len(messages)
+    used = 0
+    while cut > 0:
+        cost = estimate_tokens(messages[cut - 1]["content"])
+        if used + cost > token_budget and len(messages) - cut >= min_recent:
+            break
+        used += cost
+        cut -= 1
+
+    # Don't start the verbatim window on an assistant reply
+    while 0 < cut < len(messages) and messages[cut]["role"] != "user":
+        cut += 1
+
+    return messages[:cut], messages[cut:]
+
+
+def load_summary(session_id: str) -> dict | None:
+    """
+    Load the rolling summary for a session.
+
+    Args:
+        session_id: Unique session identifier
+
+    Returns:
+        Dict with 'summary' and 'summarized_until', or None if there is none
+    """
+    try:
+        backend = get_settings().db_backend
+        with database_breaker(backend), track_upstream(backend, "load_summary"):
+            if backend == "postgres":
+                return postgres.fetch_summary(session_id)
+
+            response = (
+                get_supabase().table("chat_summaries")
+                .select("summary, summarized_until")
+                .eq("session_id", session_id)
+                .limit(1)
+                .execute()
+            )
+        return response.data[0] if response.data else None
+
+    except Exception as e:
+        logger.error(f"Error loading session summary: {e}")
+        return None
+
+
+def save_summary(session_id: str, summary: str, summarized_until: str):
+    """
+    Upsert the rolling summary for a session.
+
+    Args:
+        session_id: Unique session identifier
+        summary: Summary text
+        summarized_until: Timestamp of the newest message folded into the summary
+    """
+    try:
+        backend = get_settings().db_backend
+        with database_breaker(backend), track_upstream(backend, "save_summary"):
+            if backend == "postgres":
+                postgres.upsert_summary(session_id, summary, parse_timestamp(summarized_until).replace(tzinfo=timezone.utc))
+            else:
+                get_supabase().table("chat_summaries").upsert({
+                    "session_id": session_id,
+                    "summary": summary,
+                    "summarized_until": summarized_until,
+                }).execute()
+        logger.info(f"Saved summary for session {session_id}")
+
+    except Exception as e:
+        logger.error(f"Error saving session summary: {e}")
+
+
+def format_summary_message(summary: str) -> dict:
+    """Format a stored summary as a message for the LLM history."""
+    return {"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}
+
+
+def refresh_summary(session_id: str):
+    """
+    Fold turns that dropped out of the verbatim window into the session summary.
+
+    Runs in the background after a turn completes. Uses the same split as
+    load_history_node to find where the verbatim window begins, then folds
+    every message between the end of the current summary and that point,
+    including turns that left the history_max_messages window while still
+    fitting the token budget.
+
+    Args:
+        session_id: Unique session identifier
+    """
+    settings = get_settings()
+
+    try:
+        messages = load_session_history(session_id, limit=settings.history_max_messages)
+        _, recent = split_history(messages, settings.history_token_budget)
+        if not recent:
+            return
+
+        existing = load_summary(session_id)
+        older = load_messages_between(
+            session_id,
+            existing["summarized_until"] if existing else None,
+            recent[0]["timestamp"],
+            limit=FOLD_BATCH_MESSAGES,
+        )
+        if not older:
+            return
+
+        new_messages = "\n".join(
+            f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in older
+        )
+        existing_summary = f"Current summary:\n{existing['summary']}\n\n" if existing else ""
+        prompt = SUMMARY_PROMPT.format(
+            existing_summary=existing_summary,
+            new_messages=new_messages,
+            max_words=int(settings.summary_max_tokens * 0.75),
+        )
+
+        summary = generate_sync_response(prompt, call_site="summarize").strip()
+        if summary:
+            save_summary(session_id, summary, older[-1]["timestamp"])
+            logger.info(f"Folded {len(older)} messages into summary for session {session_id}")
+
+    except Exception as e:
+        # Background task - never surfaces to the user
+        logger.error(f"Error refreshing session summary: {e}")
@@ -0,0 +1,135 @@
+"""In-process vector index with reduced dimensions and quantized search.
+
+Holds the rule chunk embeddings as a float32 matrix plus an optional
+quantized copy used for a coarse first pass:
+- int8: per-dimension scalar quantization (4x smaller than float32)
+- binary: sign bits compared by Hamming distance (32x smaller)
+
+A search scores every vector on the quantized copy, keeps the best
+top_k * rescore_factor candidates, and rescores only those exactly against
+the float32 vectors. text-embedding-3 vectors are Matryoshka-trained, so
+they can also be truncated to fewer dimensions (and re-normalized) with a
+small loss in quality.
+"""
+
+from typing import Any, Literal
+
+import numpy as np
+
+
+Quantization = Literal["none", "int8", "binary"]
+
+# Set bits per byte value, for Hamming distance over packed sign bits
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def truncate_embeddings(vectors: Any, dimensions: int | None = None) -> np.ndarray:
+    """Truncate embeddings to their first `dimensions` components and L2-normalize.
+
+    Args:
+        vectors: One vector or a matrix of row vectors
+        dimensions: Target dimensions (None keeps all)
+
+    Returns:
+        float32 array of unit vectors
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if dimensions is not None:
+        matrix = matrix[..., :dimensions]
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    if np.allclose(norms, 1.0, atol=1e-5):
+        # Already unit vectors (e.g. a memory-mapped snapshot matrix): keep the view, no copy
+        return matrix
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class VectorIndex:
+    """Cosine-similarity index over a fixed set of records."""
+
+    def __init__(
+        self,
+        vectors: Any,
+        records: list[dict],
+        dimensions: int | None = None,
+        quantization: Quantization = "int8",
+        rescore_factor: int = 4,
+    ):
+        """
+        Args:
+            vectors: Embedding matrix (one row per record)
+            records: Row data returned with each hit
+            dimensions: Truncate vectors to this many dimensions (None keeps all)
+            quantization: Quantized copy used for the coarse pass ("none" searches float32 directly)
+            rescore_factor: Candidates kept per requested result for exact rescoring (0 disables rescoring)
+        """
+        self.records = records
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+
+        if not records:
+            # Nothing ingested (e.g. a language without rows): an empty index whose searches return no hits
+            self.vectors = np.zeros((0, dimensions or 0), dtype=np.float32)
+            self.dimensions = self.vectors.shape[1]
+            self.scale = np.ones(self.dimensions, dtype=np.float32)
+            self.codes = np.zeros((0, 0), dtype=np.uint8)
+            return
+
+        self.vectors = truncate_embeddings(vectors, dimensions)
+        self.dimensions = self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+
+        if quantization == "int8":
+            # Symmetric per-dimension scale so each column uses the full int8 range
+            self.scale = np.maximum(np.abs(self.vectors).max(axis=0), 1e-12) / 127
+            self.codes = np.round(self.vectors / self.scale).astype(np.int8)
+        elif quantization == "binary":
+            self.codes = np.packbits(self.vectors > 0, axis=1)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def nbytes(self) -> dict[str, int]:
+        """Memory used by the float32 vectors and the quantized copy."""
+        quantized = self.codes.nbytes if self.quantization != "none" else 0
+        return {"float32": self.vectors.nbytes, "quantized": quantized}
+
+    def _coarse_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarities from the quantized copy."""
+        if self.quantization == "int8":
+            return self.codes @ (query * self.scale)
+        # Hamming distance -> similarity in [-1, 1] (1 - 2 * fraction of differing signs)
+        query_bits = np.packbits(query > 0)
+        distances = _POPCOUNT[np.bitwise_xor(self.codes, query_bits)].sum(axis=1, dtype=np.int32)
+        return 1.0 - 2.0 * distances / self.dimensions
+
+    def search(self, query: Any, top_k: int, threshold: float = 0.0) -> list[tuple[dict, float]]:
+        """Find the most similar records.
+
+        Args:
+            query: Query embedding (truncated to the index dimensions)
+            top_k: Maximum number of results
+            threshold: Minimum similarity score (0-1)
+
+        Returns:
+            (record, similarity) pairs ordered by similarity
+        """
+        if not self.records:
+            return []
+        query = truncate_embeddings(query, self.dimensions)
+
+        if self.quantization == "none":
+            candidates = np.arange(len(self.records))
+            scores = self.vectors @ query
+        else:
+            coarse = self._coarse_scores(query)
+            count = min(len(self.records), max(top_k * self.rescore_factor, top_k))
+            candidates = np.argpartition(-coarse, count - 1)[:count]
+            # Exact float32 rescoring of the shortlist (or coarse scores if disabled)
+            scores = self.vectors[candidates] @ query if self.rescore_factor else coarse[candidates]
+
+        order = np.argsort(-scores)[:top_k]
+        return [
+            (self.records[candidates[i]], float(scores[i]))
+            for i in order
+            if scores[i] > threshold
+        ]
@@ -0,0 +1,153 @@
+"""Startup warm-up and readiness.
+
+The first request after a deploy would otherwise pay for importing LiteLLM
+(and loading its model cost map), compiling the prep graph, creating the
+Supabase/Postgres and embedding clients with their TLS handshakes, building
+the structured-output JSON schemas and loading the rule corpus. The lifespan
+hook runs these steps in a worker thread right after startup; /ready reports
+503 until they have finished (or warmup_timeout_seconds has passed), while
+/health keeps answering immediately.
+
+A failed step is logged and recorded but doesn't block readiness: the same
+work is retried lazily by the first request that needs it. LLM provider
+connections are not pre-opened, since that would need a billed completion.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from loguru import logger
+
+from src.config import get_settings
+
+
+@dataclass
+class WarmupState:
+    """Progress of the startup warm-up."""
+    started: float | None = None
+    finished: float | None = None
+    steps: dict[str, dict] = field(default_factory=dict)  # name -> {"status", "ms", "error"}
+
+
+_state = WarmupState()
+
+
+def _import_llm() -> None:
+    from src.services.llm import get_litellm
+
+    get_litellm()
+
+
+def _build_graph() -> None:
+    from src.graph.workflow import get_complete_graph
+
+    get_complete_graph()  # Compiles the prep graph as its subgraph
+
+
+def _build_schemas() -> None:
+    from src.models.extraction import QueryAnalysis, RuleExtraction, SuggestedQuestions
+    from src.services.llm import _json_schema_format
+
+    for schema in (QueryAnalysis, RuleExtraction, SuggestedQuestions):
+        _json_schema_format(schema)
+
+
+def _load_corpus() -> None:
+    from src.data.corpus import catalog_reference, general_info, visual_catalog
+    from src.data.extended_content import get_extended_content
+    from src.data.rule_store import get_rules
+    from src.services.rule_matcher import _keyword_table
+
+    get_rules(get_settings().default_language)
+    general_info()
+    visual_catalog()
+    catalog_reference()
+    get_extended_content()
+    _keyword_table()
+
+
+def _connect_database() -> None:
+    from src.services import chat_history, postgres
+    from src.services.rag_retrieval import check_index
+
+    if get_settings().db_backend == "postgres":
+        postgres.open_pool()
+    else:
+        # Separate clients (and connection pools) for history and retrieval
+        chat_history.get_supabase().table("chat_history").select("role").limit(1).execute()
+    # Loads (and caches) the embedding index metadata over the retrieval connection
+    check_index(get_settings().default_language)
+
+
+def _connect_embeddings() -> None:
+    from src.services.embeddings import get_embedding_backend
+
+    settings = get_settings()
+    get_embedding_backend().embed(["warm-up"], settings.embedding_dimensions)
+
+
+def _prefetch_embeddings() -> None:
+    from src.services.rag_retrieval import get_local_index
+
+    get_local_index(get_settings().default_language)
+
+
+def warmup_steps() -> list[tuple[str, Callable[[], None]]]:
+    """Steps to run for the current settings, in order."""
+    settings = get_settings()
+    steps = [
+        ("llm", _import_llm),
+        ("graph", _build_graph),
+        ("schemas", _build_schemas),
+        ("corpus", _load_corpus),
+    ]
+    if settings.warmup_connections:
+        steps += [("database", _connect_database), ("embeddings", _connect_embeddings)]
+    if settings.warmup_prefetch_embeddings and settings.vector_search == "local":
+        steps.append(("local_index", _prefetch_embeddings))
+    return steps
+
+
+def run_warmup() -> WarmupState:
+    """Run every warm-up step, recording its duration and any error."""
+    _state.started = time.monotonic()
+    for name, step in warmup_steps():
+        _state.steps[name] = {"status": "running"}
+        start = time.perf_counter()
+        try:
+            step()
+            _state.steps[name] = {"status": "ok", "ms": round((time.perf_counter() - start) * 1000, 1)}
+        except Exception as e:
+            _state.steps[name] = {"status": "failed", "ms": round((time.perf_counter() - start) * 1000, 1), "error": str(e)}
+            logger.warning(f"Warm-up step {name} failed: {e}")
+    _state.finished = time.monotonic()
+    logger.info(f"Warm-up finished in {_state.finished - _state.started:.2f}s: {_state.steps}")
+    return _state
+
+
+def start_warmup() -> asyncio.Task | None:
+    """Start the warm-up in a worker thread (from the lifespan hook), unless disabled."""
+    if not get_settings().warmup_enabled:
+        return None
+    return asyncio.create_task(asyncio.to_thread(run_warmup))
+
+
+def readiness() -> tuple[bool, dict]:
+    """Whether the app is ready for traffic, with the warm-up details."""
+    settings = get_settings()
+    if not settings.warmup_enabled:
+        return True, {"status": "ready", "warmup": "disabled"}
+
+    elapsed = time.monotonic() - _state.started if _state.started is not None else 0.0
+    if _state.finished is not None:
+        status = "ready"
+    elif _state.started is not None and elapsed > settings.warmup_timeout_seconds:
+        status = "ready"  # Don't keep an instance out of rotation over a hung step
+    else:
+        status = "warming_up"
+    details = {"status": status, "warmup_seconds": round(elapsed, 3), "steps": _state.steps}
+    if _state.finished is not None:
+        details["warmup_seconds"] = round(_state.finished - _state.started, 3)
+    return status == "ready", details
@@ -0,0 +1,27 @@
+-- Rolling Conversation Summaries
+-- Migration: 002_chat_summaries
+-- Description: Stores a per-session summary of older chat_history turns so long
+-- sessions can send a compact summary plus recent turns instead of raw history
+
+CREATE TABLE IF NOT EXISTS chat_summaries (
+  session_id TEXT PRIMARY KEY,             -- Matches chat_history.session_id
+  summary TEXT NOT NULL,                   -- Rolling summary of folded turns
+  summarized_until TIMESTAMPTZ NOT NULL,   -- Timestamp of the newest message folded into the summary
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Enable Row Level Security
+ALTER TABLE chat_summaries ENABLE ROW LEVEL SECURITY;
+
+-- Same access model as chat_history (backend reads and writes with its key)
+CREATE POLICY "Service role full access for chat_summaries"
+  ON chat_summaries
+  FOR ALL
+  USING (true)
+  WITH CHECK (true);
+
+-- Apply updated_at trigger (function created in 001_rule_embeddings)
+CREATE TRIGGER update_chat_summaries_updated_at
+  BEFORE UPDATE ON chat_summaries
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
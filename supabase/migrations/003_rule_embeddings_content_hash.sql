@@ -0,0 +1,12 @@
+-- Content Hashes for Incremental Ingestion
+-- Migration: 003_rule_embeddings_content_hash
+-- Description: Identifies each rule chunk by a hash of its text, metadata and
+-- embedding configuration so scripts.ingest_rules can upsert changed chunks and
+-- delete orphans instead of rebuilding the whole index
+
+ALTER TABLE rule_embeddings
+  ADD COLUMN IF NOT EXISTS content_hash TEXT;  -- sha256 set by scripts.ingest_rules (NULL for older rows)
+
+-- Upsert target for ingestion (NULL hashes don't conflict with each other)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rule_embeddings_lang_hash
+  ON rule_embeddings(language, content_hash);